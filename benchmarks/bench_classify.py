@@ -0,0 +1,52 @@
+"""
+Rule matching and classification across dataset and output sizes.
+"""
+from fixshell.config import DATASET_DIR
+from fixshell.engine.classifier import Classifier
+from fixshell.engine.rule_matcher import RuleMatcher
+from harness import benchmark
+from corpus import load_rules, sample_error, synthetic_output, synthetic_rules
+
+KB = 1024
+MB = 1024 * KB
+OUTPUT_SIZES = [1 * KB, 100 * KB, 1 * MB]
+FULL_OUTPUT_SIZES = [10 * MB, 100 * MB]
+RULE_COUNTS = [50, 500]
+FULL_RULE_COUNTS = [2000]
+
+def _matcher_case(rule_count):
+    rules = synthetic_rules(rule_count)
+    return RuleMatcher(rules), synthetic_output(16 * KB, sample_error(rules[-1]))
+
+def _output_case(size):
+    rules = load_rules()
+    return RuleMatcher(rules), synthetic_output(size, sample_error(rules[len(rules) // 2]))
+
+def _classifier_case(size):
+    rules = load_rules()
+    return Classifier(DATASET_DIR), synthetic_output(size, sample_error(rules[0]))
+
+@benchmark(params=RULE_COUNTS, full_params=FULL_RULE_COUNTS, setup=_matcher_case)
+def find_matches_by_rule_count(case):
+    matcher, output = case
+    matcher.find_matches(output)
+
+@benchmark(params=RULE_COUNTS, full_params=FULL_RULE_COUNTS, setup=_matcher_case)
+def get_best_match_by_rule_count(case):
+    matcher, output = case
+    matcher.get_best_match(output)
+
+@benchmark(params=OUTPUT_SIZES, full_params=FULL_OUTPUT_SIZES, setup=_output_case, repeat=3)
+def get_best_match_by_output_size(case):
+    matcher, output = case
+    matcher.get_best_match(output)
+
+@benchmark(params=OUTPUT_SIZES, full_params=FULL_OUTPUT_SIZES, setup=_classifier_case, repeat=3)
+def classify_by_output_size(case):
+    classifier, output = case
+    classifier.classify(output, mode="git")
+
+@benchmark(params=OUTPUT_SIZES, full_params=FULL_OUTPUT_SIZES, setup=_classifier_case, repeat=3)
+def classify_routed_by_output_size(case):
+    classifier, output = case
+    classifier.classify(output, mode="linux", argv=["docker", "build", "."])
@@ -0,0 +1,37 @@
+"""
+Per-command overhead of Executor.run and GitHubContext.refresh.
+"""
+import os
+import subprocess
+import sys
+import tempfile
+
+from fixshell.engine.executor import Executor
+from fixshell.modes.github.github_context import GitHubContext
+from harness import benchmark
+
+@benchmark(params=["true", "echo"], setup=lambda cmd: (Executor(), [cmd] if cmd == "true" else [cmd, "x" * 1024]), repeat=20)
+def executor_run(case):
+    executor, cmd = case
+    executor.run(cmd, "bench")
+
+@benchmark(setup=lambda _: Executor(dry_run=True), repeat=50)
+def executor_run_dry(executor):
+    executor.run(["git", "status"], "bench")
+
+def _context_case(_):
+    repo = tempfile.mkdtemp(prefix="fixshell-bench-")
+    subprocess.run(["git", "init", "-q", "-b", "main", repo], check=True)
+    subprocess.run(["git", "-C", repo, "remote", "add", "origin", "https://github.com/example/bench.git"], check=True)
+    # refresh() inspects the process working directory; run.py restores it
+    os.chdir(repo)
+    return GitHubContext()
+
+@benchmark(setup=_context_case, repeat=10)
+def github_context_refresh(context):
+    context.refresh()
+
+@benchmark(repeat=5)
+def cli_cold_start(_):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    subprocess.run([sys.executable, "-c", "from fixshell.main import cli; cli(['--version'])"], env=env, capture_output=True, check=True)
@@ -0,0 +1,16 @@
+"""
+Output cost per renderer backend for a fatal report and a summary table.
+"""
+from fixshell.ui.backends import select_backend
+from harness import benchmark
+
+RAW_ERROR = "npm ERR! code ERESOLVE\n" * 20000
+ROWS = [(f"/srv/repos/service-{i}", "OK", "3/3", "1.20s") for i in range(200)]
+
+@benchmark(params=["rich", "plain", "json"], setup=select_backend, repeat=5)
+def fatal_report(backend):
+    backend.fatal("NPM_ERESOLVE", "Run npm install --legacy-peer-deps", RAW_ERROR)
+
+@benchmark(params=["rich", "plain", "json"], setup=select_backend, repeat=5)
+def summary_table(backend):
+    backend.table("Fan-out Summary", ["Repository", "Outcome", "Steps", "Time"], ROWS)
@@ -0,0 +1,65 @@
+"""
+Synthetic corpora derived from the shipped JSON datasets.
+"""
+import random
+import re
+from typing import Any, Dict, List
+
+from fixshell.config import DATASET_DIR
+from fixshell.engine.rule_model import load_rules as load_rule_set
+
+NOISE_LINES = [
+    "INFO  Starting worker pool with 8 threads",
+    "DEBUG resolved dependency tree in 0.42s",
+    "Step 4/12 : RUN pip install -r requirements.txt",
+    "remote: Counting objects: 100% (1234/1234), done.",
+    "npm WARN deprecated request@2.88.2: request has been deprecated",
+    "   Compiling serde v1.0.152",
+    "127.0.0.1 - - [10/Oct/2026:13:55:36 +0000] \"GET / HTTP/1.1\" 200 2326",
+]
+
+def load_rules() -> List[Dict[str, Any]]:
+    return [rule.to_dict() for rule in load_rule_set(DATASET_DIR)]
+
+def synthetic_rules(count: int, seed: int = 7) -> List[Dict[str, Any]]:
+    """
+    Grows the shipped rules to `count` entries by cloning them with unique
+    literal suffixes, keeping the real pattern shapes (groups, alternations).
+    """
+    base = load_rules()
+    rng = random.Random(seed)
+    rules = []
+    for i in range(count):
+        rule = dict(base[i % len(base)])
+        if i >= len(base):
+            rule["error_pattern"] = f"{rule['error_pattern']}|synthetic failure {i} {rng.randrange(10**6)}"
+            rule["category"] = f"{rule['category']}_SYN{i}"
+        rules.append(rule)
+    return rules
+
+def sample_error(rule: Dict[str, Any]) -> str:
+    """
+    A line that matches the rule: its first alternative with wildcard
+    groups filled in and literal groups unwrapped.
+    """
+    text = rule["error_pattern"].split("|")[0]
+    text = text.replace("\\(", "\x00").replace("\\)", "\x01")
+    text = re.sub(r"\((?:\.\*|\.\+|\\S\+|\[[^]]*\][*+])\)", "value", text)
+    text = re.sub(r"\(([^)]*)\)", lambda m: m.group(1).split("|")[0], text)
+    text = text.replace(".*", " ").replace("\\d+", "42").replace("\\d", "5").replace("\\s+", " ")
+    return text.replace("\\", "").replace("\x00", "(").replace("\x01", ")")
+
+def synthetic_output(size: int, error_line: str, seed: int = 7) -> str:
+    """
+    Log-like noise of roughly `size` bytes with the error near the end, which
+    is where real commands print it.
+    """
+    rng = random.Random(seed)
+    lines = []
+    total = 0
+    while total < size:
+        line = rng.choice(NOISE_LINES)
+        lines.append(line)
+        total += len(line) + 1
+    lines.insert(max(0, len(lines) - 3), error_line)
+    return "\n".join(lines)
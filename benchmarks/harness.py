@@ -0,0 +1,68 @@
+"""
+Minimal asv-style benchmark harness (stdlib only).
+
+Benchmarks are plain functions decorated with @benchmark. Parametrized
+benchmarks receive one parameter per run; `full_params` are only measured
+with --full (e.g. the 100 MB classification inputs).
+"""
+import os
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+REGISTRY: List["Benchmark"] = []
+
+class Benchmark:
+    def __init__(self, func: Callable, params: Optional[List[Any]], full_params: Optional[List[Any]], setup: Optional[Callable], repeat: int):
+        self.func = func
+        self.name = f"{func.__module__.split('.')[-1]}.{func.__name__}"
+        self.params = params or [None]
+        self.full_params = full_params or []
+        self.setup = setup
+        self.repeat = repeat
+
+    def cases(self, full: bool) -> List[Any]:
+        return self.params + (self.full_params if full else [])
+
+    def run(self, param: Any) -> float:
+        """
+        Returns the median wall time of one call, in seconds.
+        """
+        state = self.setup(param) if self.setup else param
+        samples = []
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            self.func(state)
+            samples.append(time.perf_counter() - start)
+        return statistics.median(samples)
+
+def benchmark(params: Optional[List[Any]] = None, full_params: Optional[List[Any]] = None, setup: Optional[Callable] = None, repeat: int = 5):
+    def wrap(func):
+        REGISTRY.append(Benchmark(func, params, full_params, setup, repeat))
+        return func
+    return wrap
+
+def calibrate() -> float:
+    """
+    Times a fixed pure-Python workload so results recorded on one machine can
+    be compared on another.
+    """
+    samples = []
+    for _ in range(5):
+        start = time.perf_counter()
+        total = 0
+        for i in range(200_000):
+            total += i % 7
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+def silence_output():
+    """
+    Benchmarks measure engine cost, not terminal rendering.
+    """
+    from fixshell.ui import backends
+    devnull = open(os.devnull, "w")
+    backends.console.file = devnull
+    sys.stdout = devnull
+    return devnull
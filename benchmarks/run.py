@@ -0,0 +1,118 @@
+"""
+Runs the fixshell benchmark suite.
+
+    python benchmarks/run.py                       # quick sizes, print results
+    python benchmarks/run.py --full                # include 10 MB / 100 MB inputs
+    python benchmarks/run.py --save baseline.json  # record a baseline
+    python benchmarks/run.py --compare benchmarks/baseline.json
+
+Timings are normalized by a fixed calibration loop before comparing, so a
+baseline recorded on a developer machine remains meaningful on CI runners.
+--compare exits with status 1 when any benchmark regresses past --threshold
+or has no entry in the baseline (record one with --save).
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.join(os.path.dirname(HERE), "src"))
+
+import harness  # noqa: E402
+
+MODULES = ["bench_classify", "bench_executor", "bench_render"]
+
+def case_id(bench, param) -> str:
+    return bench.name if param is None else f"{bench.name}[{param}]"
+
+def run_suite(full: bool, match: str = None) -> dict:
+    for module in MODULES:
+        __import__(module)
+
+    results = {}
+    for bench in harness.REGISTRY:
+        if match and match not in bench.name:
+            continue
+        for param in bench.cases(full):
+            cwd = os.getcwd()
+            try:
+                results[case_id(bench, param)] = bench.run(param)
+            finally:
+                os.chdir(cwd)
+    return results
+
+def compare(results: dict, calibration: float, baseline: dict, threshold: float) -> list:
+    """
+    Returns (name, baseline, current, ratio) for every case slower than
+    threshold x baseline after normalizing both by their calibration loop.
+    """
+    regressions = []
+    scale = calibration / baseline["calibration"]
+    for name, seconds in results.items():
+        expected = baseline["results"].get(name)
+        if expected is None:
+            # Reported by missing_cases()
+            continue
+        ratio = seconds / (expected * scale)
+        if ratio > threshold:
+            regressions.append((name, expected * scale, seconds, ratio))
+    return regressions
+
+def missing_cases(results: dict, baseline: dict) -> list:
+    """
+    Benchmarks that ran but have nothing to be compared against.
+    """
+    return [name for name in results if name not in baseline["results"]]
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="fixshell benchmark suite")
+    parser.add_argument("--full", action="store_true", help="include the 10 MB and 100 MB output sizes")
+    parser.add_argument("--match", help="only run benchmarks whose name contains this string")
+    parser.add_argument("--save", metavar="PATH", help="write results as a baseline file")
+    parser.add_argument("--compare", metavar="PATH", help="fail if results regress against this baseline")
+    parser.add_argument("--threshold", type=float, default=2.0, help="allowed slowdown factor (default: 2.0)")
+    args = parser.parse_args(argv)
+
+    stdout = sys.stdout
+    harness.silence_output()
+    try:
+        calibration = harness.calibrate()
+        results = run_suite(args.full, args.match)
+    finally:
+        sys.stdout = stdout
+
+    for name, seconds in results.items():
+        print(f"{name:<55} {seconds * 1000:>12.3f} ms")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "calibration": calibration,
+                "results": results
+            }, f, indent=4, sort_keys=True)
+        print(f"\nBaseline written to {args.save}")
+
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+        regressions = compare(results, calibration, baseline, args.threshold)
+        missing = missing_cases(results, baseline)
+        if missing:
+            print(f"\n{len(missing)} benchmark(s) missing from {args.compare}; re-record it with --save:")
+            for name in missing:
+                print(f"  {name}")
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.1f}x:")
+            for name, expected, seconds, ratio in regressions:
+                print(f"  {name}: {expected * 1000:.3f} ms -> {seconds * 1000:.3f} ms ({ratio:.2f}x)")
+        if regressions or missing:
+            return 1
+        print(f"\nNo regressions beyond {args.threshold:.1f}x against {args.compare}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
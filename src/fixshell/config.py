@@ -7,11 +7,60 @@ DEBUG = os.getenv("FIXSHELL_DEBUG", "0") == "1"
 # Paths
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATASET_DIR = os.path.join(BASE_DIR, "dataset")
+WORKFLOW_DIR = os.path.join(BASE_DIR, "workflows")
+STATE_DIR = os.getenv("FIXSHELL_STATE_DIR", os.path.join(os.path.expanduser("~"), ".local", "state", "fixshell"))
+
+# Rule overlays merged over the packaged datasets; later layers override
+# earlier ones (set FIXSHELL_RULE_LAYERS=0 to only use the packaged rules)
+RULE_LAYERS_ENABLED = os.getenv("FIXSHELL_RULE_LAYERS", "1") != "0"
+SYSTEM_RULES_DIR = os.getenv("FIXSHELL_SYSTEM_RULES_DIR", "/etc/fixshell/rules.d")
+USER_CONFIG_DIR = os.path.join(os.getenv("XDG_CONFIG_HOME", os.path.join(os.path.expanduser("~"), ".config")), "fixshell")
+USER_RULES_DIR = os.getenv("FIXSHELL_USER_RULES_DIR", os.path.join(USER_CONFIG_DIR, "rules.d"))
+# Looked up in the working directory and its parents; only used for
+# projects listed in TRUSTED_PROJECTS_FILE (`fixshell dataset trust`)
+PROJECT_RULES_DIR = os.path.join(".fixshell", "rules.d")
+TRUSTED_PROJECTS_FILE = os.getenv("FIXSHELL_TRUSTED_PROJECTS", os.path.join(USER_CONFIG_DIR, "trusted_projects"))
+# How often long-running processes check the layers for edits (seconds)
+RULE_RELOAD_INTERVAL = 2.0
 
 # Execution Defaults
 MAX_RETRIES = 3
 DRY_RUN_DEFAULT = False
+MAX_PARALLEL_STEPS = 4
+FANOUT_WORKERS = 8
+# Seconds an interrupted workflow run can still be resumed
+WORKFLOW_JOURNAL_TTL = float(os.getenv("FIXSHELL_WORKFLOW_JOURNAL_TTL", str(6 * 3600)))
+# Timeouts (seconds) for commands resolvers run and for their read-only queries
+RESOLVER_COMMAND_TIMEOUT = float(os.getenv("FIXSHELL_COMMAND_TIMEOUT", "600"))
+QUERY_TIMEOUT = float(os.getenv("FIXSHELL_QUERY_TIMEOUT", "30"))
+# Reuse read-only git answers until HEAD, the index, refs or the repo config change
+GIT_QUERY_CACHE_ENABLED = os.getenv("FIXSHELL_GIT_QUERY_CACHE", "1") != "0"
+
+# Audit journal (set FIXSHELL_AUDIT=0 to disable)
+AUDIT_ENABLED = os.getenv("FIXSHELL_AUDIT", "1") != "0"
+AUDIT_DIR = os.getenv("FIXSHELL_AUDIT_DIR", os.path.join(STATE_DIR, "audit"))
+AUDIT_MAX_BYTES = 10 * 1024 * 1024
+AUDIT_MAX_AGE = 24 * 3600
+AUDIT_COMPRESSION = os.getenv("FIXSHELL_AUDIT_COMPRESSION", "gzip")  # gzip, zstd or none
+
+# Resolution success history used for ranking
+OUTCOMES_DB = os.getenv("FIXSHELL_OUTCOMES_DB", os.path.join(STATE_DIR, "outcomes.db"))
+
+# Per-rule regex time budget (seconds); slower rules are demoted and only
+# run on outputs up to DEMOTED_RULE_MAX_CHARS
+RULE_TIME_BUDGET = 0.05
+DEMOTED_RULE_MAX_CHARS = 64 * 1024
+
+# Reachability probes behind NETWORK_STATE (set FIXSHELL_NETWORK_PROBE=0 to disable)
+NETWORK_PROBE_ENABLED = os.getenv("FIXSHELL_NETWORK_PROBE", "1") != "0"
+NETWORK_ENDPOINTS = os.getenv("FIXSHELL_NETWORK_ENDPOINTS", "github.com:443,registry-1.docker.io:443")
+NETWORK_PROBE_TIMEOUT = 1.5
+NETWORK_PROBE_TTL = 30
 
-# AI Settings (Optional/Roadmap)
-LLM_MODEL = "ollama/llama3"
+# AI Settings (only consulted with --ai, for errors no dataset rule matches)
+LLM_MODEL = os.getenv("FIXSHELL_LLM_MODEL", "ollama/llama3")
+LLM_URL = os.getenv("FIXSHELL_LLM_URL", os.getenv("OLLAMA_HOST", "http://127.0.0.1:11434"))
+LLM_TIMEOUT = 8.0
+LLM_CACHE_DIR = os.getenv("FIXSHELL_LLM_CACHE_DIR", os.path.join(STATE_DIR, "llm_cache"))
+LLM_CACHE_TTL = float(os.getenv("FIXSHELL_LLM_CACHE_TTL", str(7 * 24 * 3600)))
 AI_EVIDENCE_THRESHOLD = 0.6
@@ -0,0 +1,143 @@
+import asyncio
+import contextvars
+import functools
+import subprocess
+import time
+from typing import Any, Callable
+from .executor import Executor
+from .fixtures import fixtures
+from .tracing import tracer
+from ..ui.renderer import Renderer
+
+class PromptQueue:
+    """
+    Serializes interactive work (authorizations, resolver menus) coming from
+    concurrently running steps, so only one prompt owns the terminal at a time.
+    """
+
+    def __init__(self):
+        self._lock = asyncio.Lock()
+
+    async def call(self, func: Callable, *args, **kwargs) -> Any:
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            # Carry the caller's context so trace spans keep their parent
+            ctx = contextvars.copy_context()
+            return await loop.run_in_executor(None, ctx.run, functools.partial(func, *args, **kwargs))
+
+class AsyncExecutor:
+    """
+    asyncio counterpart of Executor used by step graphs. Spawns commands with
+    asyncio.create_subprocess_exec and bounds how many run at once.
+    """
+
+    def __init__(self, executor: Executor, prompts: PromptQueue, max_parallel: int = 4):
+        self.executor = executor
+        self.prompts = prompts
+        self._slots = asyncio.Semaphore(max(1, max_parallel))
+
+    @property
+    def dry_run(self) -> bool:
+        return self.executor.dry_run
+
+    async def run(self, cmd_list: list, desc: str, capture: bool = True, purpose: str = None, risk: str = "low") -> subprocess.CompletedProcess:
+        """
+        Executes a command without blocking the event loop. Previews and
+        authorizations go through the shared prompt queue.
+        """
+        if not await self.prompts.call(self.executor.preview, cmd_list, desc, purpose=purpose, risk=risk):
+            Renderer.print_info(f"Step skipped by user: {desc}")
+            self.executor.audit_command(cmd_list, desc, risk, None, "declined", 130, 0.0)
+            return subprocess.CompletedProcess(cmd_list, 130, stdout="", stderr="Skipped by user")
+
+        if fixtures.replaying:
+            return await self._replay(cmd_list, desc, risk)
+
+        if self.dry_run:
+            Renderer.print_info(f"[DRY-RUN] Execution simulated: {desc}")
+            self.executor.audit_command(cmd_list, desc, risk, None, "simulated", 0, 0.0)
+            return subprocess.CompletedProcess(cmd_list, 0, stdout="", stderr="")
+
+        pipe = asyncio.subprocess.PIPE if capture else None
+        env = self.executor.build_env()
+
+        async with self._slots:
+            started = time.monotonic()
+            with tracer.span("subprocess", "subprocess", cmd=cmd_list, desc=desc) as span:
+                try:
+                    if isinstance(cmd_list, str):
+                        proc = await asyncio.create_subprocess_shell(cmd_list, stdout=pipe, stderr=pipe, env=env, cwd=self.executor.cwd)
+                    else:
+                        proc = await asyncio.create_subprocess_exec(*cmd_list, stdout=pipe, stderr=pipe, env=env, cwd=self.executor.cwd)
+                    out, err = await proc.communicate()
+                except Exception as e:
+                    self._save(cmd_list, started, error=e)
+                    return subprocess.CompletedProcess(cmd_list, 1, stdout="", stderr=str(e))
+                span.set(returncode=proc.returncode)
+            self.executor.audit_command(cmd_list, desc, risk, None, "ran", proc.returncode, time.monotonic() - started)
+
+        res = self._completed(cmd_list, proc.returncode, out, err)
+        self._save(cmd_list, started, res=res)
+        return res
+
+    async def probe(self, cmd_list: list) -> subprocess.CompletedProcess:
+        """
+        Runs a read-only check (e.g. a step precondition) without preview or
+        authorization. Probes run even in dry-run mode.
+        """
+        if fixtures.replaying:
+            with tracer.span("probe", "subprocess", cmd=cmd_list) as span:
+                res = self._lookup(cmd_list)
+                span.set(returncode=res.returncode)
+            return res
+        started = time.monotonic()
+        async with self._slots:
+            with tracer.span("probe", "subprocess", cmd=cmd_list) as span:
+                try:
+                    proc = await asyncio.create_subprocess_exec(
+                        *cmd_list,
+                        stdout=asyncio.subprocess.PIPE,
+                        stderr=asyncio.subprocess.PIPE,
+                        env=self.executor.build_env(),
+                        cwd=self.executor.cwd
+                    )
+                    out, err = await proc.communicate()
+                except Exception as e:
+                    self._save(cmd_list, started, error=e)
+                    return subprocess.CompletedProcess(cmd_list, 1, stdout="", stderr=str(e))
+                span.set(returncode=proc.returncode)
+        res = self._completed(cmd_list, proc.returncode, out, err)
+        self._save(cmd_list, started, res=res)
+        return res
+
+    async def _replay(self, cmd_list, desc: str, risk: str) -> subprocess.CompletedProcess:
+        with tracer.span("subprocess", "subprocess", cmd=cmd_list, desc=desc, replayed=True) as span:
+            res = self._lookup(cmd_list)
+            span.set(returncode=res.returncode)
+        self.executor.audit_command(cmd_list, desc, risk, None, "replayed", res.returncode, 0.0)
+        return res
+
+    def _lookup(self, cmd_list) -> subprocess.CompletedProcess:
+        try:
+            entry = fixtures.lookup(cmd_list, self.executor.cwd)
+        except Exception as e:
+            return subprocess.CompletedProcess(cmd_list, 1, stdout="", stderr=str(e))
+        return subprocess.CompletedProcess(cmd_list, entry["returncode"], stdout=entry.get("stdout", ""), stderr=entry.get("stderr", ""))
+
+    def _save(self, cmd_list, started: float, res: subprocess.CompletedProcess = None, error: Exception = None):
+        if not fixtures.recording:
+            return
+        duration = time.monotonic() - started
+        if error is not None:
+            fixtures.save(cmd_list, self.executor.cwd, 127, stderr=str(error), duration=duration, raised=type(error).__name__)
+        else:
+            fixtures.save(cmd_list, self.executor.cwd, res.returncode, res.stdout, res.stderr, duration)
+
+    @staticmethod
+    def _completed(cmd_list, returncode: int, out: bytes, err: bytes) -> subprocess.CompletedProcess:
+        return subprocess.CompletedProcess(
+            cmd_list,
+            returncode,
+            stdout=(out or b"").decode(errors="replace"),
+            stderr=(err or b"").decode(errors="replace")
+        )
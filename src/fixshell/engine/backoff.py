@@ -0,0 +1,63 @@
+import random
+import time
+from typing import Dict, Any, Callable, Optional
+
+class RetryPolicy:
+    """
+    Dataset-driven retry settings for transient failures
+    (the optional 'retry' object of a rule).
+    """
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 1.0, max_delay: float = 30.0, multiplier: float = 2.0, jitter: float = 0.5, deadline: Optional[float] = None):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        # Fraction of each delay that is randomized (0 = none, 1 = full jitter)
+        self.jitter = min(max(jitter, 0.0), 1.0)
+        self.deadline = deadline
+
+    @staticmethod
+    def from_dict(data: Dict[str, Any]) -> "RetryPolicy":
+        return RetryPolicy(
+            max_attempts=int(data.get("max_attempts", 3)),
+            base_delay=float(data.get("base_delay", 1.0)),
+            max_delay=float(data.get("max_delay", 30.0)),
+            multiplier=float(data.get("multiplier", 2.0)),
+            jitter=float(data.get("jitter", 0.5)),
+            deadline=data.get("deadline")
+        )
+
+class BackoffScheduler:
+    """
+    Computes exponential backoff delays with jitter for one failure category,
+    stopping once attempts run out or the deadline would be exceeded.
+    """
+
+    def __init__(self, policy: RetryPolicy, rng: Callable[[], float] = random.random, clock: Callable[[], float] = time.monotonic):
+        self.policy = policy
+        self.rng = rng
+        self.clock = clock
+        self.started = clock()
+        self.attempt = 0
+
+    def next_delay(self) -> Optional[float]:
+        """
+        Returns the delay before the next retry, or None when retrying is
+        no longer allowed.
+        """
+        p = self.policy
+        if self.attempt >= p.max_attempts:
+            return None
+
+        delay = min(p.max_delay, p.base_delay * (p.multiplier ** self.attempt))
+        delay = delay * (1 - p.jitter) + delay * p.jitter * self.rng()
+
+        if p.deadline is not None:
+            remaining = p.deadline - (self.clock() - self.started)
+            if remaining <= 0:
+                return None
+            delay = min(delay, remaining)
+
+        self.attempt += 1
+        return delay
@@ -1,11 +1,19 @@
-import json
-import os
-from typing import Dict, Any, List, Optional
-from .rule_matcher import RuleMatcher
+from typing import Dict, Any, Optional, Sequence, Tuple
+from .outcome_store import OutcomeStore, outcomes as default_outcomes
+from .rule_matcher import RuleMatcher, rank
+from .rule_model import DATASET_FILES, UNKNOWN, RuleSet
+from .rule_layers import RuleLayers, default_layers
+from .command_router import TOOL_MODES, Route, route
+from .metrics import metrics
+from .network_probe import NetworkProbe, network as default_network
+from .llm_diagnosis import LLMDiagnoser
+from .extractors import ExtractorRegistry, extractors as default_extractors
+from .tracing import tracer
 
 class ErrorCategory:
     FATAL = "FATAL"
     RECOVERABLE = "RECOVERABLE"
+    TRANSIENT = "TRANSIENT"
     INFORMATIONAL = "INFORMATIONAL"
 
 class Classifier:
@@ -13,55 +21,138 @@ class Classifier:
     Modular error classification engine using deterministic datasets.
     """
     
-    def __init__(self, dataset_dir: str):
+    def __init__(self, dataset_dir: str, outcomes: Optional[OutcomeStore] = None, network: Optional[NetworkProbe] = None, layers: Optional[RuleLayers] = None, extractors: Optional[ExtractorRegistry] = None):
         self.dataset_dir = dataset_dir
-        self.matchers = self._load_matchers()
+        # Historical success per category ranks rules that match together
+        self.outcomes = outcomes or default_outcomes
+        # Reachability decides whether a transient failure is worth retrying
+        self.network = network or default_network
+        # Structured fields (traceback frame, missing package, failing build step)
+        self.extractors = extractors or default_extractors
+        # Optional fallback for output no rule matches (enabled by --ai)
+        self.ai: Optional[LLMDiagnoser] = None
+        # Packaged datasets plus system/user/project overlays, validated at
+        # load time; a malformed packaged file raises DatasetError
+        self.layers = layers or RuleLayers(default_layers(dataset_dir))
+        self.rules: RuleSet = self.layers.ruleset
+        self.matchers: Dict[str, RuleMatcher] = {}
+        self._build_matchers()
 
-    def _load_matchers(self) -> Dict[str, RuleMatcher]:
+    def _build_matchers(self):
+        # Modes whose rules did not change keep their matcher (and its demotions)
         matchers = {}
-        dataset_files = {
-            "docker": "docker_errors.json",
-            "git": "git_errors.json",
-            "github": "github_errors.json",
-            "linux": "linux_errors.json"
-        }
-        
-        for key, filename in dataset_files.items():
-            path = os.path.join(self.dataset_dir, filename)
-            if os.path.exists(path):
-                with open(path, 'r') as f:
-                    data = json.load(f)
-                    matchers[key] = RuleMatcher(data)
-            else:
-                matchers[key] = RuleMatcher([])
-        
+        for mode in DATASET_FILES:
+            rules = self.rules.for_mode(mode)
+            current = self.matchers.get(mode)
+            matchers[mode] = current if current and current.rules == rules else RuleMatcher(rules)
+        self.matchers = matchers
+        # Rebuilt lazily per route
+        self.route_matchers: Dict[Tuple[Tuple[str, ...], Tuple[str, ...]], RuleMatcher] = {}
+        self.wrapper_matchers: Dict[Tuple[str, ...], Dict[str, RuleMatcher]] = {}
+
+    def matcher_for(self, command: Route) -> RuleMatcher:
+        """
+        Matcher over only the rules relevant to a routed command, shared by
+        every command that selects the same rules.
+        """
+        tags = tuple(c for c in command.commands if c in self.rules.by_command)
+        key = (command.modes, tags)
+        matcher = self.route_matchers.get(key)
+        if matcher is None:
+            matcher = self.route_matchers[key] = RuleMatcher(self.rules.for_commands(command.modes, tags))
+        return matcher
+
+    def matchers_for_wrapper(self, command: Route) -> Dict[str, RuleMatcher]:
+        """
+        Per-mode matchers for the output of a command the router does not
+        know (scripts, `make`, `bash -c`): untagged rules, rules of the
+        tools it may run (git, docker, gh) and rules tagged with the command
+        itself. Rules tagged for another program (`mkdir`) stay out.
+        """
+        tags = tuple(c for c in command.commands if c in self.rules.by_command)
+        matchers = self.wrapper_matchers.get(tags)
+        if matchers is None:
+            def applies(rule) -> bool:
+                return not rule.commands or any(c in tags or c.split()[0] in TOOL_MODES for c in rule.commands)
+            matchers = self.wrapper_matchers[tags] = {
+                mode: RuleMatcher([r for r in self.rules.for_mode(mode) if applies(r)]) for mode in DATASET_FILES
+            }
         return matchers
 
-    def classify(self, output: str, mode: Optional[str] = None) -> Dict[str, Any]:
+    def reload(self, force: bool = False) -> bool:
+        """
+        Picks up edited rule files. Cheap to call often: the files are
+        polled at most every RULE_RELOAD_INTERVAL seconds unless forced.
+        """
+        if not self.layers.reload(force):
+            return False
+        self.rules = self.layers.ruleset
+        self._build_matchers()
+        return True
+
+    def classify(self, output: str, mode: Optional[str] = None, argv: Optional[Sequence[str]] = None) -> Dict[str, Any]:
         """
-        Classifies error output. If mode is provided, prioritizes that matcher.
+        Classifies error output. With the failed command's argv, the rules
+        relevant to its tool and subcommand are searched first. Output of a
+        known tool stops there; anything else (scripts, `make`, `bash -c`
+        wrappers) that the routed rules miss gets the full search over the
+        rules such commands can trigger: the mode's first, then the others.
         """
-        if mode and mode in self.matchers:
-            best_match = self.matchers[mode].get_best_match(output)
+        self.reload()
+        command = route(argv, mode) if argv else None
+        with tracer.span("classify", "classifier", mode=mode, tool=command and command.tool, output_bytes=len(output or "")) as span, metrics.timer("classify_seconds", mode=mode or "any"):
+            diagnosis = self.matcher_for(command).get_best_match(output, self.outcomes.rule_score) if command else None
+            if diagnosis is None:
+                if not command:
+                    diagnosis = self._classify(output, mode)
+                elif command.tool in TOOL_MODES:
+                    diagnosis = UNKNOWN.diagnosis()
+                else:
+                    diagnosis = self._classify(output, mode, self.matchers_for_wrapper(command))
+            # Named groups of the rule are more specific than extracted fields
+            diagnosis["fields"] = {**self.extractors.extract(output), **diagnosis["fields"]}
+            if diagnosis["category"] == "unknown" and self.ai and output:
+                self._ask_ai(diagnosis, output)
+            # Retrying a transient failure cannot help while the host is offline
+            if diagnosis.get("retry") and self.network.is_offline():
+                diagnosis["offline"] = True
+                diagnosis["network_state"] = self.network.status().label
+            span.set(category=diagnosis.get("category"), offline=diagnosis.get("offline", False))
+            return diagnosis
+
+    def _ask_ai(self, diagnosis: Dict[str, Any], output: str):
+        answer = self.ai.diagnose(output)
+        if not answer:
+            return
+        # Advisory only: type stays FATAL with no fix_commands, so nothing is executed from it
+        diagnosis.update({
+            "category": answer["category"],
+            "source": "llm",
+            "confidence": answer["confidence"],
+            "explanation": answer["explanation"],
+            "suggested_fix": answer["suggested_fix"] or [answer["explanation"]],
+        })
+
+    def _classify(self, output: str, mode: Optional[str] = None, matchers: Optional[Dict[str, RuleMatcher]] = None) -> Dict[str, Any]:
+        score = self.outcomes.rule_score
+        # A reload swaps in a new dict; keep using the one we started with
+        matchers = matchers or self.matchers
+        if mode and mode in matchers:
+            best_match = matchers[mode].get_best_match(output, score)
             if best_match:
                 return best_match
 
-        # If no mode or no match in mode, search all
+        # If no mode or no match in mode, search the others
         best_overall = None
-        for matcher in self.matchers.values():
-            match = matcher.get_best_match(output)
+        for key, matcher in matchers.items():
+            if key == mode:
+                continue
+            match = matcher.get_best_match(output, score)
             if match:
-                if not best_overall or len(match["error_pattern"]) > len(best_overall["error_pattern"]):
+                if not best_overall or rank(match, score) > rank(best_overall, score):
                     best_overall = match
         
         if best_overall:
             return best_overall
             
-        return {
-            "error_pattern": "unknown",
-            "category": "unknown",
-            "scope": "UNKNOWN",
-            "recommended_checks": ["Check manual logs", "Verify syntax"],
-            "suggested_fix": ["No automated fix available for this error."],
-            "severity": "medium"
-        }
+        return UNKNOWN.diagnosis()
@@ -0,0 +1,103 @@
+import os
+import shlex
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+# Datasets relevant to each tool; OS-level rules ("linux") always apply
+TOOL_MODES: Dict[str, Tuple[str, ...]] = {
+    "git": ("git",),
+    "gh": ("github", "git"),
+    "hub": ("github", "git"),
+    "docker": ("docker",),
+    "docker-compose": ("docker",),
+    "podman": ("docker",),
+}
+# Global options that take a value before the subcommand
+VALUE_OPTIONS: Dict[str, Tuple[str, ...]] = {
+    "git": ("-C", "-c", "--git-dir", "--work-tree", "--namespace", "--exec-path"),
+    "docker": ("-H", "--host", "-c", "--context", "--config", "-l", "--log-level"),
+    "docker-compose": ("-f", "--file", "-p", "--project-name", "--env-file", "--profile"),
+    "gh": ("-R", "--repo"),
+}
+# Wrappers that run the command after them, with their value options
+WRAPPERS: Dict[str, Tuple[str, ...]] = {
+    "sudo": ("-u", "-g", "-C", "-h", "-p", "-U"),
+    "doas": ("-u", "-C"),
+    "env": ("-u", "-C", "--unset", "--chdir"),
+    "nice": ("-n",),
+    "nohup": (),
+    "time": (),
+    "command": (),
+    "exec": (),
+    "timeout": ("-s", "-k", "--signal", "--kill-after"),
+}
+
+@dataclass(frozen=True)
+class Route:
+    """
+    What a command line is: the tool, its subcommand and the datasets whose
+    rules can apply to it.
+    """
+    tool: Optional[str]
+    subcommand: Optional[str]
+    modes: Tuple[str, ...]
+
+    @property
+    def commands(self) -> Tuple[str, ...]:
+        """
+        Applicability tags this command matches, e.g. ("docker", "docker build").
+        """
+        if not self.tool:
+            return ()
+        if self.subcommand:
+            return (self.tool, f"{self.tool} {self.subcommand}")
+        return (self.tool,)
+
+def _positional(argv: Sequence[str], start: int, value_options: Tuple[str, ...]) -> int:
+    """
+    Index of the first positional argument at or after start.
+    """
+    i = start
+    while i < len(argv):
+        arg = argv[i]
+        if arg == "--":
+            return i + 1
+        if not arg.startswith("-") or arg == "-":
+            return i
+        # `-C dir` takes the next argument; `--git-dir=x` does not
+        i += 2 if arg in value_options else 1
+    return i
+
+def route(argv: Union[str, Sequence[str], None], mode: Optional[str] = None) -> Route:
+    """
+    Routes a command line to its datasets. Known tools get their own (plus
+    "linux"); anything else gets the caller's mode and "linux".
+    """
+    if isinstance(argv, str):
+        try:
+            argv = shlex.split(argv)
+        except ValueError:
+            argv = argv.split()
+    argv = list(argv or [])
+
+    i = 0
+    while i < len(argv):
+        name = os.path.basename(argv[i])
+        if name == "timeout":
+            # timeout DURATION COMMAND...
+            i = _positional(argv, i + 1, WRAPPERS[name]) + 1
+        elif name in WRAPPERS:
+            i = _positional(argv, i + 1, WRAPPERS[name])
+        elif "=" in argv[i] and not argv[i].startswith("="):
+            # VAR=value prefixes (`env VAR=1 cmd`, `LANG=C cmd`)
+            i += 1
+        else:
+            break
+    if i >= len(argv):
+        return Route(None, None, tuple(dict.fromkeys((mode or "linux", "linux"))))
+
+    tool = os.path.basename(argv[i]).lower()
+    sub_index = _positional(argv, i + 1, VALUE_OPTIONS.get(tool, ()))
+    subcommand = argv[sub_index].lower() if sub_index < len(argv) else None
+    modes = TOOL_MODES.get(tool, (mode or "linux",))
+    return Route(tool, subcommand, tuple(dict.fromkeys(modes + ("linux",))))
@@ -0,0 +1,95 @@
+import contextvars
+import os
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+from .executor import Executor
+from .git_queries import git_queries
+from .metrics import metrics
+from .tracing import traced_run
+from ..config import MAX_PARALLEL_STEPS, QUERY_TIMEOUT, RESOLVER_COMMAND_TIMEOUT
+
+class CommandRunner:
+    """
+    Passed to resolvers alongside `state`. Commands that change something
+    go through Executor (environment, preview, dry-run, audit); read-only
+    queries run quietly, also in dry-run, and their answers are cached per
+    working directory until the next command that may change state.
+    """
+
+    def __init__(self, executor: Executor, timeout: float = RESOLVER_COMMAND_TIMEOUT, query_timeout: float = QUERY_TIMEOUT):
+        self.executor = executor
+        self.timeout = timeout
+        self.query_timeout = query_timeout
+        self._lock = threading.Lock()
+        # (cwd, argv) -> answer
+        self._cache: Dict[Tuple[str, Tuple[str, ...]], subprocess.CompletedProcess] = {}
+
+    @property
+    def dry_run(self) -> bool:
+        return self.executor.dry_run
+
+    @property
+    def cwd(self) -> str:
+        return os.path.abspath(self.executor.cwd or os.getcwd())
+
+    def query(self, cmd: Sequence[str], timeout: Optional[float] = None) -> subprocess.CompletedProcess:
+        """
+        Runs an idempotent read-only command (`git branch --list`,
+        `docker ps`) and caches its answer. Git queries use the git query
+        cache, which also sees changes made outside the runner.
+        """
+        if git_queries.handles(cmd):
+            return self._git_query(cmd, timeout)
+        key = (self.cwd, tuple(cmd))
+        with self._lock:
+            cached = self._cache.get(key)
+        if cached is not None:
+            metrics.inc("query_cache_hits_total")
+            return cached
+        try:
+            res = traced_run(list(cmd), capture_output=True, text=True, env=self.executor.build_env(), cwd=self.executor.cwd, timeout=timeout or self.query_timeout)
+        except subprocess.TimeoutExpired as e:
+            return subprocess.CompletedProcess(list(cmd), 124, stdout="", stderr=f"Timed out after {e.timeout:g}s")
+        except OSError as e:
+            return subprocess.CompletedProcess(list(cmd), 127, stdout="", stderr=str(e))
+        with self._lock:
+            self._cache[key] = res
+        return res
+
+    def _git_query(self, cmd: Sequence[str], timeout: Optional[float]) -> subprocess.CompletedProcess:
+        try:
+            return git_queries.query(cmd[1:], cwd=self.executor.cwd, env=self.executor.build_env(), timeout=timeout or self.query_timeout)
+        except subprocess.TimeoutExpired as e:
+            return subprocess.CompletedProcess(list(cmd), 124, stdout="", stderr=f"Timed out after {e.timeout:g}s")
+        except OSError as e:
+            return subprocess.CompletedProcess(list(cmd), 127, stdout="", stderr=str(e))
+
+    def batch(self, cmds: Sequence[Sequence[str]], timeout: Optional[float] = None) -> List[subprocess.CompletedProcess]:
+        """
+        Answers several queries concurrently, in the order given.
+        """
+        if len(cmds) < 2:
+            return [self.query(cmd, timeout) for cmd in cmds]
+        with ThreadPoolExecutor(max_workers=min(len(cmds), MAX_PARALLEL_STEPS)) as pool:
+            # Carry the caller's context so trace spans keep their parent
+            futures = [pool.submit(contextvars.copy_context().run, self.query, cmd, timeout) for cmd in cmds]
+            return [f.result() for f in futures]
+
+    def run(self, cmd, desc: str, capture: bool = True, timeout: Optional[float] = None) -> subprocess.CompletedProcess:
+        """
+        Runs a command that may change state. Interactive (uncaptured)
+        commands wait on the user, so they only time out when asked to.
+        """
+        if timeout is None and capture:
+            timeout = self.timeout
+        try:
+            return self.executor.run(cmd, desc, capture=capture, timeout=timeout)
+        finally:
+            self.invalidate()
+
+    def invalidate(self):
+        # Anything may have changed (`systemctl start docker` changes `docker ps`)
+        with self._lock:
+            self._cache.clear()
@@ -0,0 +1,35 @@
+import threading
+from typing import Dict, Any, List, Optional
+
+class DeferredDecision:
+    """
+    A recoverable failure whose resolution needs a human. Captured during
+    unattended runs and resolved later from the decision queue.
+    """
+
+    def __init__(self, cwd: Optional[str], cmd_list: list, category: str, diagnosis: Dict[str, Any]):
+        self.cwd = cwd
+        self.cmd_list = cmd_list
+        self.category = category
+        self.diagnosis = diagnosis
+
+class DecisionQueue:
+    """
+    Thread-safe collection of deferred decisions shared by concurrent workers.
+    """
+
+    def __init__(self):
+        self._items: List[DeferredDecision] = []
+        self._lock = threading.Lock()
+
+    def defer(self, decision: DeferredDecision):
+        with self._lock:
+            self._items.append(decision)
+
+    def for_cwd(self, cwd: Optional[str]) -> List[DeferredDecision]:
+        with self._lock:
+            return [d for d in self._items if d.cwd == cwd]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._items)
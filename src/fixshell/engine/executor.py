@@ -1,6 +1,12 @@
 import subprocess
 import os
+import time
 import click
+from .audit import audit
+from .fixtures import fixtures
+from .policy import Policy
+from .tracing import tracer
+from ..ui.context_panel import prompt_guard
 from ..ui.renderer import Renderer
 
 class Executor:
@@ -9,48 +15,86 @@ class Executor:
     previews, and dry-runs.
     """
 
-    def __init__(self, dry_run: bool = False):
+    def __init__(self, dry_run: bool = False, cwd: str = None, policy: Policy = None):
         self.dry_run = dry_run
+        self.cwd = cwd
+        self.policy = policy or Policy()
+        # Commands that got past the preview; the retry engine learns from a
+        # resolver only when it ran one
+        self.commands_run = 0
 
-    def run(self, cmd_list: list, desc: str, interactive: bool = False, capture: bool = True, purpose: str = None, risk: str = "low") -> subprocess.CompletedProcess:
+    def run(self, cmd_list: list, desc: str, interactive: bool = False, capture: bool = True, purpose: str = None, risk: str = "low", category: str = None, timeout: float = None) -> subprocess.CompletedProcess:
         """
         Executes a command with safety previews and live output options.
         """
-        cmd_str = " ".join(cmd_list) if isinstance(cmd_list, list) else cmd_list
-        
         # 1. Safety Preview (Mandatory for privileged/install steps)
+        if not self.preview(cmd_list, desc, purpose=purpose, risk=risk, category=category):
+            Renderer.print_warning("Step skipped by user.")
+            self.audit_command(cmd_list, desc, risk, category, "declined", 130, 0.0)
+            return subprocess.CompletedProcess(cmd_list, 130, stdout="", stderr="Skipped by user")
+        self.commands_run += 1
+
+        # Replayed transcripts touch nothing, so dry-runs use them too
+        if self.dry_run and not fixtures.replaying:
+            Renderer.print_info("[DRY-RUN] Execution simulated.")
+            self.audit_command(cmd_list, desc, risk, category, "simulated", 0, 0.0)
+            return subprocess.CompletedProcess(cmd_list, 0, stdout="", stderr="")
+
+        env = self.build_env()
+
+        started = time.monotonic()
+        with tracer.span("subprocess", "subprocess", cmd=cmd_list, desc=desc) as span:
+            try:
+                if not capture:
+                    # Live streaming mode (no capture); the child owns the terminal
+                    with prompt_guard():
+                        res = fixtures.run(cmd_list, env=env, cwd=self.cwd, shell=isinstance(cmd_list, str), timeout=timeout)
+                    res = subprocess.CompletedProcess(cmd_list, res.returncode, stdout="", stderr="")
+                else:
+                    res = fixtures.run(cmd_list, capture_output=True, text=True, env=env, cwd=self.cwd, shell=isinstance(cmd_list, str), timeout=timeout)
+            except subprocess.TimeoutExpired:
+                res = subprocess.CompletedProcess(cmd_list, 124, stdout="", stderr=f"Timed out after {timeout:g}s")
+            except Exception as e:
+                res = subprocess.CompletedProcess(cmd_list, 1, stdout="", stderr=str(e))
+            span.set(returncode=res.returncode)
+        self.audit_command(cmd_list, desc, risk, category, "ran", res.returncode, time.monotonic() - started)
+        return res
+
+    def audit_command(self, cmd_list, desc: str, risk: str, category: str, outcome: str, exit_code: int, duration: float):
+        audit.record("command", cmd=cmd_list, desc=desc, cwd=self.cwd or os.getcwd(), risk=risk, category=category, outcome=outcome, exit_code=exit_code, duration=round(duration, 3))
+
+    def preview(self, cmd_list: list, desc: str, purpose: str = None, risk: str = "low", category: str = None) -> bool:
+        """
+        Renders the plan for a command. Steps with a purpose require explicit
+        authorization; returns False if the user declined.
+        """
+        cmd_str = " ".join(cmd_list) if isinstance(cmd_list, list) else cmd_list
+
         if purpose:
             Renderer.print_step(f"PLAN: {desc}")
-            click.secho(f"   → Purpose: {purpose}", fg="white", dim=True)
-            risk_color = "red" if risk == "high" else "yellow" if risk == "medium" else "green"
-            click.secho(f"   → Risk: {risk.upper()}", fg=risk_color)
-            Renderer.print_command(cmd_str)
-            
-            if not self.confirm("Authorize this command?", default=False):
-                click.secho("   ❌ Step skipped by user.", fg="yellow")
-                return subprocess.CompletedProcess(cmd_list, 130, stdout="", stderr="Skipped by user")
-
-        else:
-            Renderer.print_step(desc)
+            Renderer.print_preview(purpose, risk)
             Renderer.print_command(cmd_str)
+            return self.confirm("Authorize this command?", default=False, risk=risk, category=category)
 
-        if self.dry_run:
-            Renderer.print_info("[DRY-RUN] Execution simulated.")
-            return subprocess.CompletedProcess(cmd_list, 0, stdout="", stderr="")
+        Renderer.print_step(desc)
+        Renderer.print_command(cmd_str)
+        return True
 
+    @staticmethod
+    def build_env() -> dict:
         env = os.environ.copy()
         env["GIT_TERMINAL_PROMPT"] = "0"
+        return env
 
-        try:
-            if not capture:
-                # Live streaming mode (no capture)
-                res = subprocess.run(cmd_list, env=env, shell=isinstance(cmd_list, str))
-                return subprocess.CompletedProcess(cmd_list, res.returncode, stdout="", stderr="")
-            else:
-                return subprocess.run(cmd_list, capture_output=True, text=True, env=env, shell=isinstance(cmd_list, str))
-        except Exception as e:
-            return subprocess.CompletedProcess(cmd_list, 1, stdout="", stderr=str(e))
-
-    @staticmethod
-    def confirm(prompt_text: str = "Proceed?", default: bool = True) -> bool:
-        return click.confirm(click.style(f"   {prompt_text}", fg="cyan", bold=True), default=default)
+    def confirm(self, prompt_text: str = "Proceed?", default: bool = True, risk: str = "low", category: str = None) -> bool:
+        """
+        Asks for authorization unless the policy already decides it.
+        """
+        decision = self.policy.decide(category, risk)
+        if decision != "ask":
+            self.policy.record(category, prompt_text, decision == "allow")
+            return decision == "allow"
+        with prompt_guard():
+            answer = click.confirm(click.style(f"   {prompt_text}", fg="cyan", bold=True), default=default)
+        audit.record("authorization", decided_by="user", question=prompt_text, answer=answer, risk=risk, category=category)
+        return answer
@@ -0,0 +1,201 @@
+import io
+import re
+from typing import Dict, Any, List, Optional, Tuple, Type
+from urllib.parse import unquote
+
+class Extractor:
+    """
+    Pulls typed fields (file, line, missing package, failing step) out of
+    one structured output format. Every line is fed once, in order, so an
+    extractor must do constant work per line for extraction to stay linear.
+    """
+    name = ""
+    # The extractor only runs when one of these appears in the output
+    triggers: Tuple[str, ...] = ()
+
+    def __init__(self):
+        self.fields: Dict[str, Any] = {}
+
+    def feed(self, line: str):
+        raise NotImplementedError
+
+    def finish(self) -> Dict[str, Any]:
+        return self.fields
+
+class ExtractorRegistry:
+    def __init__(self):
+        self.extractors: List[Type[Extractor]] = []
+
+    def register(self, extractor: Type[Extractor]) -> Type[Extractor]:
+        self.extractors.append(extractor)
+        return extractor
+
+    def extract(self, output: str) -> Dict[str, Any]:
+        """
+        Fields of every format found in the output, in one pass over its
+        lines. When formats disagree, the one registered first wins.
+        """
+        if not output:
+            return {}
+        active = [cls() for cls in self.extractors if any(t in output for t in cls.triggers)]
+        if not active:
+            return {}
+        for line in io.StringIO(output):
+            line = line.rstrip("\r\n")
+            for extractor in active:
+                extractor.feed(line)
+        fields: Dict[str, Any] = {}
+        for extractor in active:
+            for key, value in extractor.finish().items():
+                fields.setdefault(key, value)
+        return fields
+
+extractors = ExtractorRegistry()
+register = extractors.register
+
+def package_name(requirement: str) -> Optional[str]:
+    """
+    Distribution name of a requirement (`foo[extra]>=1.0` -> foo).
+    """
+    m = re.match(r"@?[A-Za-z0-9][A-Za-z0-9._/-]*", requirement.strip("'\""))
+    return m.group(0) if m else None
+
+@register
+class PythonTraceback(Extractor):
+    """
+    The innermost frame and exception of the last traceback.
+    """
+    name = "python_traceback"
+    triggers = ("Traceback (most recent call last)",)
+    FRAME = re.compile(r'\s+File "([^"]*)", line (\d+)(?:, in (\S+))?')
+    EXCEPTION = re.compile(r"([A-Za-z_][\w.]*(?:Error|Exception|Exit|Interrupt|Warning)): ?(.*)")
+    MISSING_MODULE = re.compile(r"No module named '([^']+)'")
+    CANNOT_IMPORT = re.compile(r"cannot import name '([^']+)' from '([^']+)'")
+
+    def __init__(self):
+        super().__init__()
+        self.in_traceback = False
+        self.frame: Optional[Tuple[str, str, Optional[str]]] = None
+
+    def feed(self, line: str):
+        if line.startswith("Traceback (most recent call last)"):
+            self.in_traceback, self.frame = True, None
+            return
+        if not self.in_traceback:
+            return
+        if line[:1] in (" ", "\t"):
+            m = self.FRAME.match(line)
+            if m:
+                self.frame = m.groups()
+            return
+        m = self.EXCEPTION.match(line)
+        if not m:
+            return
+        self.in_traceback = False
+        fields = {"exception": m.group(1).rsplit(".", 1)[-1], "message": m.group(2)}
+        if self.frame:
+            fields.update(file=self.frame[0], line=int(self.frame[1]))
+            if self.frame[2]:
+                fields["function"] = self.frame[2]
+        missing = self.MISSING_MODULE.search(m.group(2))
+        if missing:
+            fields.update(missing_module=missing.group(1), missing_package=missing.group(1).split(".")[0])
+        cannot = self.CANNOT_IMPORT.search(m.group(2))
+        if cannot:
+            fields.update(missing_name=cannot.group(1), missing_module=cannot.group(2))
+        # Chained exceptions: the last one is what was raised
+        self.fields = fields
+
+@register
+class PipResolver(Extractor):
+    name = "pip"
+    triggers = ("Could not find a version", "No matching distribution", "conflicting dependencies", "ResolutionImpossible")
+    NOT_FOUND = re.compile(r"ERROR: (?:Could not find a version that satisfies the requirement|No matching distribution found for) (\S+)")
+    CONFLICT = re.compile(r"ERROR: Cannot install ([^\n]{1,500}?) because these package versions have conflicting dependencies")
+
+    def feed(self, line: str):
+        if not line.startswith("ERROR: "):
+            return
+        m = self.NOT_FOUND.match(line)
+        if m:
+            self.fields.update(requirement=m.group(1), missing_package=package_name(m.group(1)))
+            return
+        m = self.CONFLICT.match(line)
+        if m:
+            self.fields["conflict"] = m.group(1)
+
+@register
+class NpmError(Extractor):
+    name = "npm"
+    triggers = ("npm ERR!", "npm error")
+    PREFIX = re.compile(r"npm (?:ERR!|error) ")
+    NOT_FOUND_URL = re.compile(r"404 Not Found - GET (\S+)")
+    NOT_IN_REGISTRY = re.compile(r"404\s+'([^']+)' is not in (?:this|the npm) registry")
+    PEER = re.compile(r"(?:peer|Could not resolve dependency: peer) (\S+) from (\S+)")
+
+    def feed(self, line: str):
+        m = self.PREFIX.match(line)
+        if not m:
+            return
+        line = line[m.end():]
+        if line.startswith("code ") and "npm_code" not in self.fields:
+            self.fields["npm_code"] = line[5:].strip()
+            return
+        m = self.NOT_IN_REGISTRY.match(line)
+        if m:
+            spec = m.group(1)
+            # foo@^1.0 / @scope/foo@1
+            self.fields["missing_package"] = spec[0] + spec[1:].split("@", 1)[0] if spec.startswith("@") else spec.split("@", 1)[0]
+            return
+        m = self.NOT_FOUND_URL.match(line)
+        if m:
+            self.fields.setdefault("missing_package", unquote(m.group(1).rstrip("/").rsplit("/", 1)[-1]))
+            return
+        m = self.PEER.search(line)
+        if m and "conflict" not in self.fields:
+            self.fields.update(conflict=m.group(1), required_by=m.group(2))
+
+@register
+class DockerBuild(Extractor):
+    """
+    The failing Dockerfile step of a BuildKit or legacy `docker build`.
+    """
+    name = "docker_build"
+    triggers = ("failed to solve", "returned a non-zero code", "did not complete successfully")
+    LEGACY_STEP = re.compile(r"Step (\d+/\d+) : (.*)")
+    LEGACY_FAILED = re.compile(r"The command '(.*)' returned a non-zero code: (\d+)")
+    BUILDKIT_FAILED_STEP = re.compile(r"\s*> \[([^\]]+)\] (.*):$")
+    BUILDKIT_FAILED = re.compile(r"(?:ERROR: )?failed to solve: process \"(.*)\" did not complete successfully: exit code: (\d+)")
+    DOCKERFILE_LINE = re.compile(r"Dockerfile(?:\.\S+)?:(\d+)")
+
+    def __init__(self):
+        super().__init__()
+        self.step: Optional[Tuple[str, str]] = None
+
+    def feed(self, line: str):
+        if line.startswith("Step "):
+            m = self.LEGACY_STEP.match(line)
+            if m:
+                self.step = m.groups()
+            return
+        if line.startswith("The command "):
+            m = self.LEGACY_FAILED.match(line)
+            if m:
+                self.fields.update(command=m.group(1), exit_code=int(m.group(2)))
+                if self.step:
+                    self.fields.update(step=self.step[0], instruction=self.step[1])
+            return
+        if line.lstrip().startswith(">"):
+            m = self.BUILDKIT_FAILED_STEP.match(line)
+            if m:
+                self.fields.update(step=m.group(1), instruction=m.group(2))
+            return
+        if "failed to solve" in line:
+            m = self.BUILDKIT_FAILED.search(line)
+            if m:
+                self.fields.update(command=m.group(1), exit_code=int(m.group(2)))
+            return
+        if line.startswith("Dockerfile") and "dockerfile_line" not in self.fields:
+            m = self.DOCKERFILE_LINE.match(line)
+            if m:
+                self.fields["dockerfile_line"] = int(m.group(1))
@@ -0,0 +1,121 @@
+import re
+from typing import Callable, Dict, Any, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+
+# {MATCH_1} / {MISSING_PACKAGE} / {MATCH_1:branch}
+SLOT = re.compile(r"\{([A-Z][A-Z0-9_]*)(?::([a-z_]+))?\}")
+_BRANCH = re.compile(r"^[a-zA-Z0-9._\-/]+$")
+_CONTAINER = re.compile(r"^/?[a-zA-Z0-9][a-zA-Z0-9_.-]*$")
+_PACKAGE = re.compile(r"^@?[A-Za-z0-9][A-Za-z0-9._/-]*$")
+_CONTROL = re.compile(r"[\x00-\x1f\x7f]")
+
+class TemplateError(ValueError):
+    pass
+
+def is_branch_name(name: str) -> bool:
+    """
+    A name git accepts for a branch (the subset of `git check-ref-format`
+    that matters for values read from error output).
+    """
+    if not name or not _BRANCH.match(name) or name.startswith(("-", "/", ".")):
+        return False
+    return ".." not in name and "//" not in name and not name.endswith(("/", ".", ".lock"))
+
+def is_argument(value: str) -> bool:
+    # Values never become options of the command they are passed to
+    return bool(value) and not value.startswith("-") and not _CONTROL.search(value)
+
+VALIDATORS: Dict[str, Callable[[str], bool]] = {
+    "arg": is_argument,
+    "branch": is_branch_name,
+    "container": lambda v: bool(_CONTAINER.match(v)),
+    "path": lambda v: is_argument(v) and len(v) <= 4096,
+    "package": lambda v: bool(_PACKAGE.match(v)) and len(v) <= 214,
+    "number": lambda v: v.isdigit() and len(v) <= 10,
+}
+# Validators of well-known extracted fields; other slots default to "arg"
+FIELD_VALIDATORS = {"BRANCH": "branch", "CONTAINER": "container", "FILE": "path", "PATH": "path", "MISSING_PACKAGE": "package", "LINE": "number", "EXIT_CODE": "number"}
+
+# Literal arguments that make a fix destructive or privileged
+HIGH_RISK_ARGS = {"rm", "rmdir", "sudo", "-D", "-f", "-rf", "--force", "--hard", "--delete", "clean", "prune"}
+
+class Slot:
+    __slots__ = ("name", "validator", "check")
+
+    def __init__(self, name: str, validator: Optional[str] = None):
+        validator = validator or FIELD_VALIDATORS.get(name, "arg")
+        if validator not in VALIDATORS:
+            raise TemplateError(f"unknown validator '{validator}' for {{{name}}} (expected one of {', '.join(VALIDATORS)})")
+        self.name = name
+        self.validator = validator
+        self.check = VALIDATORS[validator]
+
+# One argv element: a literal string, or literal pieces and slots
+Part = Union[str, Tuple[Union[str, Slot], ...]]
+
+class FixTemplate:
+    """
+    A fix command compiled once into literal parts and typed slots.
+    render() fills every slot in a single pass and validates each value,
+    so text captured from error output cannot become an option or carry
+    control characters. risk is "high" for destructive or privileged
+    commands and "medium" otherwise.
+    """
+    __slots__ = ("source", "parts", "slots", "risk")
+
+    def __init__(self, source: Sequence[str]):
+        self.source = tuple(source)
+        parts: List[Part] = []
+        slots: Dict[str, Slot] = {}
+        for arg in self.source:
+            tokens, pos = [], 0
+            for m in SLOT.finditer(arg):
+                if m.start() > pos:
+                    tokens.append(arg[pos:m.start()])
+                slot = Slot(m.group(1), m.group(2))
+                slots.setdefault(slot.name, slot)
+                tokens.append(slot)
+                pos = m.end()
+            if pos == 0:
+                parts.append(arg)
+                continue
+            if pos < len(arg):
+                tokens.append(arg[pos:])
+            parts.append(tuple(tokens))
+        self.parts = tuple(parts)
+        self.slots = tuple(slots)
+        self.risk = "high" if any(isinstance(p, str) and p in HIGH_RISK_ARGS for p in self.parts) else "medium"
+
+    def render(self, values: Mapping[str, Any]) -> List[str]:
+        argv = []
+        for part in self.parts:
+            if isinstance(part, str):
+                argv.append(part)
+                continue
+            pieces = []
+            for token in part:
+                if isinstance(token, str):
+                    pieces.append(token)
+                    continue
+                value = values.get(token.name)
+                if value is None:
+                    raise TemplateError(f"{{{token.name}}} has no value for this error")
+                value = str(value)
+                if not token.check(value):
+                    raise TemplateError(f"{value!r} is not a valid {token.validator} for {{{token.name}}}")
+                pieces.append(value)
+            argv.append("".join(pieces))
+        return argv
+
+    def __repr__(self) -> str:
+        return f"FixTemplate({list(self.source)!r})"
+
+def compile_templates(commands: Iterable[Sequence[str]]) -> Tuple[FixTemplate, ...]:
+    return tuple(c if isinstance(c, FixTemplate) else FixTemplate(c) for c in commands)
+
+def slot_values(matches: Sequence[Any], fields: Optional[Mapping[str, Any]] = None) -> Dict[str, Any]:
+    """
+    {MATCH_n} values from pattern groups and {FIELD} values from diagnosis fields.
+    """
+    values = {f"MATCH_{i}": m for i, m in enumerate(matches, 1)}
+    values.update((k.upper(), v) for k, v in (fields or {}).items())
+    return values
@@ -0,0 +1,171 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, Any, List, Optional, Union
+from .metrics import metrics
+
+# Environment stored with each transcript (never credentials or proxies)
+ENV_KEYS = ("LANG", "LC_ALL", "GIT_TERMINAL_PROMPT", "DOCKER_HOST", "DOCKER_CONTEXT", "GH_HOST", "CI")
+
+class CommandFixtures:
+    """
+    Record/replay layer under every command FixShell spawns. Recording
+    appends one JSON line per command (argv, cwd relative to the session
+    root, an environment subset, exit code, output) to a fixture file.
+    Replaying serves the transcripts back per (argv, cwd) in recorded
+    order, repeating the last one when they run out, without spawning
+    anything; backoff waits are skipped.
+    """
+
+    def __init__(self):
+        self.mode: Optional[str] = None
+        self.path: Optional[str] = None
+        self.root = os.getcwd()
+        self.strict = False
+        self._lock = threading.Lock()
+        self._file = None
+        # key -> transcripts in recorded order, and the next one to serve
+        self._tapes: Dict[str, List[Dict[str, Any]]] = {}
+        self._positions: Dict[str, int] = {}
+        self.misses: List[Union[str, List[str]]] = []
+        # Waits skipped while replaying
+        self.skipped_sleep = 0.0
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == "record"
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    def record_to(self, path: str, root: Optional[str] = None):
+        self.close()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # Transcripts hold the full output of every command; keep them private
+        self._file = os.fdopen(os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600), "a", encoding="utf-8")
+        self.mode, self.path, self.root = "record", path, os.path.abspath(root or os.getcwd())
+
+    def replay_from(self, path: str, root: Optional[str] = None, strict: bool = False):
+        """
+        Loads a fixture file. With strict, a command without a transcript
+        raises LookupError instead of failing with exit code 127.
+        """
+        self.close()
+        tapes: Dict[str, List[Dict[str, Any]]] = {}
+        with open(path, encoding="utf-8") as f:
+            for n, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                    key = self._key(entry["argv"], entry.get("cwd", "."))
+                except (ValueError, KeyError, TypeError) as e:
+                    raise ValueError(f"{path}:{n}: invalid transcript: {e}")
+                tapes.setdefault(key, []).append(entry)
+        self._tapes, self._positions, self.misses = tapes, {}, []
+        self.mode, self.path, self.root, self.strict = "replay", path, os.path.abspath(root or os.getcwd()), strict
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+        self.mode = None
+
+    def _relative(self, cwd: Optional[str]) -> str:
+        return os.path.relpath(os.path.abspath(cwd or os.getcwd()), self.root)
+
+    @staticmethod
+    def _key(cmd, cwd: str) -> str:
+        return json.dumps([cmd if isinstance(cmd, str) else [str(c) for c in cmd], cwd])
+
+    def lookup(self, cmd, cwd: Optional[str] = None) -> Dict[str, Any]:
+        """
+        The next transcript for a command. Raises OSError if the recorded
+        command could not be started; misses get exit code 127.
+        """
+        key = self._key(cmd, self._relative(cwd))
+        with self._lock:
+            tape = self._tapes.get(key)
+            if not tape:
+                self.misses.append(cmd)
+            else:
+                position = self._positions.get(key, 0)
+                self._positions[key] = position + 1
+                entry = tape[min(position, len(tape) - 1)]
+        if not tape:
+            metrics.inc("fixture_misses_total")
+            label = cmd if isinstance(cmd, str) else " ".join(map(str, cmd))
+            if self.strict:
+                raise LookupError(f"No recorded transcript for '{label}' in {self.path}")
+            return {"returncode": 127, "stdout": "", "stderr": f"fixshell: no recorded transcript for '{label}' in {self.path}\n"}
+        if entry.get("raised"):
+            error = FileNotFoundError if entry["raised"] == "FileNotFoundError" else OSError
+            raise error(entry.get("stderr", ""))
+        return entry
+
+    def save(self, cmd, cwd: Optional[str], returncode: int, stdout: Any = "", stderr: Any = "", duration: float = 0.0, raised: Optional[str] = None):
+        entry = {
+            "argv": cmd if isinstance(cmd, str) else [str(c) for c in cmd],
+            "cwd": self._relative(cwd),
+            "env": {k: os.environ[k] for k in ENV_KEYS if k in os.environ},
+            "returncode": returncode,
+            "stdout": _text(stdout),
+            "stderr": _text(stderr),
+            "duration": round(duration, 4),
+        }
+        if raised:
+            entry["raised"] = raised
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock:
+            if self._file:
+                self._file.write(line)
+                self._file.flush()
+
+    def run(self, cmd, **kwargs) -> subprocess.CompletedProcess:
+        """
+        subprocess.run through the fixture layer (same arguments).
+        """
+        check = kwargs.pop("check", False)
+        captured = kwargs.get("capture_output") or kwargs.get("stdout") == subprocess.PIPE
+        text = kwargs.get("text") or kwargs.get("universal_newlines") or kwargs.get("encoding")
+        if self.replaying:
+            entry = self.lookup(cmd, kwargs.get("cwd"))
+            stdout, stderr = entry.get("stdout", ""), entry.get("stderr", "")
+            if captured:
+                res = subprocess.CompletedProcess(cmd, entry["returncode"], stdout if text else stdout.encode(), stderr if text else stderr.encode())
+            else:
+                # What the live command would have shown on the terminal
+                sys.stdout.write(stdout)
+                sys.stderr.write(stderr)
+                res = subprocess.CompletedProcess(cmd, entry["returncode"])
+        else:
+            started = time.monotonic()
+            try:
+                res = subprocess.run(cmd, **kwargs)
+            except OSError as e:
+                if self.recording:
+                    self.save(cmd, kwargs.get("cwd"), 127, stderr=str(e), duration=time.monotonic() - started, raised=type(e).__name__)
+                raise
+            if self.recording:
+                self.save(cmd, kwargs.get("cwd"), res.returncode, res.stdout, res.stderr, time.monotonic() - started)
+        if check:
+            res.check_returncode()
+        return res
+
+    def sleep(self, seconds: float):
+        if self.replaying:
+            self.skipped_sleep += seconds
+            return
+        time.sleep(seconds)
+
+def _text(value: Any) -> str:
+    if value is None:
+        return ""
+    return value.decode("utf-8", "replace") if isinstance(value, bytes) else value
+
+# Process-wide, configured by `fixshell --record/--replay`
+fixtures = CommandFixtures()
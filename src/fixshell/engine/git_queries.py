@@ -0,0 +1,159 @@
+import os
+import subprocess
+import threading
+from typing import Dict, Any, Optional, Sequence, Tuple
+from .fixtures import fixtures
+from .metrics import metrics
+from .tracing import traced_run
+from ..config import GIT_QUERY_CACHE_ENABLED, QUERY_TIMEOUT
+
+# `git branch` arguments that only list
+BRANCH_LISTING = {"-a", "--all", "-r", "--remotes", "-v", "-vv", "--verbose", "--no-color", "--list", "-l", "--show-current"}
+
+def is_read_only(args: Sequence[str]) -> bool:
+    """
+    Whether `git <args>` only reads refs, HEAD, the index or the repository
+    config, so its answer can be reused until one of them changes.
+    """
+    if not args:
+        return False
+    sub, rest = args[0], list(args[1:])
+    if sub in ("rev-parse", "show-ref"):
+        return True
+    if sub == "branch":
+        # With --list, the other arguments are patterns
+        listing = "--list" in rest or "-l" in rest
+        return all(a in BRANCH_LISTING or a.startswith("--format=") or (listing and not a.startswith("-")) for a in rest)
+    if sub == "remote":
+        return rest in ([], ["-v"], ["--verbose"]) or rest[:1] == ["get-url"]
+    if sub == "symbolic-ref":
+        # One argument reads the ref; two would set it
+        return not {"-d", "--delete"} & set(rest) and len([a for a in rest if not a.startswith("-")]) <= 1
+    return False
+
+def find_git_dir(cwd: Optional[str] = None) -> Optional[Tuple[str, str]]:
+    """
+    (git dir, common dir) of the repository containing cwd. They differ
+    for linked worktrees, whose HEAD and index are their own.
+    """
+    path = os.path.abspath(cwd or os.getcwd())
+    while True:
+        dot = os.path.join(path, ".git")
+        if os.path.isdir(dot):
+            git_dir = dot
+            break
+        if os.path.isfile(dot):
+            try:
+                with open(dot, encoding="utf-8") as f:
+                    content = f.read().strip()
+            except OSError:
+                return None
+            if not content.startswith("gitdir:"):
+                return None
+            git_dir = os.path.normpath(os.path.join(path, content[7:].strip()))
+            break
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+    common = git_dir
+    try:
+        with open(os.path.join(git_dir, "commondir"), encoding="utf-8") as f:
+            common = os.path.normpath(os.path.join(git_dir, f.read().strip()))
+    except OSError:
+        pass
+    return git_dir, common
+
+def _stat(path: str) -> Optional[Tuple[int, int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+def _loose_refs(root: str) -> Tuple[Tuple[str, int], ...]:
+    # git replaces a ref by renaming a lock file over it, so a changed ref
+    # has a new inode even when mtimes are too coarse to tell
+    found = []
+    stack = [root]
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                else:
+                    found.append((entry.path, entry.inode()))
+    return tuple(sorted(found))
+
+def fingerprint(git_dir: str, common: str) -> Tuple[Any, ...]:
+    """
+    State the cached answers depend on: HEAD's content, the index,
+    packed-refs, the repository config and every loose ref.
+    """
+    try:
+        with open(os.path.join(git_dir, "HEAD"), "rb") as f:
+            head = f.read()
+    except OSError:
+        head = None
+    return (
+        head,
+        _stat(os.path.join(git_dir, "index")),
+        _stat(os.path.join(common, "packed-refs")),
+        _stat(os.path.join(common, "config")),
+        _loose_refs(os.path.join(common, "refs")),
+    )
+
+class GitQueryCache:
+    """
+    Per-repository answers to read-only git queries (current branch,
+    upstream, remote URL, branch list). An answer is served until a file it
+    depends on changes, whoever changed it, so repeated lookups within a
+    workflow cost a few stat calls instead of a git process.
+    """
+
+    def __init__(self, enabled: bool = True, timeout: float = QUERY_TIMEOUT):
+        self.enabled = enabled
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        # common dir -> {(cwd, args): (fingerprint, answer)}
+        self._repos: Dict[str, Dict[Tuple[str, Tuple[str, ...]], Tuple[Tuple[Any, ...], subprocess.CompletedProcess]]] = {}
+
+    def handles(self, cmd: Sequence[str]) -> bool:
+        return self.enabled and len(cmd) > 1 and cmd[0] == "git" and is_read_only(cmd[1:])
+
+    def query(self, args: Sequence[str], cwd: Optional[str] = None, env: Optional[Dict[str, str]] = None, timeout: Optional[float] = None) -> subprocess.CompletedProcess:
+        """
+        `git <args>` with captured text output. Anything that is not a
+        read-only query inside a repository is run every time.
+        """
+        cmd = ["git", *args]
+        repo = None
+        # Transcripts must hold every query; GIT_DIR points elsewhere
+        if self.enabled and is_read_only(args) and not (fixtures.recording or fixtures.replaying) and "GIT_DIR" not in (env or os.environ):
+            repo = find_git_dir(cwd)
+        if repo is None:
+            return traced_run(cmd, capture_output=True, text=True, cwd=cwd, env=env, timeout=timeout or self.timeout)
+
+        key = (os.path.abspath(cwd or os.getcwd()), tuple(args))
+        state = fingerprint(*repo)
+        with self._lock:
+            cached = self._repos.get(repo[1], {}).get(key)
+        if cached is not None and cached[0] == state:
+            metrics.inc("git_query_cache_total", result="hit")
+            return cached[1]
+        metrics.inc("git_query_cache_total", result="miss")
+        res = traced_run(cmd, capture_output=True, text=True, cwd=cwd, env=env, timeout=timeout or self.timeout)
+        with self._lock:
+            self._repos.setdefault(repo[1], {})[key] = (state, res)
+        return res
+
+    def clear(self):
+        with self._lock:
+            self._repos.clear()
+
+# Process-wide (set FIXSHELL_GIT_QUERY_CACHE=0 to disable)
+git_queries = GitQueryCache(GIT_QUERY_CACHE_ENABLED)
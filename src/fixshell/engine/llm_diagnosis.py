@@ -0,0 +1,243 @@
+import hashlib
+import http.client
+import json
+import os
+import re
+import threading
+import time
+from typing import Dict, Any, Iterable, List, Optional
+from urllib.parse import urlparse
+from .metrics import metrics
+from .tracing import tracer
+
+# Lines that usually carry the actual failure in a long log
+RELEVANT = re.compile(r"error|fatal|fail|denied|refused|not found|no such|cannot|can't|unable|invalid|exception|traceback|panic", re.IGNORECASE)
+# Volatile tokens that should not change an error's fingerprint. Quoted
+# names and other numbers (exit codes, HTTP statuses, versions) are kept:
+# they tell errors apart. The "keep" prefix survives the masking.
+VOLATILE = re.compile(r"""
+    (?P<keep>\bline\s|\bcol(?:umn)?\s|\bpid\s|\.[a-z0-9]{1,5}:)\d+(?::\d+)?      # line/column numbers, pids
+    | \d{4}-\d{2}-\d{2}[t\ ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:z|[+-]\d{2}:?\d{2})?   # timestamps
+    | \b\d{1,2}:\d{2}:\d{2}(?:[.,]\d+)?\b
+    | \b[0-9a-f]{8}(?:-[0-9a-f]{4}){3}-[0-9a-f]{12}\b                          # uuids
+    | 0x[0-9a-f]+ | \b(?=[0-9a-f]*\d)[0-9a-f]{7,64}\b                          # addresses, hashes
+    | (?:/private)?/(?:tmp|var/tmp|var/folders)/[^\s'"]+                     # temp paths
+""", re.IGNORECASE | re.VERBOSE)
+
+PROMPT = """You diagnose failed shell commands. Reply with JSON only:
+{{"category": "SHORT_UPPER_SNAKE_NAME", "explanation": "one sentence", "suggested_fix": ["step", ...], "confidence": 0.0-1.0}}
+Never suggest destructive commands.
+
+Error output:
+{output}
+"""
+
+def trim_output(output: str, max_lines: int = 40, context: int = 2) -> str:
+    """
+    Keeps the lines around error-looking lines plus the tail of the output,
+    capped at max_lines, so the prompt stays small for huge logs.
+    """
+    lines = (output or "").strip().splitlines()
+    if len(lines) <= max_lines:
+        return "\n".join(lines)
+
+    keep = set(range(len(lines) - max_lines // 4, len(lines)))
+    for i, line in enumerate(lines):
+        if RELEVANT.search(line):
+            keep.update(range(max(0, i - context), min(len(lines), i + context + 1)))
+    # Prefer the last matches: the final error is usually the cause
+    selected = sorted(keep)[-max_lines:]
+
+    window, previous = [], None
+    for i in selected:
+        if previous is not None and i != previous + 1:
+            window.append("...")
+        window.append(lines[i])
+        previous = i
+    return "\n".join(window)
+
+def fingerprint(output: str) -> str:
+    """
+    Stable key for an error: the trimmed output with hex ids, timestamps,
+    temp paths and line/column numbers masked.
+    """
+    normalized = VOLATILE.sub(lambda m: (m.group("keep") or "") + "#", trim_output(output).lower())
+    normalized = re.sub(r"\s+", " ", normalized).strip()
+    return hashlib.sha256(normalized.encode()).hexdigest()[:32]
+
+class DiagnosisCache:
+    """
+    On-disk cache of LLM answers, one JSON file per model and error
+    fingerprint. Answers older than `ttl` seconds are asked again.
+    """
+
+    def __init__(self, directory: Optional[str] = None, ttl: Optional[float] = None):
+        self.directory = directory
+        self.ttl = ttl
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        if not self.directory:
+            return None
+        try:
+            if self.ttl is not None and time.time() - os.path.getmtime(self._path(key)) > self.ttl:
+                return None
+            with open(self._path(key)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key: str, answer: Dict[str, Any]):
+        if not self.directory:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp = self._path(key) + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump(answer, f)
+            os.replace(tmp, self._path(key))
+        except OSError:
+            pass
+
+class OllamaBackend:
+    """
+    Client for an Ollama-compatible /api/generate endpoint. One HTTP/1.1
+    connection is kept open across requests; every request is bounded by
+    `timeout`.
+    """
+
+    def __init__(self, url: str = "http://127.0.0.1:11434", model: str = "llama3", timeout: float = 8.0):
+        parsed = urlparse(url if "://" in url else f"http://{url}")
+        self.https = parsed.scheme == "https"
+        self.host = parsed.hostname or "127.0.0.1"
+        self.port = parsed.port or (443 if self.https else 80)
+        self.base_path = parsed.path.rstrip("/")
+        self.model = model
+        self.timeout = timeout
+        self._conn: Optional[http.client.HTTPConnection] = None
+
+    def _connection(self) -> http.client.HTTPConnection:
+        if self._conn is None:
+            cls = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+            self._conn = cls(self.host, self.port, timeout=self.timeout)
+        return self._conn
+
+    def close(self):
+        if self._conn:
+            self._conn.close()
+            self._conn = None
+
+    def generate(self, prompt: str) -> str:
+        body = json.dumps({"model": self.model, "prompt": prompt, "stream": False, "format": "json"})
+        headers = {"Content-Type": "application/json", "Connection": "keep-alive"}
+        for attempt in (1, 2):
+            conn = self._connection()
+            try:
+                conn.request("POST", f"{self.base_path}/api/generate", body=body, headers=headers)
+                response = conn.getresponse()
+                data = response.read()
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                # The server closed the idle keep-alive connection; reconnect once
+                self.close()
+                if attempt == 2:
+                    raise
+                continue
+            if response.status != 200:
+                raise OSError(f"LLM endpoint returned HTTP {response.status}")
+            return json.loads(data).get("response", "")
+        return ""
+
+class LLMDiagnoser:
+    """
+    Fallback diagnosis for output the deterministic datasets do not know.
+    Answers are cached on disk by model and error fingerprint. The first
+    failure or timeout of the backend disables it for the rest of the run,
+    so a missing server costs at most one timeout.
+    """
+
+    def __init__(self, backend, cache: Optional[DiagnosisCache] = None, threshold: float = 0.6, max_lines: int = 40):
+        self.backend = backend
+        self.cache = cache or DiagnosisCache()
+        self.threshold = threshold
+        self.max_lines = max_lines
+        self.available = True
+        self._lock = threading.Lock()
+
+    def diagnose(self, output: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns {"category", "explanation", "suggested_fix", "confidence"}
+        or None when the backend is unavailable or not confident enough.
+        """
+        return self.diagnose_batch([output])[0]
+
+    def diagnose_batch(self, outputs: Iterable[str]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Diagnoses several outputs, asking the backend once per distinct
+        fingerprint (e.g. the same failure in parallel steps).
+        """
+        outputs = list(outputs)
+        keys = [self.cache_key(o) for o in outputs]
+        answers: Dict[str, Optional[Dict[str, Any]]] = {}
+        for key, output in zip(keys, outputs):
+            if key not in answers:
+                answers[key] = self._answer(key, output)
+        return [self._accept(answers[key]) for key in keys]
+
+    def cache_key(self, output: str) -> str:
+        # Another model may answer differently
+        model = getattr(self.backend, "model", "")
+        return hashlib.sha256(f"{model}\0{fingerprint(output)}".encode()).hexdigest()[:32]
+
+    def _accept(self, answer: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        if not answer or answer.get("confidence", 0.0) < self.threshold:
+            return None
+        return answer
+
+    def _answer(self, key: str, output: str) -> Optional[Dict[str, Any]]:
+        cached = self.cache.get(key)
+        if cached is not None:
+            metrics.inc("llm_requests_total", outcome="cached")
+            return cached
+        # Serialized: the backend holds a single connection
+        with self._lock:
+            if not self.available:
+                return None
+            with tracer.span("llm_diagnosis", "classifier", fingerprint=key) as span, metrics.timer("llm_seconds"):
+                try:
+                    raw = self.backend.generate(PROMPT.format(output=trim_output(output, self.max_lines)))
+                    answer = self._parse(raw)
+                except (OSError, ValueError, http.client.HTTPException) as e:
+                    self.available = False
+                    self.backend.close()
+                    span.set(error=type(e).__name__)
+                    metrics.inc("llm_requests_total", outcome="error")
+                    return None
+                span.set(category=answer and answer["category"])
+        metrics.inc("llm_requests_total", outcome="ok" if answer else "invalid")
+        if answer:
+            self.cache.put(key, answer)
+        return answer
+
+    @staticmethod
+    def _parse(raw: str) -> Optional[Dict[str, Any]]:
+        try:
+            data = json.loads(raw)
+        except ValueError:
+            return None
+        if not isinstance(data, dict) or not data.get("category"):
+            return None
+        fixes = data.get("suggested_fix") or []
+        if isinstance(fixes, str):
+            fixes = [fixes]
+        try:
+            confidence = min(max(float(data.get("confidence", 0.0)), 0.0), 1.0)
+        except (TypeError, ValueError):
+            confidence = 0.0
+        return {
+            "category": re.sub(r"[^A-Z0-9_]", "_", str(data["category"]).upper())[:64],
+            "explanation": str(data.get("explanation", "")),
+            "suggested_fix": [str(f) for f in fixes][:5],
+            "confidence": confidence,
+        }
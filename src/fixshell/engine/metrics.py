@@ -0,0 +1,319 @@
+import atexit
+import os
+import re
+import socket
+import tempfile
+import threading
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: concurrent flushes are not serialized
+    fcntl = None
+
+# Upper bounds (seconds) shared by every latency histogram
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, float("inf"))
+PREFIX = "fixshell_"
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+class _Shard:
+    """
+    Per-thread aggregation. Only its owning thread writes to it, so the lock
+    is uncontended except while a flush is merging shards.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters: Dict[Tuple[str, LabelKey], float] = {}
+        # name/labels -> [bucket counts..., sum, count, max]
+        self.histograms: Dict[Tuple[str, LabelKey], List[float]] = {}
+
+class _Timer:
+    def __init__(self, registry: "MetricsRegistry", name: str, labels: Dict[str, Any]):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self) -> "_Timer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.registry.observe(self.name, time.perf_counter() - self.start, **self.labels)
+        return False
+
+class _NoopTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+NOOP_TIMER = _NoopTimer()
+
+class MetricsRegistry:
+    """
+    In-process counters and latency histograms. Recording is a no-op until
+    configure() attaches a sink; everything is flushed once at exit.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.enabled = False
+        self.buckets = buckets
+        self.sinks: List[Any] = []
+        self._local = threading.local()
+        self._shards: List[_Shard] = []
+        self._shards_lock = threading.Lock()
+        self._atexit = False
+
+    def configure(self, textfile: Optional[str] = None, statsd: Optional[str] = None):
+        if textfile:
+            self.sinks.append(PrometheusTextfileSink(textfile))
+        if statsd:
+            self.sinks.append(StatsdSink.from_address(statsd))
+        if self.sinks:
+            self.enabled = True
+            if not self._atexit:
+                atexit.register(self.flush)
+                self._atexit = True
+
+    def _shard(self) -> _Shard:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = _Shard()
+            with self._shards_lock:
+                self._shards.append(shard)
+        return shard
+
+    def inc(self, name: str, value: float = 1, **labels):
+        if not self.enabled:
+            return
+        shard = self._shard()
+        key = (name, _label_key(labels))
+        with shard.lock:
+            shard.counters[key] = shard.counters.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels):
+        if not self.enabled:
+            return
+        shard = self._shard()
+        key = (name, _label_key(labels))
+        with shard.lock:
+            hist = shard.histograms.get(key)
+            if hist is None:
+                hist = shard.histograms[key] = [0] * len(self.buckets) + [0.0, 0, 0.0]
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    hist[i] += 1
+                    break
+            n = len(self.buckets)
+            hist[n] += seconds
+            hist[n + 1] += 1
+            hist[n + 2] = max(hist[n + 2], seconds)
+
+    def timer(self, name: str, **labels):
+        if not self.enabled:
+            return NOOP_TIMER
+        return _Timer(self, name, labels)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """
+        Merges all thread shards into {"counters": {...}, "histograms": {...}}.
+        Histogram buckets are per-bucket (not cumulative) counts.
+        """
+        counters: Dict[Tuple[str, LabelKey], float] = {}
+        histograms: Dict[Tuple[str, LabelKey], List[float]] = {}
+        with self._shards_lock:
+            shards = list(self._shards)
+        n = len(self.buckets)
+        for shard in shards:
+            with shard.lock:
+                for key, value in shard.counters.items():
+                    counters[key] = counters.get(key, 0) + value
+                for key, hist in shard.histograms.items():
+                    merged = histograms.setdefault(key, [0] * n + [0.0, 0, 0.0])
+                    for i in range(n + 2):
+                        merged[i] += hist[i]
+                    merged[n + 2] = max(merged[n + 2], hist[n + 2])
+        return {"counters": counters, "histograms": histograms}
+
+    def reset(self):
+        with self._shards_lock:
+            for shard in self._shards:
+                with shard.lock:
+                    shard.counters.clear()
+                    shard.histograms.clear()
+
+    def flush(self):
+        if not self.sinks:
+            return
+        snapshot = self.snapshot()
+        for sink in self.sinks:
+            try:
+                sink.flush(snapshot, self.buckets)
+            except OSError:
+                # Metrics must never break a run
+                pass
+        self.reset()
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _format_labels(labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+def _format_bound(bound: float) -> str:
+    return "+Inf" if bound == float("inf") else repr(bound)
+
+_SAMPLE = re.compile(r'^([A-Za-z_:][A-Za-z0-9_:]*)(\{.*\})?\s+(\S+)$')
+_LABEL = re.compile(r'([A-Za-z_][A-Za-z0-9_]*)="((?:[^"\\]|\\.)*)"')
+
+class PrometheusTextfileSink:
+    """
+    Writes node_exporter textfile-collector output. Each fixshell run adds
+    its counts to the values already in the file, so the file accumulates
+    across invocations. Writes are atomic and serialized with a lock file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def flush(self, snapshot: Dict[str, Dict], buckets: Tuple[float, ...]):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        with open(self.path + ".lock", "w") as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            types, samples = self._read()
+            self._add(types, samples, snapshot, buckets)
+            fd, tmp = tempfile.mkstemp(dir=directory, prefix=".fixshell-metrics-")
+            with os.fdopen(fd, "w") as f:
+                f.write(self._render(types, samples))
+            os.chmod(tmp, 0o644)
+            os.replace(tmp, self.path)
+
+    def _read(self):
+        types: Dict[str, str] = {}
+        samples: Dict[Tuple[str, LabelKey], float] = {}
+        if not os.path.exists(self.path):
+            return types, samples
+        with open(self.path, "r") as f:
+            for line in f:
+                line = line.strip()
+                if line.startswith("# TYPE "):
+                    _, _, family, kind = line.split(None, 3)
+                    types[family] = kind
+                    continue
+                m = _SAMPLE.match(line)
+                if not m:
+                    continue
+                labels = tuple(_LABEL.findall(m.group(2) or ""))
+                try:
+                    samples[(m.group(1), labels)] = float(m.group(3))
+                except ValueError:
+                    continue
+        return types, samples
+
+    def _add(self, types, samples, snapshot, buckets):
+        def add(name, labels, value):
+            samples[(name, labels)] = samples.get((name, labels), 0) + value
+
+        for (name, labels), value in snapshot["counters"].items():
+            family = PREFIX + name
+            types[family] = "counter"
+            add(family, labels, value)
+
+        n = len(buckets)
+        for (name, labels), hist in snapshot["histograms"].items():
+            family = PREFIX + name
+            types[family] = "histogram"
+            cumulative = 0
+            for i, bound in enumerate(buckets):
+                cumulative += hist[i]
+                add(family + "_bucket", labels + (("le", _format_bound(bound)),), cumulative)
+            add(family + "_sum", labels, hist[n])
+            add(family + "_count", labels, hist[n + 1])
+
+    @staticmethod
+    def _render(types, samples) -> str:
+        def family_of(name):
+            for suffix in ("_bucket", "_sum", "_count"):
+                if name.endswith(suffix) and name[:-len(suffix)] in types:
+                    return name[:-len(suffix)]
+            return name
+
+        suffix_rank = {"_bucket": 0, "_sum": 1, "_count": 2}
+
+        def order(item):
+            # Per series: buckets by bound, then _sum, then _count
+            (name, labels), _ = item
+            le = dict(labels).get("le")
+            plain = tuple(l for l in labels if l[0] != "le")
+            bound = float("inf") if le == "+Inf" else float(le) if le else 0.0
+            return (plain, suffix_rank.get(name[len(family_of(name)):], 0), bound)
+
+        lines = []
+        for family in sorted(types):
+            lines.append(f"# TYPE {family} {types[family]}")
+            for (name, labels), value in sorted(((k, v) for k, v in samples.items() if family_of(k[0]) == family), key=order):
+                text = repr(value) if value != int(value) else str(int(value))
+                lines.append(f"{name}{_format_labels(labels)} {text}")
+        return "\n".join(lines) + "\n"
+
+class StatsdSink:
+    """
+    Sends aggregated metrics to a StatsD-compatible UDP endpoint using
+    DogStatsD tags. Histograms become sampled timers (one packet per bucket
+    with @rate = 1/count) so the server can still derive percentiles.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8125):
+        self.address = (host, port)
+
+    @staticmethod
+    def from_address(address: str) -> "StatsdSink":
+        """
+        HOST:PORT, HOST (port 8125) or :PORT (localhost). Raises ValueError
+        for a port that is not a number between 1 and 65535.
+        """
+        host, sep, port = address.rpartition(":")
+        if not sep:
+            host, port = port, ""
+        if port and not (port.isdigit() and 0 < int(port) < 65536):
+            raise ValueError(f"invalid port {port!r} in {address!r}; expected HOST:PORT")
+        return StatsdSink(host or "127.0.0.1", int(port or 8125))
+
+    def flush(self, snapshot: Dict[str, Dict], buckets: Tuple[float, ...]):
+        n = len(buckets)
+        packets = []
+        for (name, labels), value in snapshot["counters"].items():
+            packets.append(f"{PREFIX}{name}:{value:g}|c{self._tags(labels)}")
+        for (name, labels), hist in snapshot["histograms"].items():
+            for i, bound in enumerate(buckets):
+                count = hist[i]
+                if not count:
+                    continue
+                value = hist[n + 2] if bound == float("inf") else bound
+                rate = "" if count == 1 else f"|@{1 / count:.6g}"
+                packets.append(f"{PREFIX}{name}:{value * 1000:.3f}|ms{rate}{self._tags(labels)}")
+
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            for packet in packets:
+                sock.sendto(packet.encode(), self.address)
+        finally:
+            sock.close()
+
+    @staticmethod
+    def _tags(labels) -> str:
+        return "|#" + ",".join(f"{k}:{v}" for k, v in labels) if labels else ""
+
+# Process-wide registry, configured from the CLI / environment
+metrics = MetricsRegistry()
@@ -0,0 +1,206 @@
+import errno
+import os
+import selectors
+import socket
+import threading
+import time
+from typing import Callable, Dict, Any, List, Optional, Tuple
+from urllib.parse import urlparse
+from .tracing import tracer
+
+ONLINE = "Online"
+DEGRADED = "Degraded"
+OFFLINE = "Offline"
+NO_DNS = "DNS Failure"
+UNCHECKED = "Unchecked"
+
+def parse_endpoints(spec: str) -> List[Tuple[str, int]]:
+    """
+    Parses "host:port,host:port" (port defaults to 443).
+    """
+    endpoints = []
+    for item in (spec or "").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        host, port = item.rsplit(":", 1) if ":" in item else (item, "443")
+        endpoints.append((host.strip("[]"), int(port)))
+    return endpoints
+
+def proxy_endpoint(environ=None) -> Optional[Tuple[str, int]]:
+    """
+    The HTTPS proxy from the environment, if any, as an endpoint to probe.
+    """
+    environ = os.environ if environ is None else environ
+    url = environ.get("HTTPS_PROXY") or environ.get("https_proxy")
+    if not url:
+        return None
+    parsed = urlparse(url if "://" in url else f"http://{url}")
+    if not parsed.hostname:
+        return None
+    return parsed.hostname, parsed.port or 8080
+
+class NetworkStatus:
+    """
+    Result of one probe round: per-endpoint DNS/TCP outcome and the overall
+    label shown as NETWORK_STATE.
+    """
+
+    def __init__(self, results: Dict[str, Dict[str, Any]], checked_at: float):
+        self.results = results
+        self.checked_at = checked_at
+        reachable = [r for r in results.values() if r["tcp"]]
+        if not results:
+            self.label = UNCHECKED
+        elif len(reachable) == len(results):
+            self.label = ONLINE
+        elif reachable:
+            self.label = DEGRADED
+        elif not any(r["dns"] for r in results.values()):
+            self.label = NO_DNS
+        else:
+            self.label = OFFLINE
+
+    @property
+    def offline(self) -> bool:
+        return self.label in (OFFLINE, NO_DNS)
+
+UNCHECKED_STATUS = NetworkStatus({}, 0.0)
+
+class NetworkProbe:
+    """
+    Cached reachability of the endpoints FixShell depends on (GitHub, the
+    container registry, the HTTPS proxy). DNS lookups run in parallel and
+    TCP connects are non-blocking, all under one short timeout. Results are
+    kept for `ttl` seconds and refreshed in a background thread, so reading
+    the status never waits on the network once a result exists.
+    """
+
+    def __init__(self, endpoints: Optional[List[Tuple[str, int]]] = None, timeout: float = 1.5, ttl: float = 30.0,
+                 resolve: Callable = socket.getaddrinfo, clock: Callable[[], float] = time.monotonic):
+        self.enabled = False
+        self.endpoints = list(endpoints or [])
+        self.timeout = timeout
+        self.ttl = ttl
+        self.resolve = resolve
+        self.clock = clock
+        self._status: Optional[NetworkStatus] = None
+        self._lock = threading.Lock()
+        self._refreshing: Optional[threading.Thread] = None
+
+    def configure(self, endpoints: List[Tuple[str, int]], timeout: Optional[float] = None, ttl: Optional[float] = None):
+        with self._lock:
+            self.endpoints = list(endpoints)
+            self._status = None
+        if timeout is not None:
+            self.timeout = timeout
+        if ttl is not None:
+            self.ttl = ttl
+        self.enabled = bool(self.endpoints)
+
+    def _fresh(self) -> bool:
+        return self._status is not None and self.clock() - self._status.checked_at < self.ttl
+
+    def status(self, wait: bool = False) -> NetworkStatus:
+        """
+        Returns the cached status, starting a background refresh when it has
+        expired. With wait=True a missing or expired result is probed first
+        (bounded by the timeout).
+        """
+        if not self.enabled:
+            return UNCHECKED_STATUS
+        if self._fresh():
+            return self._status
+        if wait:
+            return self.refresh()
+        self.refresh_async()
+        return self._status or UNCHECKED_STATUS
+
+    def label(self) -> str:
+        status = self.status()
+        return "Checking..." if self.enabled and status is UNCHECKED_STATUS else status.label
+
+    def is_offline(self) -> bool:
+        return self.enabled and self.status(wait=True).offline
+
+    def invalidate(self):
+        with self._lock:
+            self._status = None
+
+    def refresh_async(self):
+        with self._lock:
+            if self._refreshing and self._refreshing.is_alive():
+                return
+            self._refreshing = threading.Thread(target=self.refresh, name="fixshell-netprobe", daemon=True)
+            self._refreshing.start()
+
+    def refresh(self) -> NetworkStatus:
+        with tracer.span("network_probe", "probe", endpoints=len(self.endpoints)):
+            status = NetworkStatus(self._check(self.endpoints), self.clock())
+        with self._lock:
+            self._status = status
+        return status
+
+    def _check(self, endpoints: List[Tuple[str, int]]) -> Dict[str, Dict[str, Any]]:
+        deadline = time.monotonic() + self.timeout
+        results: Dict[str, Dict[str, Any]] = {f"{h}:{p}": {"dns": False, "tcp": False, "latency": None} for h, p in endpoints}
+        if not endpoints:
+            return results
+
+        # 1. DNS: getaddrinfo has no timeout of its own, so lookups run in
+        # parallel daemon threads and late answers count as failures
+        answers: Dict[str, Any] = {}
+
+        def lookup(name: str, host: str, port: int):
+            try:
+                answers[name] = self.resolve(host, port, 0, socket.SOCK_STREAM)
+            except (OSError, UnicodeError):
+                answers[name] = None
+
+        threads = [threading.Thread(target=lookup, args=(f"{h}:{p}", h, p), daemon=True) for h, p in endpoints]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        addresses: Dict[str, Tuple] = {}
+        for name, infos in list(answers.items()):
+            if infos:
+                results[name]["dns"] = True
+                addresses[name] = infos[0]
+
+        # 2. TCP: one non-blocking connect per endpoint, multiplexed
+        selector = selectors.DefaultSelector()
+        started = time.monotonic()
+        try:
+            for name, (family, socktype, proto, _, sockaddr) in addresses.items():
+                sock = socket.socket(family, socktype, proto)
+                sock.setblocking(False)
+                code = sock.connect_ex(sockaddr)
+                if code == 0:
+                    results[name]["tcp"] = True
+                    results[name]["latency"] = 0.0
+                    sock.close()
+                elif code in (errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EAGAIN):
+                    selector.register(sock, selectors.EVENT_WRITE, name)
+                else:
+                    sock.close()
+
+            while selector.get_map():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                for key, _ in selector.select(timeout=remaining):
+                    sock = key.fileobj
+                    if sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR) == 0:
+                        results[key.data]["tcp"] = True
+                        results[key.data]["latency"] = round(time.monotonic() - started, 4)
+                    selector.unregister(sock)
+                    sock.close()
+        finally:
+            for key in list(selector.get_map().values()):
+                key.fileobj.close()
+            selector.close()
+        return results
+
+# Process-wide probe; disabled until the CLI configures endpoints
+network = NetworkProbe()
@@ -0,0 +1,104 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outcomes (
+    category  TEXT NOT NULL,
+    strategy  TEXT NOT NULL,
+    successes INTEGER NOT NULL DEFAULT 0,
+    attempts  INTEGER NOT NULL DEFAULT 0,
+    updated   REAL NOT NULL,
+    PRIMARY KEY (category, strategy)
+) WITHOUT ROWID
+"""
+
+class OutcomeStore:
+    """
+    Local history of which resolution strategy actually shifted state for
+    each error category. Counts live in SQLite and are mirrored in memory,
+    so ranking a decision is a dict lookup; each outcome is one upsert.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = None
+        self._db: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        # (category, strategy) -> [successes, attempts]; category totals under strategy None
+        self._cache: Dict[Tuple[str, Optional[str]], list] = {}
+        if path:
+            self.open(path)
+
+    def open(self, path: str):
+        """
+        Attaches the SQLite file and loads its counts. Without it the store
+        only learns for the lifetime of the process.
+        """
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            db = sqlite3.connect(path, timeout=5, check_same_thread=False)
+            db.execute(SCHEMA)
+            rows = db.execute("SELECT category, strategy, successes, attempts FROM outcomes").fetchall()
+        except sqlite3.Error:
+            # History is an optimization; fall back to in-memory learning
+            return
+        with self._lock:
+            self.path = path
+            self._db = db
+            self._cache = {}
+            for category, strategy, successes, attempts in rows:
+                self._bump(category, strategy, successes, attempts)
+
+    def close(self):
+        with self._lock:
+            if self._db:
+                self._db.close()
+            self._db = None
+
+    def _bump(self, category: str, strategy: str, successes: int, attempts: int):
+        for key in ((category, strategy), (category, None)):
+            counts = self._cache.setdefault(key, [0, 0])
+            counts[0] += successes
+            counts[1] += attempts
+
+    def record(self, category: str, strategy: str, shifted: bool):
+        """
+        Counts one attempt of `strategy` for `category`; shifted means the
+        retried command no longer failed with the same category.
+        """
+        success = 1 if shifted else 0
+        with self._lock:
+            self._bump(category, strategy, success, 1)
+            if not self._db:
+                return
+            try:
+                self._db.execute(
+                    "INSERT INTO outcomes (category, strategy, successes, attempts, updated) VALUES (?, ?, ?, 1, ?) "
+                    "ON CONFLICT (category, strategy) DO UPDATE SET "
+                    "successes = successes + excluded.successes, attempts = attempts + 1, updated = excluded.updated",
+                    (category, strategy, success, time.time())
+                )
+                self._db.commit()
+            except sqlite3.Error:
+                pass
+
+    def counts(self, category: str, strategy: Optional[str] = None) -> Tuple[int, int]:
+        successes, attempts = self._cache.get((category, strategy), (0, 0))
+        return successes, attempts
+
+    def success_rate(self, category: str, strategy: Optional[str] = None) -> float:
+        """
+        Laplace-smoothed rate: 0.5 with no history, moving toward the
+        observed rate as attempts accumulate.
+        """
+        successes, attempts = self._cache.get((category, strategy), (0, 0))
+        return (successes + 1) / (attempts + 2)
+
+    def rule_score(self, category: str) -> float:
+        # A rule is as good as the resolutions its category led to
+        return self.success_rate(category)
+
+# Process-wide store; the CLI attaches the on-disk database
+outcomes = OutcomeStore()
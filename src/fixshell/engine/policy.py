@@ -0,0 +1,122 @@
+import json
+import time
+import click
+from typing import Dict, Any, List, Optional
+from .audit import audit
+from ..ui.context_panel import prompt_guard
+from ..ui.renderer import Renderer
+
+RISK_LEVELS = {"low": 0, "medium": 1, "high": 2}
+ACTIONS = ("allow", "deny", "ask")
+
+class PolicyError(ValueError):
+    pass
+
+class PolicyRule:
+    """
+    What to do with one error category: allow it to run unattended (answering
+    menus with auto_choice), deny it, or ask a human. max_risk caps which
+    risk levels 'allow' covers; anything riskier falls back to asking.
+    """
+
+    def __init__(self, action: str = "ask", auto_choice: Any = None, max_risk: Optional[str] = None):
+        if action not in ACTIONS:
+            raise PolicyError(f"Invalid policy action '{action}' (expected one of {', '.join(ACTIONS)}).")
+        if max_risk is not None and max_risk not in RISK_LEVELS:
+            raise PolicyError(f"Invalid max_risk '{max_risk}' (expected low, medium or high).")
+        self.action = action
+        self.auto_choice = auto_choice
+        self.max_risk = max_risk
+
+    @staticmethod
+    def from_dict(data: Dict[str, Any]) -> "PolicyRule":
+        return PolicyRule(data.get("action", "ask"), data.get("auto_choice"), data.get("max_risk"))
+
+class Policy:
+    """
+    Decides resolver prompts and command authorizations ahead of time so
+    recovery loops can run unattended. Every automatic decision is recorded.
+    """
+
+    def __init__(self, categories: Optional[Dict[str, PolicyRule]] = None, default: Optional[PolicyRule] = None, non_interactive: bool = False):
+        self.categories = categories or {}
+        self.default = default or PolicyRule()
+        self.non_interactive = non_interactive
+        self.decisions: List[Dict[str, Any]] = []
+
+    @staticmethod
+    def load(path: str) -> "Policy":
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            raise PolicyError(f"Could not read policy file '{path}': {e}")
+
+        categories = {name: PolicyRule.from_dict(rule) for name, rule in data.get("categories", {}).items()}
+        return Policy(
+            categories=categories,
+            default=PolicyRule.from_dict(data.get("default", {})),
+            non_interactive=data.get("non_interactive", False)
+        )
+
+    def rule_for(self, category: Optional[str]) -> PolicyRule:
+        return self.categories.get(category, self.default) if category else self.default
+
+    def decide(self, category: Optional[str], risk: Optional[str] = "low") -> str:
+        """
+        Returns 'allow', 'deny' or 'ask'. Without a terminal to ask, 'ask'
+        becomes 'deny'.
+        """
+        rule = self.rule_for(category)
+        action = rule.action
+        if action == "allow" and rule.max_risk and RISK_LEVELS.get(risk or "low", 0) > RISK_LEVELS[rule.max_risk]:
+            action = "ask"
+        if action == "ask" and self.non_interactive:
+            action = "deny"
+        return action
+
+    def record(self, category: Optional[str], question: str, answer: Any):
+        self.decisions.append({
+            "time": time.time(),
+            "category": category or "default",
+            "question": question.strip(),
+            "answer": answer
+        })
+        audit.record("authorization", decided_by="policy", question=question.strip(), answer=answer, category=category or "default")
+        Renderer.print_info(f"Policy ({category or 'default'}): '{question.strip()}' → {answer}")
+
+class Prompter:
+    """
+    Passed to resolvers in place of direct click prompts. When the policy
+    allows the category, questions are answered automatically.
+    """
+
+    def __init__(self, policy: Optional[Policy] = None, category: Optional[str] = None, auto: bool = False):
+        self.policy = policy or Policy()
+        self.category = category
+        self.auto = auto
+
+    def prompt(self, text: str, default: Any = None, **kwargs) -> Any:
+        if self.auto:
+            rule = self.policy.rule_for(self.category)
+            answer = rule.auto_choice if rule.auto_choice is not None else default
+            self.policy.record(self.category, text, answer)
+            return answer
+        with prompt_guard():
+            return click.prompt(text, default=default, **kwargs)
+
+    def confirm(self, text: str, default: bool = True, risk: str = "low") -> bool:
+        """
+        Auto mode answers as the policy decides for the action's risk. A
+        question that defaults to no (deleting data) is never confirmed
+        unattended: it goes to a human, or is declined without one.
+        """
+        if self.auto:
+            decision = self.policy.decide(self.category, risk)
+            if decision == "allow" and not default:
+                decision = "deny" if self.policy.non_interactive else "ask"
+            if decision != "ask":
+                self.policy.record(self.category, text, decision == "allow")
+                return decision == "allow"
+        with prompt_guard():
+            return click.confirm(text, default=default)
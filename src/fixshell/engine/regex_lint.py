@@ -0,0 +1,300 @@
+import multiprocessing
+import os
+import re
+import string
+import time
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+from .rule_model import DATASET_FILES, FLAGS, DatasetError, Rule, dataset_entries, read_dataset
+
+try:
+    from re import _parser as sre_parse  # Python 3.11+
+except ImportError:  # Python 3.10
+    import sre_parse
+
+ERROR = "error"
+WARNING = "warning"
+INFO = "info"
+
+# Marker for "any character" in first-character sets
+_ANY = "<any>"
+ANY = frozenset({_ANY})
+_CATEGORIES = {
+    "CATEGORY_DIGIT": frozenset(string.digits),
+    "CATEGORY_SPACE": frozenset(" \t\n\r\f\v"),
+    "CATEGORY_WORD": frozenset(string.ascii_lowercase + string.digits + "_"),
+}
+
+def _overlap(a: frozenset, b: frozenset) -> bool:
+    if not a or not b:
+        return False
+    return _ANY in a or _ANY in b or bool(a & b)
+
+def _charset(items) -> frozenset:
+    chars = set()
+    for op, av in items:
+        op = str(op)
+        if op == "NEGATE":
+            return ANY
+        if op == "LITERAL":
+            chars.add(chr(av).lower())
+        elif op == "RANGE":
+            lo, hi = av
+            if hi - lo > 256:
+                return ANY
+            chars.update(chr(c).lower() for c in range(lo, hi + 1))
+        elif op == "CATEGORY" and str(av) in _CATEGORIES:
+            chars.update(_CATEGORIES[str(av)])
+        else:
+            return ANY
+    return frozenset(chars)
+
+def _first_item(op: str, av) -> Tuple[frozenset, bool]:
+    """
+    (characters the item can start with, whether it can match empty).
+    """
+    if op == "LITERAL":
+        return frozenset({chr(av).lower()}), False
+    if op in ("NOT_LITERAL", "ANY"):
+        return ANY, False
+    if op == "IN":
+        return _charset(av), False
+    if op in ("AT", "ASSERT", "ASSERT_NOT"):
+        return frozenset(), True
+    if op == "SUBPATTERN":
+        return _first(av[-1]), _nullable(av[-1])
+    if op == "ATOMIC_GROUP":
+        return _first(av), _nullable(av)
+    if op == "BRANCH":
+        alts = av[1]
+        return frozenset().union(*(_first(a) for a in alts)), any(_nullable(a) for a in alts)
+    if op in ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT"):
+        return _first(av[2]), av[0] == 0 or _nullable(av[2])
+    return ANY, True
+
+def _first(seq, follow: frozenset = frozenset()) -> frozenset:
+    chars = frozenset()
+    for op, av in seq:
+        first, nullable = _first_item(str(op), av)
+        chars |= first
+        if not nullable:
+            return chars
+    return chars | follow
+
+def _nullable(seq) -> bool:
+    return all(_first_item(str(op), av)[1] for op, av in seq)
+
+def _is_unbounded(op: str, av) -> bool:
+    return op in ("MAX_REPEAT", "MIN_REPEAT") and av[1] == sre_parse.MAXREPEAT
+
+def _is_dot_star(op: str, av) -> bool:
+    """
+    `.*`, `.+` or their lazy forms.
+    """
+    return _is_unbounded(op, av) and len(av[2]) == 1 and str(av[2][0][0]) == "ANY"
+
+class _Walker:
+    """
+    Walks a parsed pattern collecting static findings.
+    """
+
+    def __init__(self):
+        self.findings: List[Tuple[str, str]] = []
+        self.runs: List[str] = []
+
+    def add(self, severity: str, message: str):
+        if (severity, message) not in self.findings:
+            self.findings.append((severity, message))
+
+    def walk(self, seq, follow: frozenset, in_repeat: bool, in_assert: bool = False) -> int:
+        """
+        Returns the most `.*` wildcards one path through `seq` contains.
+        """
+        run = ""
+        wildcards = 0
+        for i, (op, av) in enumerate(seq):
+            op = str(op)
+            rest = _first(seq[i + 1:], follow)
+            if op == "LITERAL":
+                run += chr(av)
+                continue
+            if run:
+                self.runs.append(run)
+                run = ""
+
+            if op in ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT"):
+                body = av[2]
+                body_first = _first(body)
+                unbounded = _is_unbounded(op, av)
+                if unbounded and in_repeat and _overlap(body_first, rest):
+                    self.add(ERROR, "nested quantifier: an unbounded repeat inside another can split input in exponentially many ways")
+                if _is_dot_star(op, av) and not in_assert:
+                    wildcards += 1
+                wildcards += self.walk(body, body_first | rest if unbounded else rest, in_repeat or unbounded, in_assert)
+            elif op == "BRANCH":
+                alts = av[1]
+                if in_repeat:
+                    firsts = [_first(a, rest) for a in alts]
+                    if any(_overlap(firsts[a], firsts[b]) for a in range(len(firsts)) for b in range(a + 1, len(firsts))):
+                        self.add(ERROR, "ambiguous alternation inside a repeat: alternatives can match the same text")
+                wildcards += max(self.walk(alt, rest, in_repeat, in_assert) for alt in alts)
+            elif op == "SUBPATTERN":
+                body = av[-1]
+                if len(body) == 1 and _is_dot_star(str(body[0][0]), body[0][1]) and not in_repeat and rest:
+                    self.add(INFO, "greedy wildcard capture; a negated class (e.g. [^']*) or \\S+ backtracks less")
+                wildcards += self.walk(body, rest, in_repeat, in_assert)
+            elif op == "ATOMIC_GROUP":
+                wildcards += self.walk(av, rest, in_repeat, in_assert)
+            elif op in ("ASSERT", "ASSERT_NOT"):
+                self.walk(av[1], frozenset(), in_repeat, True)
+        if run:
+            self.runs.append(run)
+        return wildcards
+
+def analyze(pattern: str) -> Dict[str, Any]:
+    """
+    Static analysis of one pattern. Returns {"findings": [(severity,
+    message)], "literals": [literal runs used to build fuzz inputs]}.
+    """
+    try:
+        parsed = sre_parse.parse(pattern, FLAGS)
+    except re.error as e:
+        return {"findings": [(ERROR, f"invalid regex: {e}")], "literals": []}
+    walker = _Walker()
+    wildcards = walker.walk(list(parsed), frozenset(), False)
+    if wildcards > 1:
+        walker.add(WARNING, f"{wildcards} unbounded wildcards in sequence (polynomial backtracking on long lines)")
+    return {"findings": walker.findings, "literals": walker.runs}
+
+def attack_inputs(literals: Iterable[str], size: int) -> List[str]:
+    """
+    Inputs that pump one literal (or character) of the pattern and end in
+    a character that makes the match fail, so the engine has to backtrack.
+    """
+    literals = [lit for lit in dict.fromkeys(literals) if lit.strip()]
+    pumps = list(dict.fromkeys(literals[:4] + [c for lit in literals for c in lit if c.strip()][:6] + [" ", "a"]))
+    prefixes = ["", literals[0]] if literals else [""]
+    inputs = []
+    for pump in pumps:
+        body = pump * max(1, size // len(pump))
+        for prefix in prefixes:
+            inputs.append(prefix + body + "\x00")
+            inputs.append(prefix + body + "\n!")
+    return inputs
+
+def fuzz(pattern: str, literals: List[str], budget: float, sizes: Tuple[int, ...] = (8, 16, 24, 32, 1024, 16384)) -> Dict[str, Any]:
+    """
+    Times re.search on growing adversarial inputs, stopping at the first
+    size that exceeds the budget. Returns the worst time and its input size.
+    """
+    compiled = re.compile(pattern, FLAGS)
+    worst, worst_size = 0.0, 0
+    for size in sizes:
+        for text in attack_inputs(literals, size):
+            started = time.perf_counter()
+            compiled.search(text)
+            elapsed = time.perf_counter() - started
+            if elapsed > worst:
+                worst, worst_size = elapsed, len(text)
+        if worst > budget:
+            break
+    return {"worst_seconds": worst, "worst_size": worst_size}
+
+def _fuzz_job(args):
+    return fuzz(*args)
+
+def fuzz_all(jobs: List[Tuple[str, List[str]]], budget: float, timeout: float = 5.0) -> List[Optional[Dict[str, Any]]]:
+    """
+    Fuzzes patterns in worker processes. A pattern that runs past `timeout`
+    (catastrophic backtracking cannot be interrupted in-process) gets None
+    and its worker is killed.
+    """
+    results: List[Optional[Dict[str, Any]]] = [None] * len(jobs)
+    pending = list(range(len(jobs)))
+    while pending:
+        with multiprocessing.Pool(min(len(pending), os.cpu_count() or 1)) as pool:
+            asyncs = {i: pool.apply_async(_fuzz_job, ((jobs[i][0], jobs[i][1], budget),)) for i in pending}
+            remaining = []
+            for n, i in enumerate(pending):
+                try:
+                    results[i] = asyncs[i].get(timeout)
+                except multiprocessing.TimeoutError:
+                    # Killing the pool loses the other in-flight jobs; redo them
+                    remaining = [j for j in pending[n + 1:] if not asyncs[j].ready()]
+                    for j in pending[n + 1:]:
+                        if asyncs[j].ready():
+                            results[j] = asyncs[j].get()
+                    break
+            pool.terminate()
+        pending = remaining
+    return results
+
+def lint_rules(rules: List[Tuple[str, Dict[str, Any]]], budget: float = 0.05, run_fuzz: bool = True, timeout: float = 5.0, errors: Optional[List[Tuple[str, str]]] = None) -> List[Dict[str, Any]]:
+    """
+    Lints (source, rule) pairs. Returns one report per rule with its
+    findings, worst fuzzed time and overall severity, plus one error
+    report per unreadable file in `errors` ((source, message) pairs).
+    """
+    reports = []
+    for source, rule in rules:
+        pattern = rule.get("error_pattern", "") if isinstance(rule, dict) else ""
+        static = analyze(pattern)
+        findings = list(static["findings"])
+        try:
+            Rule.from_dict(rule)
+        except DatasetError as e:
+            if not str(e).startswith("invalid error_pattern"):
+                findings.insert(0, (ERROR, f"schema: {e}"))
+        reports.append({
+            "source": source,
+            "category": rule.get("category", "?") if isinstance(rule, dict) else "?",
+            "pattern": pattern,
+            "findings": findings,
+            "literals": static["literals"],
+            "worst_seconds": None,
+        })
+
+    if run_fuzz:
+        fuzzable = [r for r in reports if not any(m.startswith("invalid regex") for _, m in r["findings"])]
+        results = fuzz_all([(r["pattern"], r["literals"]) for r in fuzzable], budget, timeout=timeout)
+        for report, result in zip(fuzzable, results):
+            if result is None:
+                report["findings"].append((ERROR, f"fuzzing timed out after {timeout:.0f}s (catastrophic backtracking)"))
+                continue
+            report["worst_seconds"] = result["worst_seconds"]
+            if result["worst_seconds"] > budget:
+                report["findings"].append((ERROR, f"worst case {result['worst_seconds'] * 1000:.0f} ms on a {result['worst_size']}-char input exceeds the {budget * 1000:.0f} ms budget"))
+
+    for source, message in errors or []:
+        reports.append({"source": source, "category": "-", "pattern": "", "findings": [(ERROR, message)], "literals": [], "worst_seconds": None})
+
+    order = {ERROR: 0, WARNING: 1, INFO: 2}
+    for report in reports:
+        report.pop("literals")
+        severities = [s for s, _ in report["findings"]]
+        report["severity"] = min(severities, key=order.get) if severities else "ok"
+    return reports
+
+def load_dataset_rules(dataset_dir: Optional[str] = None, layers: Optional[Iterable[Any]] = None) -> Tuple[List[Tuple[str, Dict[str, Any]]], List[Tuple[str, str]]]:
+    """
+    Raw (source, rule) pairs of the datasets in dataset_dir, or of every
+    file of `layers` (RuleLayer), unvalidated so that schema problems are
+    reported per rule instead of aborting the lint. Files that are not
+    usable datasets come back as (source, error) pairs.
+    """
+    if layers is None:
+        files = [(filename, os.path.join(dataset_dir, filename), mode) for mode, filename in DATASET_FILES.items()]
+    else:
+        files = [(f"{layer.name}:{os.path.basename(path)}", path, mode) for layer in layers for path, mode in layer.paths().items()]
+    rules, errors = [], []
+    for source, path, mode in files:
+        if not os.path.exists(path):
+            continue
+        try:
+            mode, entries = dataset_entries(read_dataset(path), mode, path)
+            if mode not in DATASET_FILES:
+                raise DatasetError(f"{path}: unknown mode {mode!r}; set \"mode\" or name the file <mode>_errors.json.")
+        except (OSError, DatasetError) as e:
+            errors.append((source, str(e)))
+            continue
+        rules.extend((source, rule) for rule in entries)
+    return rules, errors
@@ -1,30 +1,51 @@
 
 import os
 import shutil
-import subprocess
 import click
 from typing import Callable, Dict, Any, Optional
+from .command_runner import CommandRunner
+from .executor import Executor
+from .policy import RISK_LEVELS, Prompter
+from ..ui.renderer import Renderer
 
 class ResolverRegistry:
     def __init__(self):
         self._resolvers: Dict[str, Callable] = {}
+        # Risk of what each resolver does, checked against policy max_risk
+        self._risks: Dict[str, str] = {}
 
-    def register(self, category: str, func: Callable):
+    def register(self, category: str, func: Callable, risk: str = "medium"):
+        if risk not in RISK_LEVELS:
+            raise ValueError(f"Invalid resolver risk '{risk}' (expected low, medium or high).")
         self._resolvers[category] = func
+        self._risks[category] = risk
 
     def get_resolver(self, category: str) -> Optional[Callable]:
         return self._resolvers.get(category)
 
+    def risk_for(self, category: str) -> str:
+        return self._risks.get(category, "medium")
+
+def _prompter(kwargs) -> Prompter:
+    # Resolvers invoked outside the RetryEngine fall back to plain prompting
+    return kwargs.get("prompter") or Prompter()
+
+def _runner(kwargs, dry_run: bool) -> CommandRunner:
+    # Same fallback for the command runner the RetryEngine passes in
+    return kwargs.get("runner") or CommandRunner(Executor(dry_run=dry_run, cwd=kwargs.get("cwd"), policy=_prompter(kwargs).policy))
+
 # --- Resolvers ---
 
 def handle_directory_exists(matches, dry_run: bool = False, **kwargs) -> bool:
+    prompter = _prompter(kwargs)
     path = matches[0] if matches else "unknown"
-    click.secho(f"\n⚠ Path conflict: '{path}' already exists.", fg="yellow")
-    click.echo("1. Use existing contents\n2. Wipe and clean\n3. Rename automatically\n4. Cancel")
-    choice = click.prompt("Resolution", type=int, default=3)
+    if kwargs.get("cwd"): path = os.path.join(kwargs["cwd"], path)
+    Renderer.print_warning(f"Path conflict: '{path}' already exists.")
+    Renderer.print_menu("", ["1. Use existing contents", "2. Wipe and clean", "3. Rename automatically", "4. Cancel"])
+    choice = prompter.prompt("Resolution", type=int, default=3)
     if choice == 1: return True
     if choice == 2:
-        if click.confirm(f"Permanently delete {path}?", default=False):
+        if prompter.confirm(f"Permanently delete {path}?", default=False, risk="high"):
             if not dry_run: 
                 shutil.rmtree(path)
                 os.makedirs(path)
@@ -33,120 +54,101 @@ def handle_directory_exists(matches, dry_run: bool = False, **kwargs) -> bool:
         i = 1
         while os.path.exists(f"{path}-{i}"): i += 1
         new_path = f"{path}-{i}"
-        click.secho(f"✔ Auto-renamed to {new_path}", fg="green")
+        Renderer.print_success(f"Auto-renamed to {new_path}")
         if not dry_run: os.makedirs(new_path)
         return True
     return False
 
 def handle_git_no_upstream(matches, dry_run: bool = False, **kwargs) -> bool:
+    runner = _runner(kwargs, dry_run)
     branch = matches[0] if matches else "main"
-    cmd = ["git", "push", "--set-upstream", "origin", branch]
-    click.secho(f"🔧 Applying Fix: Setting upstream for {branch}", fg="cyan")
-    if not dry_run:
-        res = subprocess.run(cmd, capture_output=True, text=True)
-        return res.returncode == 0
-    return True
+    Renderer.print_info(f"Applying Fix: Setting upstream for {branch}")
+    return runner.run(["git", "push", "--set-upstream", "origin", branch], f"Setting upstream for {branch}").returncode == 0
 
 def handle_git_no_tracking(matches, dry_run: bool = False, **kwargs) -> bool:
-    click.secho("\n⚠ No tracking info for pull.", fg="yellow")
-    click.echo("1. Pull from origin/main and SET as upstream")
-    click.echo("2. Pull from origin/main once")
-    click.echo("3. Cancel")
-    choice = click.prompt("Resolution", type=int, default=1)
+    prompter = _prompter(kwargs)
+    runner = _runner(kwargs, dry_run)
+    Renderer.print_warning("No tracking info for pull.")
+    Renderer.print_menu("", ["1. Pull from origin/main and SET as upstream", "2. Pull from origin/main once", "3. Cancel"])
+    choice = prompter.prompt("Resolution", type=int, default=1)
     if choice == 1:
-        if not dry_run:
-            subprocess.run(["git", "branch", "--set-upstream-to=origin/main"])
-            return subprocess.run(["git", "pull"]).returncode == 0
+        runner.run(["git", "branch", "--set-upstream-to=origin/main"], "Tracking origin/main")
+        return runner.run(["git", "pull"], "Pulling from origin/main", capture=False).returncode == 0
     elif choice == 2:
-        if not dry_run:
-            return subprocess.run(["git", "pull", "origin", "main"]).returncode == 0
+        return runner.run(["git", "pull", "origin", "main"], "Pulling from origin/main once", capture=False).returncode == 0
     return False
 
 def handle_git_upstream_mismatch(matches, dry_run: bool = False, **kwargs) -> bool:
+    prompter = _prompter(kwargs)
+    runner = _runner(kwargs, dry_run)
     # Git usually suggests the right command in the error output
     # If the user is seeing this, we should offer to push to HEAD:main or HEAD:danger etc.
-    click.secho("\n⚠ Upstream branch name mismatch.", fg="yellow")
-    click.echo("1. Push to origin/main (Default behavior)")
-    click.echo("2. Push to same name on remote (Create remote branch)")
-    click.echo("3. Cancel")
-    choice = click.prompt("Choice", type=int, default=1)
+    Renderer.print_warning("Upstream branch name mismatch.")
+    Renderer.print_menu("", ["1. Push to origin/main (Default behavior)", "2. Push to same name on remote (Create remote branch)", "3. Cancel"])
+    choice = prompter.prompt("Choice", type=int, default=1)
     if choice == 1:
-        if not dry_run:
-            # Note: We use -u to make it permanent so the retry works
-            return subprocess.run(["git", "push", "-u", "origin", "HEAD:main"]).returncode == 0
-        return True
+        # Note: We use -u to make it permanent so the retry works
+        return runner.run(["git", "push", "-u", "origin", "HEAD:main"], "Pushing to origin/main", capture=False).returncode == 0
     elif choice == 2:
-        if not dry_run:
-            res = subprocess.run(["git", "branch", "--show-current"], capture_output=True, text=True)
-            branch = res.stdout.strip()
-            return subprocess.run(["git", "push", "-u", "origin", branch]).returncode == 0
-        return True
+        branch = runner.query(["git", "branch", "--show-current"]).stdout.strip()
+        return runner.run(["git", "push", "-u", "origin", branch], f"Pushing to origin/{branch}", capture=False).returncode == 0
     return False
 
 def handle_git_delete_current_branch(matches, dry_run: bool = False, **kwargs) -> bool:
+    prompter = _prompter(kwargs)
+    runner = _runner(kwargs, dry_run)
     branch = matches[0] if matches else "unknown"
-    click.secho(f"\n⚠ Cannot delete active branch '{branch}'.", fg="yellow")
-    
-    # Try to find a safe branch to switch to
-    target = "main"
-    res = subprocess.run(["git", "branch", "--list", "main"], capture_output=True, text=True)
-    if "main" not in res.stdout:
-        res = subprocess.run(["git", "branch", "--list", "master"], capture_output=True, text=True)
-        if "master" in res.stdout: target = "master"
-        else:
-            # Last resort: just find any branch that isn't the current one
-            res = subprocess.run(["git", "branch", "--format=%(refname:short)"], capture_output=True, text=True)
-            branches = [b.strip() for b in res.stdout.split('\n') if b.strip() and b.strip() != branch]
-            if branches: target = branches[0]
-            else: 
-                click.secho("❌ No other branches to switch to!", fg="red")
-                return False
-
-    click.echo(f"1. Switch to '{target}' and then delete (Safe)")
-    click.echo("2. Cancel")
-    if click.prompt("Choice", type=int, default=1) == 1:
-        if not dry_run:
-            if subprocess.run(["git", "checkout", target]).returncode == 0:
-                return subprocess.run(["git", "branch", "-D", branch]).returncode == 0
-        return True
+    Renderer.print_warning(f"Cannot delete active branch '{branch}'.")
+
+    # Find a safe branch to switch to: main, master, or any other branch
+    res = runner.query(["git", "branch", "--format=%(refname:short)"])
+    branches = [b.strip() for b in res.stdout.splitlines() if b.strip() and b.strip() != branch]
+    target = next((b for b in ("main", "master") if b in branches), branches[0] if branches else None)
+    if target is None:
+        Renderer.print_error("No other branches to switch to!")
+        return False
+
+    Renderer.print_menu("", [f"1. Switch to '{target}' and then delete (Safe)", "2. Cancel"])
+    if prompter.prompt("Choice", type=int, default=1) == 1:
+        if runner.run(["git", "checkout", target], f"Switching to {target}").returncode == 0:
+            return runner.run(["git", "branch", "-D", branch], f"Deleting {branch}").returncode == 0
     return False
 
 def handle_gh_auth_login(matches, dry_run: bool = False, **kwargs) -> bool:
-    click.secho("\n💊 Needs Authentication: GitHub CLI is not logged in.", fg="yellow", bold=True)
-    if click.confirm("   Would you like to authenticate now?", default=True):
-        if not dry_run: subprocess.run(["gh", "auth", "login"])
+    prompter = _prompter(kwargs)
+    Renderer.print_warning("Needs Authentication: GitHub CLI is not logged in.")
+    if prompter.confirm("   Would you like to authenticate now?", default=True):
+        _runner(kwargs, dry_run).run(["gh", "auth", "login"], "Authenticating the GitHub CLI", capture=False)
         return True
     return False
 
 # --- Docker Resolvers ---
 
 def handle_docker_name_conflict(matches, dry_run: bool = False, **kwargs) -> bool:
+    prompter = _prompter(kwargs)
     name = matches[0] if matches else "unknown"
-    click.secho(f"\n⚠ Docker container name conflict: '{name}' already exists.", fg="yellow")
-    click.echo("1. Stop and remove existing container\n2. Rename new container automatically\n3. Cancel")
-    choice = click.prompt("Resolution", type=int, default=1)
+    Renderer.print_warning(f"Docker container name conflict: '{name}' already exists.")
+    Renderer.print_menu("", ["1. Stop and remove existing container", "2. Rename new container automatically", "3. Cancel"])
+    choice = prompter.prompt("Resolution", type=int, default=1)
     if choice == 1:
-        if not dry_run:
-            subprocess.run(["docker", "rm", "-f", name])
-        return True
+        return _runner(kwargs, dry_run).run(["docker", "rm", "-f", name], f"Removing container {name}").returncode == 0
     if choice == 2:
         return True # The SM handles retry, but if we rename we might need to modify the command. 
                     # For now, let's just support removal.
     return False
 
 def handle_docker_daemon_service(matches, dry_run: bool = False, **kwargs) -> bool:
-    click.secho("\n💊 Docker daemon is not running.", fg="yellow", bold=True)
-    if click.confirm("   Would you like to start the Docker service now?", default=True):
-        if not dry_run:
-            subprocess.run(["sudo", "systemctl", "start", "docker"])
-        return True
+    prompter = _prompter(kwargs)
+    Renderer.print_warning("Docker daemon is not running.")
+    if prompter.confirm("   Would you like to start the Docker service now?", default=True, risk="medium"):
+        return _runner(kwargs, dry_run).run(["sudo", "systemctl", "start", "docker"], "Starting the Docker service", capture=False).returncode == 0
     return False
 
-def handle_docker_not_installed(matches, dry_run: bool = False, state: Dict[str, Any] = None) -> bool:
+def handle_docker_not_installed(matches, dry_run: bool = False, state: Dict[str, Any] = None, **kwargs) -> bool:
+    prompter = _prompter(kwargs)
     from ..modes.docker.install import get_ubuntu_installer, get_windows_guide, SUPPORT_EMAIL
-    from .executor import Executor
-    
-    executor = Executor(dry_run=dry_run)
+
+    executor = _runner(kwargs, dry_run).executor
     os_name = state.get("OS_STATE", "Linux")
     distro_info = state.get("DISTRO_STATE", {})
     arch = state.get("ARCH_STATE", "amd64")
@@ -154,42 +156,40 @@ def handle_docker_not_installed(matches, dry_run: bool = False, state: Dict[str,
     pretty_name = distro_info.get("pretty_name", "Unknown Linux")
     codename = distro_info.get("codename", "unknown")
     
-    click.secho(f"\n🧩 FixShell Safe-Install Protocol: Docker Engine (v0.1.4)", fg="white", bold=True)
+    Renderer.print_step("FixShell Safe-Install Protocol: Docker Engine (v0.1.4)")
     
     if os_name == "Linux":
         distro_id = distro_info.get("id", "").lower()
         
         # Validation before any command
         from ..modes.docker.install import SUPPORTED_CODENAMES
-        is_supported = codename.lower() in SUPPORTED_CODENAMES
+        # Derived by the state store when available
+        is_supported = (state.get("INSTALL_STATE") or {}).get("supported", codename.lower() in SUPPORTED_CODENAMES)
         status_icon = "✅" if is_supported else "❌"
         
-        click.echo(f"   Detected: {pretty_name} ({codename}) | Arch: {arch} | Supported: {status_icon}")
+        Renderer.print_info(f"Detected: {pretty_name} ({codename}) | Arch: {arch} | Supported: {status_icon}")
 
         if distro_id in ["ubuntu", "debian"]:
             if not is_supported:
-                click.secho(f"\n🚨 ERROR_UNSUPPORTED_DISTRO: '{codename}' is not officially supported by Docker (Feb 2026).", fg="red", bold=True)
-                click.echo(f"   Supported: questing (25.10), noble (24.04 LTS), jammy (22.04 LTS)")
-                click.echo("\n   Options:")
-                click.echo("   [F] Fallback to 'noble' repo (Stable LTS)")
-                click.echo("   [M] Manual guide (Docs)")
-                click.echo("   [A] Abort install")
+                Renderer.print_error(f"ERROR_UNSUPPORTED_DISTRO: '{codename}' is not officially supported by Docker (Feb 2026).")
+                Renderer.print_info("Supported: questing (25.10), noble (24.04 LTS), jammy (22.04 LTS)")
+                Renderer.print_menu("Options:", ["[F] Fallback to 'noble' repo (Stable LTS)", "[M] Manual guide (Docs)", "[A] Abort install"])
                 
-                choice = click.prompt("\n   Choice", type=click.Choice(['F', 'M', 'A'], case_sensitive=False), default='A')
+                choice = prompter.prompt("\n   Choice", type=click.Choice(['F', 'M', 'A'], case_sensitive=False), default='A')
                 
                 if choice == 'A':
-                    click.secho("   ❌ Installation aborted.", fg="yellow")
+                    Renderer.print_warning("Installation aborted.")
                     return False
                 elif choice == 'M':
-                    click.echo("   📝 Please visit: https://docs.docker.com/engine/install/ubuntu/")
+                    Renderer.print_info("Please visit: https://docs.docker.com/engine/install/ubuntu/")
                     return False
                 else:
                     codename = "noble"
-                    click.secho("   🔧 Switched target repository to 'noble'.", fg="cyan")
+                    Renderer.print_info("Switched target repository to 'noble'.")
 
             steps, _ = get_ubuntu_installer(codename, arch)
             
-            click.secho("\n🛡️  Preparation Complete. Manual step-by-step approval required.", fg="cyan")
+            Renderer.print_info("Preparation Complete. Manual step-by-step approval required.")
             
             for step in steps:
                 res = executor.run(
@@ -197,30 +197,28 @@ def handle_docker_not_installed(matches, dry_run: bool = False, state: Dict[str,
                     desc=step["desc"], 
                     purpose=step["purpose"], 
                     risk=step["risk"],
+                    category=prompter.category,
                     capture=False # Stream output live
                 )
                 if res.returncode != 0 and res.returncode != 130:
-                    click.secho(f"\n❌ STEP FAILED: {step['desc']}", fg="red", bold=True)
-                    click.echo(f"   Need help? {SUPPORT_EMAIL}")
+                    Renderer.print_error(f"STEP FAILED: {step['desc']}")
+                    Renderer.print_info(f"Need help? {SUPPORT_EMAIL}")
                     return False
             
-            click.secho("\n✅ Docker installation sequence finalized.", fg="green", bold=True)
-            click.echo(f"   📧 For support: {SUPPORT_EMAIL}")
+            Renderer.print_success("Docker installation sequence finalized.")
+            Renderer.print_info(f"For support: {SUPPORT_EMAIL}")
             return True
 
         else:
-            click.secho(f"\n🚨 UNSUPPORTED_OS: Auto-install not available for {pretty_name}.", fg="red")
-            click.echo(f"   Please follow the official manual guide or contact: {SUPPORT_EMAIL}")
+            Renderer.print_error(f"UNSUPPORTED_OS: Auto-install not available for {pretty_name}.")
+            Renderer.print_info(f"Please follow the official manual guide or contact: {SUPPORT_EMAIL}")
             return False
 
     elif os_name == "Windows":
         guide, _ = get_windows_guide(distro_info.get("build", "0"), arch)
-        click.secho(f"\n🖥️  Windows 2026 Support Status: {guide['status']}", fg="cyan", bold=True)
-        click.echo("-" * 50)
-        for s in guide["steps"]: click.echo(f"   {s}")
-        click.echo("-" * 50)
-        click.secho(f"   ⚠️  {guide['risk_notice']}", fg="yellow")
-        click.secho(f"   📧 For help: {SUPPORT_EMAIL}", fg="white", dim=True)
+        Renderer.print_menu(f"Windows 2026 Support Status: {guide['status']}", [f"   {s}" for s in guide["steps"]])
+        Renderer.print_warning(guide["risk_notice"])
+        Renderer.print_info(f"For help: {SUPPORT_EMAIL}")
         return True
 
     return False
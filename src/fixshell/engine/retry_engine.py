@@ -1,107 +1,314 @@
+import asyncio
+import time
+from .command_runner import CommandRunner
 from .executor import Executor
+from .fixtures import fixtures
+from .fix_template import TemplateError, compile_templates, slot_values
 from .classifier import ErrorCategory
+from .audit import audit
+from .backoff import BackoffScheduler, RetryPolicy
+from .decision_queue import DeferredDecision
+from .policy import RISK_LEVELS, Prompter
+from .metrics import metrics
+from .outcome_store import OutcomeStore, outcomes as default_outcomes
+from .rule_model import normalize_diagnosis
+from .state_store import affected_keys
+from .tracing import tracer
+from ..config import MAX_RETRIES
 from ..ui.renderer import Renderer
 from typing import Optional, Callable, Dict, Any
 
+class RecoveryRun:
+    """
+    Book-keeping for a single execute_with_recovery call.
+    """
+
+    def __init__(self, desc: str = None):
+        self.desc = desc
+        self.tried_categories = set()
+        self.backoff: Dict[str, BackoffScheduler] = {}
+        # Resolution-driven retries (bounded by MAX_RETRIES)
+        self.retries = 0
+        # Delay requested before the next transient retry
+        self.pending_delay = 0.0
+        self.waited = 0.0
+        # Last diagnosed category and whether it went to the decision queue
+        self.category = None
+        self.deferred = False
+        # (category, strategy) applied before the current attempt
+        self.pending_outcome = None
+        self.started = time.monotonic()
+
 class RetryEngine:
     """
     Universal recovery logic that implements the recursive 
     'Execute-Classify-Resolve' loop.
     """
 
-    def __init__(self, classifier, registry, executor: Executor, mode: Optional[str] = None):
+    def __init__(self, classifier, registry, executor: Executor, mode: Optional[str] = None, decision_queue=None, outcomes: Optional[OutcomeStore] = None):
         self.classifier = classifier
         self.registry = registry
         self.executor = executor
         self.mode = mode
+        # Unattended runs defer interactive resolutions instead of prompting
+        self.decision_queue = decision_queue
+        self.sleep: Callable[[float], None] = fixtures.sleep
+        # Shared by the resolvers of every recovery this engine runs
+        self.runner = CommandRunner(executor)
+        # Success history used to order resolution strategies
+        self.outcomes = outcomes or default_outcomes
 
     def execute_with_recovery(self, cmd_list: list, desc: str, context_manager=None, interactive: bool = False, state: Dict[str, Any] = None) -> bool:
-        max_retries = 3
-        retry_count = 0
-        tried_categories = set()
-
-        while retry_count <= max_retries:
-            result = self.executor.run(cmd_list, desc, interactive=interactive)
-
-            if result.returncode == 0:
-                Renderer.print_success()
-                if context_manager: context_manager.refresh()
-                return True
-
-            # Diagnosis Phase
-            output = result.stderr or result.stdout
-            # Use the provided classifier to understand what happened
-            # Note: We expect classifier to have a classify(output, mode) method
-            diagnosis = self.classifier.classify(output, mode=self.mode)
-            
-            err_type = diagnosis.get("type", "FATAL")
-            category = diagnosis.get("category", "UNKNOWN")
-
-            if err_type == "INFORMATIONAL":
-                Renderer.print_info("Informational message detected.")
-                return True
-
-            # State Shift Check
-            if category in tried_categories:
-                Renderer.print_error(f"Resolution for '{category}' failed to shift state.")
-                Renderer.print_fatal(category, diagnosis.get("suggested_fix", ["None"])[0], output)
-                return False
+        run = RecoveryRun(desc)
+
+        with tracer.span("recovery", "retry_engine", desc=desc, mode=self.mode) as span:
+            while run.retries <= MAX_RETRIES:
+                with metrics.timer("command_seconds", mode=self.mode or "any"):
+                    result = self.executor.run(cmd_list, desc, interactive=interactive)
+                self.runner.invalidate()
+                outcome = self._handle_result(result, run, context_manager, state)
+                if outcome is not None:
+                    return self._finish(run, outcome, span)
+                if run.pending_delay:
+                    with tracer.span("backoff", "retry_engine", seconds=run.pending_delay):
+                        self.sleep(run.pending_delay)
+                    run.waited += run.pending_delay
+                    run.pending_delay = 0.0
+
+            Renderer.print_error("Aborted: Max recovery attempts reached.")
+            return self._finish(run, False, span)
+
+    async def execute_with_recovery_async(self, runner, cmd_list: list, desc: str, context_manager=None, state: Dict[str, Any] = None, purpose: str = None, risk: str = "low") -> bool:
+        """
+        Same recovery loop driven by an AsyncExecutor. Diagnosis and resolution
+        may prompt, so they are serialized through the runner's prompt queue.
+        """
+        run = RecoveryRun(desc)
+
+        with tracer.span("recovery", "retry_engine", desc=desc, mode=self.mode) as span:
+            while run.retries <= MAX_RETRIES:
+                with metrics.timer("command_seconds", mode=self.mode or "any"):
+                    result = await runner.run(cmd_list, desc, purpose=purpose, risk=risk)
+                self.runner.invalidate()
+                outcome = await runner.prompts.call(self._handle_result, result, run, context_manager, state)
+                if outcome is not None:
+                    return self._finish(run, outcome, span)
+                if run.pending_delay:
+                    # Back off without holding the prompt queue or blocking other steps
+                    with tracer.span("backoff", "retry_engine", seconds=run.pending_delay):
+                        await asyncio.sleep(0 if fixtures.replaying else run.pending_delay)
+                    run.waited += run.pending_delay
+                    run.pending_delay = 0.0
+
+            Renderer.print_error(f"Aborted: Max recovery attempts reached for '{desc}'.")
+            return self._finish(run, False, span)
+
+    def _finish(self, run: RecoveryRun, outcome: bool, span=None) -> bool:
+        if run.waited:
+            Renderer.print_info(f"Waited {run.waited:.1f}s in backoff for transient failures.")
+        if span:
+            span.set(ok=outcome, retries=run.retries, waited=run.waited)
+
+        if run.deferred:
+            label = "deferred"
+        elif not outcome:
+            label = "failed"
+        else:
+            label = "recovered" if run.category else "ok"
+        mode = self.mode or "any"
+        metrics.inc("recoveries_total", category=run.category or "none", mode=mode, outcome=label)
+        duration = time.monotonic() - run.started
+        metrics.observe("recovery_seconds", duration, mode=mode, outcome=label)
+        audit.record("recovery", sync=True, desc=run.desc, mode=self.mode, category=run.category, outcome=label, retries=run.retries, waited=round(run.waited, 3), duration=round(duration, 3))
+        return outcome
+
+    @staticmethod
+    def _invalidate(state, context_manager, cmd_list, category: Optional[str] = None):
+        """
+        Marks the state keys the command or resolution may have changed for
+        re-probing. Without a StateStore the whole context is refreshed.
+        """
+        if hasattr(state, "invalidate"):
+            state.invalidate(*affected_keys(cmd_list, category))
+        elif context_manager:
+            context_manager.refresh()
+
+    def _handle_result(self, result, run: RecoveryRun, context_manager=None, state: Dict[str, Any] = None) -> Optional[bool]:
+        """
+        Diagnoses a command result. Returns True/False when the loop is done,
+        or None when the command should be retried (after run.pending_delay).
+        """
+        if result.returncode == 0:
+            self._settle_outcome(run, shifted=True)
+            Renderer.print_success()
+            self._invalidate(state, context_manager, getattr(result, "args", None))
+            return True
+
+        # Diagnosis Phase
+        output = result.stderr or result.stdout
+        # Use the provided classifier to understand what happened, scoped to
+        # the failed command's tool; fields it leaves out get the rule
+        # model's defaults
+        diagnosis = normalize_diagnosis(self.classifier.classify(output, mode=self.mode, argv=getattr(result, "args", None)))
+
+        err_type = diagnosis["type"]
+        category = diagnosis["category"]
+        run.category = category
+        metrics.inc("errors_total", category=category, mode=self.mode or "any", type=err_type)
+        audit.record("classification", cmd=result.args, exit_code=result.returncode, category=category, type=err_type, severity=diagnosis["severity"], mode=self.mode)
+        if run.pending_outcome:
+            self._settle_outcome(run, shifted=category != run.pending_outcome[0])
 
-            if err_type == "RECOVERABLE":
+        if err_type == "INFORMATIONAL":
+            Renderer.print_info("Informational message detected.")
+            return True
+
+        # Transient failures (network, registry, 5xx) are retried with backoff
+        # and never go through the resolver path
+        retry = diagnosis["retry"]
+        if retry and diagnosis.get("offline"):
+            if state is not None:
+                state["NETWORK_STATE"] = diagnosis["network_state"]
+            Renderer.print_error(f"Transient failure '{category}' while the network is down ({diagnosis['network_state']}). Not retrying.")
+            Renderer.print_fatal(category, self._suggestion(diagnosis), output)
+            return False
+        if retry:
+            scheduler = run.backoff.get(category)
+            if scheduler is None:
+                scheduler = run.backoff[category] = BackoffScheduler(RetryPolicy.from_dict(retry))
+            delay = scheduler.next_delay()
+            if delay is not None:
+                Renderer.print_info(f"Transient failure '{category}'. Retrying in {delay:.1f}s (attempt {scheduler.attempt}/{scheduler.policy.max_attempts})...")
+                run.pending_delay = delay
+                return None
+            Renderer.print_error(f"Transient failure '{category}' persisted after {scheduler.attempt} retries.")
+            Renderer.print_fatal(category, self._suggestion(diagnosis), output)
+            return False
+
+        # State Shift Check
+        if category in run.tried_categories:
+            Renderer.print_error(f"Resolution for '{category}' failed to shift state.")
+            Renderer.print_fatal(category, self._suggestion(diagnosis), output)
+            return False
+
+        resolver = self.registry.get_resolver(category)
+        fix_commands = diagnosis["fix_commands"]
+
+        if err_type == "RECOVERABLE" and (resolver or fix_commands):
+            # The policy decides before anything prompts, by the risk of what
+            # the resolution would do (not the severity of the error)
+            policy = self.executor.policy
+            templates = diagnosis["fix_templates"] or fix_commands
+            template_risk = self._template_risk(templates) if templates else None
+            risks = [r for r in (resolver and self.registry.risk_for(category), template_risk) if r]
+            decision = policy.decide(category, max(risks, key=RISK_LEVELS.get))
+
+            if decision == "deny":
+                policy.record(category, "Attempt automated resolution?", False)
+            elif decision == "ask" and self.decision_queue is not None:
+                self.decision_queue.defer(DeferredDecision(self.executor.cwd, result.args, category, diagnosis))
+                run.deferred = True
+                Renderer.print_info(f"Resolution for '{category}' deferred to the decision queue.")
+                return False
+            else:
                 Renderer.print_resolution(category)
-                
-                # 1. Try Registry Resolver (Dynamic Logic)
-                resolver = self.registry.get_resolver(category)
-                if resolver:
-                    tried_categories.add(category)
-                    matches = diagnosis.get("matches", [])
-                    if resolver(matches, dry_run=self.executor.dry_run, state=state):
-                        Renderer.print_info("Resolution applied. Retrying original command...")
-                        if context_manager: context_manager.refresh()
-                        retry_count += 1
-                        continue
+                prompter = Prompter(policy, category, auto=decision == "allow")
 
-                # 2. Try Template-Based Fixes (Deterministic Patterns)
-                fix_commands = diagnosis.get("fix_commands")
-                if fix_commands:
-                    if self._apply_template_fix(fix_commands, diagnosis.get("matches", [])):
-                        tried_categories.add(category)
-                        retry_count += 1
+                # Registry resolver (dynamic logic) and template fixes (deterministic
+                # patterns), ordered by how often each shifted state here before.
+                # The sort is stable, so without history the resolver goes first.
+                strategies = [s for s, available in (("resolver", resolver), ("template", fix_commands)) if available]
+                strategies.sort(key=lambda s: self.outcomes.success_rate(category, s), reverse=True)
+
+                for strategy in strategies:
+                    started = time.monotonic()
+                    if strategy == "resolver":
+                        ran = self.executor.commands_run
+                        with tracer.span("resolver", "resolver", category=category, resolver=resolver.__name__) as span, metrics.timer("resolver_seconds", category=category):
+                            applied = bool(resolver(diagnosis["matches"], dry_run=self.executor.dry_run, state=state, prompter=prompter, cwd=self.executor.cwd, runner=self.runner))
+                            span.set(resolved=applied)
+                        # Cancelled from its menu, or it gave up before changing anything
+                        if not applied and self.executor.commands_run == ran:
+                            applied = None
+                        self._record_resolution(category, strategy, resolver.__name__, applied, started)
+                    else:
+                        with tracer.span("template_fix", "resolver", category=category) as span, metrics.timer("resolver_seconds", category=category):
+                            applied = self._apply_template_fix(templates, diagnosis["matches"], category=category, risk=template_risk, fields=diagnosis["fields"])
+                            span.set(resolved=applied)
+                        self._record_resolution(category, strategy, None, applied, started)
+
+                    if not applied:
+                        # A fix that never ran says nothing about whether it works
+                        if applied is False:
+                            self._learn(category, strategy, False)
                         continue
 
-            # If we reach here, it's a fatal failure or unresolvable
-            Renderer.print_error("Critical failure detected.")
-            Renderer.print_fatal(category, diagnosis.get("suggested_fix", ["None"])[0], output)
-            return False
+                    if strategy == "resolver":
+                        Renderer.print_info("Resolution applied. Retrying original command...")
+                        self._invalidate(state, context_manager, None, category)
+                    run.tried_categories.add(category)
+                    # Whether it worked is known once the command is retried
+                    run.pending_outcome = (category, strategy)
+                    run.retries += 1
+                    return None
 
-        Renderer.print_error("Aborted: Max recovery attempts reached.")
+        # If we reach here, it's a fatal failure or unresolvable
+        Renderer.print_error("Critical failure detected.")
+        if diagnosis["fields"]:
+            Renderer.print_info("Details: " + ", ".join(f"{k}={v}" for k, v in diagnosis["fields"].items()))
+        Renderer.print_fatal(category, self._suggestion(diagnosis), output)
         return False
 
-    def _apply_template_fix(self, fix_templates: list, matches: list) -> bool:
+    @staticmethod
+    def _template_risk(templates: list) -> str:
+        try:
+            return max((t.risk for t in compile_templates(templates)), key=RISK_LEVELS.get)
+        except TemplateError:
+            # Rejected again when applied
+            return "medium"
+
+    @staticmethod
+    def _suggestion(diagnosis: Dict[str, Any]) -> str:
+        return (diagnosis["suggested_fix"] or ["None"])[0]
+
+    def _settle_outcome(self, run: RecoveryRun, shifted: bool):
+        if run.pending_outcome:
+            self._learn(*run.pending_outcome, shifted)
+            run.pending_outcome = None
+
+    def _learn(self, category: str, strategy: str, shifted: bool):
+        # Simulated fixes say nothing about this environment
+        if not self.executor.dry_run:
+            self.outcomes.record(category, strategy, shifted)
+
+    def _record_resolution(self, category: str, strategy: str, resolver: Optional[str], applied: Optional[bool], started: float):
+        outcome = "skipped" if applied is None else "applied" if applied else "failed"
+        metrics.inc("resolutions_total", category=category, strategy=strategy, outcome=outcome)
+        audit.record("resolution", sync=True, category=category, strategy=strategy, resolver=resolver, outcome=outcome, dry_run=self.executor.dry_run, cwd=self.executor.cwd, duration=round(time.monotonic() - started, 3))
+
+    def _apply_template_fix(self, fix_templates: list, matches: list, category: str = None, risk: str = "low", fields: Optional[Dict[str, Any]] = None) -> Optional[bool]:
         """
-        Resolves {MATCH_n} placeholders and executes the suggested fix.
+        Fills the {MATCH_n}/{FIELD} slots of the fix (compiled at dataset
+        load, or here for raw command lists) and executes it. A missing or
+        invalid value cancels the fix. Returns None when the fix is declined.
         """
         Renderer.print_info("Found Template-Based Fix")
-        resolved_cmds = []
-        for tmpl in fix_templates:
-            rc = []
-            for part in tmpl:
-                if isinstance(part, str):
-                    for i, m in enumerate(matches, 1):
-                        part = part.replace(f"{{MATCH_{i}}}", str(m))
-                    rc.append(part)
-                else:
-                    rc.append(part)
-            resolved_cmds.append(rc)
+        values = slot_values(matches, fields)
+        try:
+            resolved_cmds = [template.render(values) for template in compile_templates(fix_templates)]
+        except TemplateError as e:
+            metrics.inc("template_rejections_total", category=category or "none")
+            Renderer.print_error(f"Suggested fix not applied: {e}.")
+            return False
 
         for rc in resolved_cmds:
             Renderer.print_info(f"→ Suggestion: {' '.join(rc)}")
 
-        if self.executor.confirm("Apply this suggested fix?"):
+        if self.executor.confirm("Apply this suggested fix?", risk=risk, category=category):
             for rc in resolved_cmds:
-                res = self.executor.run(rc, f"Applying fix: {' '.join(rc)}", capture=True)
+                res = self.runner.run(rc, f"Applying fix: {' '.join(rc)}")
                 if res.returncode != 0:
                     Renderer.print_error(f"Fix failed: {res.stderr}")
                     return False
             return True
-        return False
+        return None
@@ -0,0 +1,213 @@
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from .metrics import metrics
+from .rule_model import DATASET_FILES, DatasetError, Rule, RuleSet, dataset_entries, parse_dataset, read_dataset
+from ..config import RULE_LAYERS_ENABLED, SYSTEM_RULES_DIR, USER_RULES_DIR, PROJECT_RULES_DIR, TRUSTED_PROJECTS_FILE, RULE_RELOAD_INTERVAL
+from ..ui.renderer import Renderer
+
+def mode_for_file(filename: str) -> Optional[str]:
+    """
+    Mode implied by an overlay file name (`git_errors.json`, `git.json`,
+    `git-corp.json`); documents can also name it with "mode".
+    """
+    stem = os.path.splitext(filename)[0]
+    for mode in DATASET_FILES:
+        if stem == mode or stem.startswith((f"{mode}_", f"{mode}-")):
+            return mode
+    return None
+
+def load_layer_file(path: str, mode: Optional[str] = None) -> Tuple[List[Rule], Set[str]]:
+    """
+    (rules, categories to disable) of one overlay file. Besides "rules", a
+    version 2 document may list categories of earlier layers to "disable".
+    """
+    data = read_dataset(path)
+    mode, _ = dataset_entries(data, mode, path)
+    if mode not in DATASET_FILES:
+        raise DatasetError(f"{path}: unknown mode {mode!r}; set \"mode\" or name the file <mode>_errors.json ({', '.join(DATASET_FILES)}).")
+    disabled = data.get("disable", []) if isinstance(data, dict) else []
+    if not isinstance(disabled, list) or not all(isinstance(c, str) for c in disabled):
+        raise DatasetError(f"{path}: 'disable' must be a list of categories.")
+    return parse_dataset(data, mode, path), set(disabled)
+
+class RuleLayer:
+    """
+    One directory of dataset files. A file is parsed, and its patterns
+    compiled, again only when its mtime or size changed.
+    """
+
+    def __init__(self, name: str, directory: str, files: Optional[Dict[str, str]] = None):
+        self.name = name
+        self.directory = directory
+        # filename -> mode for the packaged layer; overlays take every *.json
+        self.files = files
+        # path -> ((mtime_ns, size), rules, disabled categories)
+        self._cache: Dict[str, Tuple[Tuple[int, int], List[Rule], Set[str]]] = {}
+        # path -> last load error, while the previous version stays in use
+        self.errors: Dict[str, str] = {}
+
+    def paths(self) -> Dict[str, Optional[str]]:
+        """
+        path -> mode (None when the file names none) of the layer's files.
+        """
+        if self.files is not None:
+            return {os.path.join(self.directory, f): mode for f, mode in self.files.items()}
+        try:
+            names = sorted(os.listdir(self.directory))
+        except OSError:
+            return {}
+        return {os.path.join(self.directory, n): mode_for_file(n) for n in names if n.endswith(".json")}
+
+    def refresh(self, strict: bool = False) -> bool:
+        """
+        Re-reads added or changed files and forgets removed ones. Returns
+        whether the layer's rules changed. Unless strict, a file that fails
+        to load keeps its last good rules.
+        """
+        changed = False
+        paths = self.paths()
+        for path in [p for p in self._cache if p not in paths]:
+            del self._cache[path]
+            self.errors.pop(path, None)
+            changed = True
+        for path, mode in paths.items():
+            try:
+                st = os.stat(path)
+            except OSError:
+                if self._cache.pop(path, None):
+                    changed = True
+                continue
+            signature = (st.st_mtime_ns, st.st_size)
+            cached = self._cache.get(path)
+            if cached and cached[0] == signature:
+                continue
+            try:
+                rules, disabled = load_layer_file(path, mode)
+            except (OSError, DatasetError) as e:
+                if strict:
+                    raise
+                metrics.inc("rule_reload_errors_total", layer=self.name)
+                self.errors[path] = str(e)
+                self._cache[path] = (signature,) + (cached[1:] if cached else ([], set()))
+                continue
+            self.errors.pop(path, None)
+            self._cache[path] = (signature, rules, disabled)
+            changed = True
+        return changed
+
+    @property
+    def rules(self) -> List[Rule]:
+        return [rule for _, rules, _ in self._cache.values() for rule in rules]
+
+    @property
+    def disabled(self) -> Set[str]:
+        return set().union(*(disabled for _, _, disabled in self._cache.values()))
+
+def find_project_dir(start: Optional[str] = None, relative: str = PROJECT_RULES_DIR) -> Optional[str]:
+    path = os.path.abspath(start or os.getcwd())
+    while True:
+        candidate = os.path.join(path, relative)
+        if os.path.isdir(candidate):
+            return candidate
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+
+def project_root(project_dir: str, relative: str = PROJECT_RULES_DIR) -> str:
+    for _ in os.path.normpath(relative).split(os.sep):
+        project_dir = os.path.dirname(project_dir)
+    return project_dir
+
+def trusted_projects(path: str = TRUSTED_PROJECTS_FILE) -> Set[str]:
+    """
+    Project roots whose rules are loaded, one absolute path per line.
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            return {os.path.abspath(line.strip()) for line in f if line.strip() and not line.startswith("#")}
+    except OSError:
+        return set()
+
+def trust_project(root: str, path: str = TRUSTED_PROJECTS_FILE):
+    root = os.path.abspath(root)
+    if root in trusted_projects(path):
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(root + "\n")
+
+def default_layers(dataset_dir: str, overlays: bool = RULE_LAYERS_ENABLED, cwd: Optional[str] = None, trusted: Optional[Set[str]] = None) -> List[RuleLayer]:
+    """
+    packaged -> system -> user -> project, lowest precedence first. A
+    project's rules can run fix commands and override curated rules, so
+    they are only used once the project is trusted.
+    """
+    layers = [RuleLayer("packaged", dataset_dir, files={f: mode for mode, f in DATASET_FILES.items()})]
+    if overlays:
+        layers.append(RuleLayer("system", SYSTEM_RULES_DIR))
+        layers.append(RuleLayer("user", USER_RULES_DIR))
+        project = find_project_dir(cwd)
+        if project and project_root(project) in (trusted_projects() if trusted is None else trusted):
+            layers.append(RuleLayer("project", project))
+    return layers
+
+class RuleLayers:
+    """
+    Merges rule layers into one RuleSet. A rule replaces the rule of an
+    earlier layer with the same mode and category, and a layer can disable
+    categories of the layers below it. reload() polls the files at most
+    every `interval` seconds and re-merges only when a layer changed.
+    """
+
+    def __init__(self, layers: List[RuleLayer], interval: float = RULE_RELOAD_INTERVAL, clock: Callable[[], float] = time.monotonic):
+        self.layers = layers
+        self.interval = interval
+        self.clock = clock
+        self._lock = threading.Lock()
+        # Malformed packaged datasets fail loudly at startup; a malformed
+        # overlay is reported and the layers below it still apply
+        for layer in layers:
+            layer.refresh(strict=layer.files is not None)
+            for error in layer.errors.values():
+                Renderer.print_error(f"Ignoring rule overlay: {error}")
+        self.ruleset = self._merge()
+        self._checked = clock()
+
+    def _merge(self) -> RuleSet:
+        merged: Dict[Tuple[Optional[str], str], Rule] = {}
+        for layer in self.layers:
+            disabled = layer.disabled
+            if disabled:
+                merged = {key: rule for key, rule in merged.items() if rule.category not in disabled}
+            for rule in layer.rules:
+                merged[(rule.mode, rule.category)] = rule
+        return RuleSet(list(merged.values()))
+
+    def reload(self, force: bool = False) -> bool:
+        """
+        Returns whether the merged rules changed.
+        """
+        now = self.clock()
+        if not force and now - self._checked < self.interval:
+            return False
+        # Another thread is already checking
+        if not self._lock.acquire(blocking=force):
+            return False
+        try:
+            self._checked = now
+            changed = [layer.name for layer in self.layers if layer.refresh()]
+            if not changed:
+                return False
+            self.ruleset = self._merge()
+            for name in changed:
+                metrics.inc("rule_reloads_total", layer=name)
+            return True
+        finally:
+            self._lock.release()
+
+    @property
+    def errors(self) -> Dict[str, str]:
+        return {path: error for layer in self.layers for path, error in layer.errors.items()}
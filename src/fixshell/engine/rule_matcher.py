@@ -1,49 +1,65 @@
-import re
-from typing import List, Dict, Any, Optional
+import time
+from typing import Callable, List, Dict, Any, Optional, Set, Union
+from .metrics import metrics
+from .rule_model import Rule
+from ..config import RULE_TIME_BUDGET, DEMOTED_RULE_MAX_CHARS
 
 class RuleMatcher:
     """
     Deterministic regex-based rule matcher for system errors.
-    Supports priority scoring and multiple pattern matching.
+    Among matching rules, curated ones win, then the higher priority, then
+    the longer (more specific) pattern.
+    A rule whose search exceeds the time budget is demoted: it is skipped
+    for outputs longer than DEMOTED_RULE_MAX_CHARS for the rest of the run.
     """
     
-    def __init__(self, dataset: List[Dict[str, Any]]):
-        self.dataset = dataset
+    def __init__(self, dataset: List[Union[Rule, Dict[str, Any]]], budget: float = RULE_TIME_BUDGET, demoted_max_chars: int = DEMOTED_RULE_MAX_CHARS):
+        # Raw dicts are validated here; loaded datasets arrive as Rules
+        self.rules: List[Rule] = [r if isinstance(r, Rule) else Rule.from_dict(r) for r in dataset]
+        self.budget = budget
+        self.demoted_max_chars = demoted_max_chars
+        # Indexes of demoted rules
+        self.demoted: Set[int] = set()
 
     def find_matches(self, output: str) -> List[Dict[str, Any]]:
         """
         Matches stderr/stdout against the dataset.
-        Returns a list of matching error entries.
+        Returns a diagnosis dict per matching rule.
         """
         matches = []
         output_lower = output.lower()
+        large = len(output) > self.demoted_max_chars
 
-        for entry in self.dataset:
-            pattern = entry.get("error_pattern", "")
-            try:
-                # Capture groups to support template replacement ({MATCH_1}, etc.)
-                match_obj = re.search(pattern, output, re.IGNORECASE | re.MULTILINE)
-                if match_obj:
-                    entry_copy = entry.copy()
-                    entry_copy["matches"] = list(match_obj.groups())
-                    matches.append(entry_copy)
-            except re.error:
-                # Fallback to literal search
-                if pattern.lower() in output_lower:
-                    entry_copy = entry.copy()
-                    entry_copy["matches"] = []
-                    matches.append(entry_copy)
+        for i, rule in enumerate(self.rules):
+            if large and i in self.demoted:
+                continue
+            if rule.prefilter and not all(lit in output_lower for lit in rule.prefilter):
+                continue
+            started = time.perf_counter()
+            match_obj = rule.compiled.search(output)
+            if time.perf_counter() - started > self.budget and i not in self.demoted:
+                self.demoted.add(i)
+                metrics.inc("rule_demotions_total", category=rule.category)
+            if match_obj:
+                # Capture groups to support template replacement ({MATCH_1},
+                # and {NAME} for named groups)
+                matches.append(rule.diagnosis(match_obj.groups(), {k: v for k, v in match_obj.groupdict().items() if v is not None}))
         
         return matches
 
-    def get_best_match(self, output: str) -> Optional[Dict[str, Any]]:
+    def get_best_match(self, output: str, score: Optional[Callable[[str], float]] = None) -> Optional[Dict[str, Any]]:
         """
-        Returns the best match based on pattern length (specificity) or explicit priority.
+        Returns the best match by priority, then pattern length (specificity).
+        When a score function is given (historical success per category), it
+        only breaks ties between equally specific rules.
         """
         matches = self.find_matches(output)
         if not matches:
             return None
-        
-        # Sort by pattern length descending as a proxy for specificity
-        # If the dataset had a 'priority' field, we would use that.
-        return sorted(matches, key=lambda x: len(x.get("error_pattern", "")), reverse=True)[0]
+        return max(matches, key=lambda x: rank(x, score))
+
+def rank(entry: Dict[str, Any], score: Optional[Callable[[str], float]] = None) -> tuple:
+    # Imported rules (tagged with their "source") only win over each other
+    curated = entry.get("source") is None
+    # Pattern length is a proxy for specificity
+    return (curated, entry.get("priority", 5), len(entry.get("error_pattern", "")), score(entry.get("category", "")) if score else 0.0)
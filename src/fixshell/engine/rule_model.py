@@ -0,0 +1,316 @@
+import json
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+from .fix_template import FixTemplate, TemplateError, compile_templates
+
+# Dataset files are {"schema_version": 2, "mode": ..., "rules": [...]};
+# version 1 files are a bare list of rules
+SCHEMA_VERSION = 2
+DATASET_FILES = {"docker": "docker_errors.json", "git": "git_errors.json", "github": "github_errors.json", "linux": "linux_errors.json"}
+RULE_TYPES = ("RECOVERABLE", "TRANSIENT", "FATAL", "INFORMATIONAL")
+SEVERITIES = ("low", "medium", "high")
+RETRY_KEYS = {"max_attempts", "base_delay", "max_delay", "multiplier", "jitter", "deadline"}
+FLAGS = re.IGNORECASE | re.MULTILINE
+_CATEGORY = re.compile(r"^[A-Za-z][A-Za-z0-9_]*$")
+
+class DatasetError(ValueError):
+    pass
+
+@dataclass(frozen=True, slots=True)
+class Rule:
+    """
+    One validated dataset rule. The pattern is compiled once at load time;
+    diagnosis() turns a match into the dict the engine works with.
+    """
+    error_pattern: str
+    category: str
+    type: str = "FATAL"
+    priority: int = 5
+    severity: str = "low"
+    scope: str = "UNKNOWN"
+    suggested_fix: Tuple[str, ...] = ()
+    recommended_checks: Tuple[str, ...] = ()
+    fix_commands: Tuple[Tuple[str, ...], ...] = ()
+    retry: Optional[Dict[str, Any]] = None
+    # Commands the rule is limited to ("docker", "docker build"); untagged
+    # rules apply to every command routed to their dataset
+    commands: Tuple[str, ...] = ()
+    # Literals the pattern cannot match without (set by importers)
+    prefilter: Tuple[str, ...] = ()
+    # Origin of imported rules; curated rules have none
+    source: Optional[str] = None
+    mode: Optional[str] = None
+    compiled: Any = field(default=None, compare=False, repr=False)
+    # fix_commands compiled into typed slots
+    fix_templates: Tuple[FixTemplate, ...] = field(default=(), compare=False, repr=False)
+
+    @staticmethod
+    def from_dict(data: Dict[str, Any], mode: Optional[str] = None) -> "Rule":
+        if not isinstance(data, dict):
+            raise DatasetError(f"expected an object, got {type(data).__name__}")
+        unknown = set(data) - FIELDS
+        if unknown:
+            raise DatasetError(f"unknown field(s) {', '.join(sorted(unknown))}")
+
+        pattern = data.get("error_pattern")
+        if not isinstance(pattern, str) or not pattern:
+            raise DatasetError("'error_pattern' must be a non-empty string")
+        try:
+            compiled = re.compile(pattern, FLAGS)
+        except re.error as e:
+            raise DatasetError(f"invalid error_pattern: {e}")
+        category = data.get("category")
+        if not isinstance(category, str) or not _CATEGORY.match(category):
+            raise DatasetError(f"invalid category {category!r}")
+
+        rule_type = data.get("type", "FATAL")
+        if rule_type not in RULE_TYPES:
+            raise DatasetError(f"invalid type {rule_type!r} (expected one of {', '.join(RULE_TYPES)})")
+        severity = data.get("severity", "low")
+        if severity not in SEVERITIES:
+            raise DatasetError(f"invalid severity {severity!r} (expected one of {', '.join(SEVERITIES)})")
+        priority = data.get("priority", 5)
+        if not isinstance(priority, int) or isinstance(priority, bool) or not 0 <= priority <= 10:
+            raise DatasetError(f"priority must be an integer from 0 to 10, got {priority!r}")
+
+        fix_commands = data.get("fix_commands") or []
+        if not isinstance(fix_commands, list) or not all(isinstance(c, list) and c and all(isinstance(p, str) for p in c) for c in fix_commands):
+            raise DatasetError("'fix_commands' must be a list of non-empty argument lists")
+        try:
+            fix_templates = compile_templates(fix_commands)
+        except TemplateError as e:
+            raise DatasetError(f"invalid fix_commands: {e}")
+        retry = data.get("retry")
+        if retry is not None:
+            if not isinstance(retry, dict) or set(retry) - RETRY_KEYS:
+                raise DatasetError(f"'retry' must be an object with keys from {', '.join(sorted(RETRY_KEYS))}")
+            if rule_type != "TRANSIENT":
+                raise DatasetError("'retry' is only allowed on TRANSIENT rules")
+
+        commands = tuple(" ".join(c.lower().split()) for c in _strings(data, "commands"))
+        if not all(commands):
+            raise DatasetError("'commands' must not contain empty entries")
+
+        return Rule(
+            error_pattern=pattern,
+            category=category,
+            type=rule_type,
+            priority=priority,
+            severity=severity,
+            scope=_string(data, "scope", "UNKNOWN"),
+            suggested_fix=_strings(data, "suggested_fix"),
+            recommended_checks=_strings(data, "recommended_checks"),
+            fix_commands=tuple(tuple(c) for c in fix_commands),
+            retry=dict(retry) if retry else None,
+            commands=commands,
+            prefilter=tuple(p.lower() for p in _strings(data, "prefilter")),
+            source=data.get("source"),
+            mode=mode,
+            compiled=compiled,
+            fix_templates=fix_templates,
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Normalized JSON form: the core fields always, optional ones when set.
+        """
+        data = {
+            "error_pattern": self.error_pattern,
+            "category": self.category,
+            "type": self.type,
+            "priority": self.priority,
+            "severity": self.severity,
+            "scope": self.scope,
+            "suggested_fix": list(self.suggested_fix),
+        }
+        if self.recommended_checks:
+            data["recommended_checks"] = list(self.recommended_checks)
+        if self.fix_commands:
+            data["fix_commands"] = [list(c) for c in self.fix_commands]
+        if self.retry:
+            data["retry"] = dict(self.retry)
+        if self.commands:
+            data["commands"] = list(self.commands)
+        if self.prefilter:
+            data["prefilter"] = list(self.prefilter)
+        if self.source:
+            data["source"] = self.source
+        return data
+
+    def diagnosis(self, matches: Optional[List[Any]] = None, fields: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        A fresh diagnosis dict with every field present. `matches` are the
+        pattern's groups, `fields` its named groups and extracted values.
+        """
+        return {
+            "error_pattern": self.error_pattern,
+            "category": self.category,
+            "type": self.type,
+            "priority": self.priority,
+            "severity": self.severity,
+            "scope": self.scope,
+            "suggested_fix": list(self.suggested_fix),
+            "recommended_checks": list(self.recommended_checks),
+            "fix_commands": [list(c) for c in self.fix_commands],
+            "fix_templates": self.fix_templates,
+            "retry": self.retry,
+            "source": self.source,
+            "mode": self.mode,
+            "matches": list(matches or []),
+            "fields": dict(fields or {}),
+        }
+
+FIELDS = {"error_pattern", "category", "type", "priority", "severity", "scope", "suggested_fix",
+          "recommended_checks", "fix_commands", "retry", "commands", "prefilter", "source"}
+
+def _string(data: Dict[str, Any], key: str, default: str) -> str:
+    value = data.get(key, default)
+    if not isinstance(value, str):
+        raise DatasetError(f"'{key}' must be a string")
+    return value
+
+def _strings(data: Dict[str, Any], key: str) -> Tuple[str, ...]:
+    value = data.get(key) or []
+    if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+        raise DatasetError(f"'{key}' must be a list of strings")
+    return tuple(value)
+
+UNKNOWN = Rule(
+    error_pattern="unknown",
+    category="unknown",
+    type="FATAL",
+    severity="medium",
+    scope="UNKNOWN",
+    suggested_fix=("No automated fix available for this error.",),
+    recommended_checks=("Check manual logs", "Verify syntax"),
+)
+
+# What a diagnosis that omits a field means; used for diagnoses that do not
+# come from a Rule (e.g. other classifiers)
+DIAGNOSIS_DEFAULTS = Rule(error_pattern="unknown", category="unknown").diagnosis()
+
+def normalize_diagnosis(diagnosis: Dict[str, Any]) -> Dict[str, Any]:
+    for key, value in DIAGNOSIS_DEFAULTS.items():
+        if key not in diagnosis:
+            diagnosis[key] = type(value)(value) if isinstance(value, (list, dict)) else value
+    return diagnosis
+
+class RuleSet:
+    """
+    Validated rules of all datasets, indexed by category, by mode and by
+    the commands they are tagged with.
+    """
+
+    def __init__(self, rules: Optional[List[Rule]] = None):
+        self.rules: List[Rule] = []
+        self.by_category: Dict[str, List[Rule]] = {}
+        self.by_mode: Dict[str, List[Rule]] = {}
+        self.by_command: Dict[str, List[Rule]] = {}
+        # Untagged rules per mode
+        self.generic: Dict[str, List[Rule]] = {}
+        for rule in rules or []:
+            self.add(rule)
+
+    def add(self, rule: Rule):
+        self.rules.append(rule)
+        self.by_category.setdefault(rule.category, []).append(rule)
+        self.by_mode.setdefault(rule.mode, []).append(rule)
+        for command in rule.commands:
+            self.by_command.setdefault(command, []).append(rule)
+        if not rule.commands:
+            self.generic.setdefault(rule.mode, []).append(rule)
+
+    def for_mode(self, mode: str) -> List[Rule]:
+        return self.by_mode.get(mode, [])
+
+    def for_commands(self, modes: Iterable[str], commands: Iterable[str]) -> List[Rule]:
+        """
+        The untagged rules of `modes` plus the rules tagged with any of
+        `commands`, whatever their dataset.
+        """
+        selected = {id(r): r for mode in modes for r in self.generic.get(mode, [])}
+        for command in commands:
+            selected.update((id(r), r) for r in self.by_command.get(command, []))
+        return list(selected.values())
+
+    def get(self, category: str) -> List[Rule]:
+        return self.by_category.get(category, [])
+
+    def __contains__(self, category: str) -> bool:
+        return category in self.by_category
+
+    def __iter__(self) -> Iterator[Rule]:
+        return iter(self.rules)
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+def dataset_entries(data: Any, mode: str, path: str = "<dataset>") -> Tuple[str, List[Any]]:
+    """
+    (mode, raw rule entries) of a dataset document of either schema version.
+    """
+    if isinstance(data, list):
+        return mode, data
+    if not isinstance(data, dict):
+        raise DatasetError(f"{path}: expected a dataset object or list of rules.")
+    version = data.get("schema_version")
+    if version != SCHEMA_VERSION:
+        raise DatasetError(f"{path}: unsupported dataset schema_version {version!r} (expected {SCHEMA_VERSION}).")
+    entries = data.get("rules")
+    if not isinstance(entries, list):
+        raise DatasetError(f"{path}: 'rules' must be a list.")
+    return data.get("mode", mode), entries
+
+def parse_dataset(data: Any, mode: str, path: str = "<dataset>") -> List[Rule]:
+    """
+    Validates one dataset document (either schema version) into rules.
+    Raises DatasetError naming the file and rule on the first problem.
+    """
+    mode, entries = dataset_entries(data, mode, path)
+    rules, seen = [], set()
+    for i, entry in enumerate(entries):
+        label = entry.get("category", "?") if isinstance(entry, dict) else "?"
+        try:
+            rule = Rule.from_dict(entry, mode=mode)
+        except DatasetError as e:
+            raise DatasetError(f"{path}: rule {i} ({label}): {e}")
+        if rule.category in seen:
+            raise DatasetError(f"{path}: rule {i} ({label}): duplicate category in this dataset")
+        seen.add(rule.category)
+        rules.append(rule)
+    return rules
+
+def read_dataset(path: str) -> Any:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except ValueError as e:
+        raise DatasetError(f"{path}: invalid JSON: {e}")
+
+def load_dataset(path: str, mode: str) -> List[Rule]:
+    return parse_dataset(read_dataset(path), mode, path)
+
+def load_rules(dataset_dir: str) -> RuleSet:
+    """
+    Loads and validates every shipped dataset in dataset_dir (missing files
+    are empty).
+    """
+    ruleset = RuleSet()
+    for mode, filename in DATASET_FILES.items():
+        path = os.path.join(dataset_dir, filename)
+        if os.path.exists(path):
+            for rule in load_dataset(path, mode):
+                ruleset.add(rule)
+    return ruleset
+
+def dump_dataset(rules: List[Rule], mode: str) -> Dict[str, Any]:
+    return {"schema_version": SCHEMA_VERSION, "mode": mode, "rules": [r.to_dict() for r in rules]}
+
+def write_dataset(path: str, rules: List[Rule], mode: str):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(dump_dataset(rules, mode), f, indent=4)
+        f.write("\n")
+    os.replace(tmp, path)
@@ -1,12 +1,46 @@
 import os
 import sys
-import subprocess
+import asyncio
 import platform
+import time
 from .retry_engine import RetryEngine
 from .executor import Executor
-from ..ui.context_panel import ContextPanel
+from .async_executor import AsyncExecutor, PromptQueue
+from .state_store import StateStore, REPO_KEYS, AUTH_KEYS
+from .step_graph import StepGraph
+from .network_probe import network
+from .policy import Prompter
+from .tracing import tracer, traced_run
+from .workflow_loader import WorkflowJournal, load_workflow_definition, build_graph
+from ..config import MAX_PARALLEL_STEPS
+from ..ui.context_panel import LiveContextPanel
+from ..ui.renderer import Renderer
 from typing import Dict, Any, Optional
 
+# Declared types of the state categories; assignments are checked against them
+STATE_TYPES = {
+    "AUTH_STATE": str,
+    "REPO_STATE": str,
+    "BRANCH_STATE": str,
+    "REMOTE_STATE": str,
+    "NETWORK_STATE": str,
+    "PERMISSION_STATE": str,
+    "WORKFLOW_STATE": str,
+    "OS_STATE": str,
+    "DISTRO_STATE": dict,
+    "ARCH_STATE": str,
+    "INSTALL_STATE": dict,
+}
+
+def _install_state(state) -> Dict[str, Any]:
+    from ..modes.docker.install import SUPPORTED_CODENAMES
+    distro = state.get("DISTRO_STATE", {})
+    codename = distro.get("codename", "unknown")
+    return {
+        "supported": state.get("OS_STATE") == "Linux" and codename.lower() in SUPPORTED_CODENAMES,
+        "details": {"distro": distro.get("id", "unknown"), "codename": codename, "arch": state.get("ARCH_STATE")},
+    }
+
 class WorkflowStateMachine:
     """
     Orchestrates high-level system states and delegates 
@@ -14,22 +48,27 @@ class WorkflowStateMachine:
     Tracks AUTH_STATE, REPO_STATE, etc.
     """
 
-    def __init__(self, classifier, registry, dry_run: bool = False, mode: Optional[str] = None):
-        self.executor = Executor(dry_run)
-        self.retry_engine = RetryEngine(classifier, registry, self.executor, mode=mode)
+    def __init__(self, classifier, registry, dry_run: bool = False, mode: Optional[str] = None, cwd: Optional[str] = None, decision_queue=None, policy=None):
+        self.executor = Executor(dry_run, cwd=cwd, policy=policy)
+        self.retry_engine = RetryEngine(classifier, registry, self.executor, mode=mode, decision_queue=decision_queue)
         self.mode = mode
-        self.state: Dict[str, Any] = {
+        self.state = StateStore({
             "AUTH_STATE": "Unknown",
             "REPO_STATE": "No",
             "BRANCH_STATE": "N/A",
-            "NETWORK_STATE": "Online",
             "PERMISSION_STATE": "User",
             "WORKFLOW_STATE": "Idle",
             "OS_STATE": self._detect_os(),
             "DISTRO_STATE": self._detect_distro(),
-            "ARCH_STATE": self._detect_arch(),
-            "INSTALL_STATE": {"supported": False, "details": {}}
-        }
+            "ARCH_STATE": self._detect_arch()
+        }, types=STATE_TYPES)
+        self.state.derive("INSTALL_STATE", ("OS_STATE", "DISTRO_STATE", "ARCH_STATE"), _install_state)
+        self.state.add_probe(("PERMISSION_STATE",), lambda: {"PERMISSION_STATE": "Sudo/Root" if os.geteuid() == 0 else "User"})
+        # Reads the cached reachability; an expired result refreshes in the background
+        self.state.add_probe(("NETWORK_STATE",), lambda: {"NETWORK_STATE": network.label()})
+        self.panel = LiveContextPanel(self.state)
+        # Context manager whose attributes back the context keys
+        self._probed_context = None
 
     def _detect_os(self) -> str:
         return platform.system()
@@ -69,12 +108,12 @@ class WorkflowStateMachine:
                 
                 # lsb_release fallback
                 if info["codename"] == "unknown":
-                    res = subprocess.run(["lsb_release", "-cs"], capture_output=True, text=True)
+                    res = traced_run(["lsb_release", "-cs"], capture_output=True, text=True)
                     if res.returncode == 0:
                         info["codename"] = res.stdout.strip()
                 
                 if info["pretty_name"] == "unknown":
-                    res = subprocess.run(["lsb_release", "-ds"], capture_output=True, text=True)
+                    res = traced_run(["lsb_release", "-ds"], capture_output=True, text=True)
                     if res.returncode == 0:
                         info["pretty_name"] = res.stdout.strip()
 
@@ -92,40 +131,172 @@ class WorkflowStateMachine:
     def update_state(self, key: str, value: Any):
         self.state[key] = value
 
+    def attach_context(self, context_manager):
+        """
+        Registers the context manager as the probe source of the repo and
+        auth keys. Managers that can refresh each part separately get one
+        probe per part, so invalidating the branch does not re-query auth.
+        """
+        if context_manager is None or context_manager is self._probed_context:
+            return
+        self._probed_context = context_manager
+        cm = context_manager
+
+        def probe(refresh, keys):
+            def run() -> Dict[str, Any]:
+                with tracer.span("context_refresh", "context", context=type(cm).__name__, keys=list(keys)):
+                    refresh()
+                # Map from context manager attributes to our formal state categories
+                values = {
+                    "AUTH_STATE": getattr(cm, "user", "Not Logged In"),
+                    "REPO_STATE": "Yes" if getattr(cm, "is_repo", False) else "No",
+                    "BRANCH_STATE": getattr(cm, "branch", "N/A"),
+                }
+                if hasattr(cm, "remote_url"):
+                    values["REMOTE_STATE"] = cm.remote_url or "None"
+                return {k: v for k, v in values.items() if k in keys}
+            return run
+
+        if hasattr(cm, "refresh_repo") and hasattr(cm, "refresh_auth"):
+            self.state.add_probe(REPO_KEYS, probe(cm.refresh_repo, REPO_KEYS))
+            self.state.add_probe(AUTH_KEYS, probe(cm.refresh_auth, AUTH_KEYS))
+        else:
+            self.state.add_probe(REPO_KEYS + AUTH_KEYS, probe(cm.refresh, REPO_KEYS + AUTH_KEYS))
+
     def refresh_context(self, context_manager=None):
         """
-        Syncs state from the environment/context_manager 
-        and renders the ContextPanel.
+        Re-probes only the state keys invalidated since the last refresh
+        (by steps that may have changed them) and redraws the changed rows
+        of the context panel.
         """
-        if context_manager:
-            context_manager.refresh()
-            # Map from context manager attributes to our formal state categories
-            self.state["AUTH_STATE"] = getattr(context_manager, "user", "Not Logged In")
-            self.state["REPO_STATE"] = "Yes" if getattr(context_manager, "is_repo", False) else "No"
-            self.state["BRANCH_STATE"] = getattr(context_manager, "branch", "N/A")
-            # Permission check
-            import os
-            self.state["PERMISSION_STATE"] = "Sudo/Root" if os.geteuid() == 0 else "User"
-
-        ContextPanel.render(self.state)
+        self.attach_context(context_manager)
+        # Cheap to re-read, and picks up background probe results
+        self.state.invalidate("NETWORK_STATE")
+        self.state.ensure()
+
+        if self.panel.shown:
+            self.panel.sync()
+        else:
+            self.panel.show()
 
     def execute_step(self, cmd_list: list, desc: str, context_manager=None, interactive: bool = False) -> bool:
         """
         Updates workflow state and delegates to RetryEngine.
         """
+        self.attach_context(context_manager)
         self.state["WORKFLOW_STATE"] = f"Running: {desc}"
-        
+        self.panel.sync()
+
         # Ensure we categorize the error based on the current mode
         # The classifier.classify(output, mode=self.mode) is handled inside RetryEngine
         # (Assuming RetryEngine holds a reference to a classifier that supports mode-aware classification)
-        
-        success = self.retry_engine.execute_with_recovery(
-            cmd_list, 
-            desc, 
-            context_manager=context_manager, 
-            interactive=interactive,
-            state=self.state
-        )
-        
+        try:
+            success = self.retry_engine.execute_with_recovery(
+                cmd_list,
+                desc,
+                context_manager=context_manager,
+                interactive=interactive,
+                state=self.state
+            )
+        finally:
+            # The live region only spans the step; its last frame stays on screen
+            self.panel.pause()
+
         self.state["WORKFLOW_STATE"] = "Idle"
         return success
+
+    def run_workflow(self, source: str, inputs: Optional[Dict[str, Any]] = None, context_manager=None, resume: Optional[bool] = None) -> Dict[str, bool]:
+        """
+        Loads a declarative workflow (packaged name or JSON path) and executes
+        it. When an earlier run of the same workflow in this directory was
+        interrupted, it is resumed only if `resume` is set or the user agrees
+        (None asks on a terminal): its completed steps are not redone and the
+        state it had reached is restored instead of being re-probed.
+        Otherwise the run starts over.
+        """
+        definition = load_workflow_definition(source)
+        graph = build_graph(definition, inputs)
+        journal = WorkflowJournal.for_run(definition["name"], cwd=self.executor.cwd)
+        if journal.pending:
+            if resume is None:
+                resume = self._ask_resume(definition["name"], journal)
+            if not resume:
+                journal.clear()
+        self.attach_context(context_manager)
+        if journal.state:
+            self.state.restore(journal.state)
+
+        results = self.execute_graph(graph, context_manager=context_manager, journal=journal)
+        if all(results.values()):
+            journal.clear()
+        return results
+
+    def _ask_resume(self, name: str, journal: WorkflowJournal) -> bool:
+        if self.executor.policy.non_interactive or not sys.stdin.isatty():
+            Renderer.print_info(f"Starting '{name}' over; an interrupted run is only resumed when asked for.")
+            return False
+        started = time.strftime("%Y-%m-%d %H:%M", time.localtime(journal.started))
+        prompter = Prompter(self.executor.policy, "WORKFLOW_RESUME")
+        return prompter.confirm(f"Resume the interrupted '{name}' run started {started} ({len(journal.completed)} step(s) done)?", default=False)
+
+    def execute_graph(self, graph: StepGraph, context_manager=None, max_parallel: int = MAX_PARALLEL_STEPS, journal: Optional[WorkflowJournal] = None) -> Dict[str, bool]:
+        """
+        Executes a StepGraph. Independent steps run concurrently (bounded by
+        max_parallel), each inside its own recovery loop. Steps whose
+        dependencies failed are skipped. Returns the outcome per step name.
+        """
+        order = graph.topological_order()
+        self.attach_context(context_manager)
+        self.state["WORKFLOW_STATE"] = f"Running: {len(order)} steps"
+        self.panel.sync()
+        try:
+            return asyncio.run(self._execute_graph_async(graph, order, context_manager, max_parallel, journal))
+        finally:
+            self.panel.pause()
+            self.state["WORKFLOW_STATE"] = "Idle"
+
+    async def _execute_graph_async(self, graph: StepGraph, order: list, context_manager, max_parallel: int, journal: Optional[WorkflowJournal]) -> Dict[str, bool]:
+        runner = AsyncExecutor(self.executor, PromptQueue(), max_parallel=max_parallel)
+        results: Dict[str, bool] = {}
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run_step(step) -> bool:
+            if step.depends_on:
+                deps_ok = await asyncio.gather(*(tasks[d] for d in step.depends_on))
+                if not all(deps_ok):
+                    Renderer.print_info(f"Skipping '{step.desc}': a prerequisite step failed.")
+                    results[step.name] = False
+                    return False
+
+            # A precondition reflects the system now, so it overrides the journal
+            if step.precondition:
+                probe = await runner.probe(step.precondition.cmd)
+                if step.precondition.satisfied_by(probe):
+                    Renderer.print_info(f"Skipping '{step.desc}': already satisfied.")
+                    results[step.name] = True
+                    return True
+            elif journal and step.key and journal.is_done(step.key):
+                Renderer.print_info(f"Skipping '{step.desc}': completed in a previous run.")
+                results[step.name] = True
+                return True
+
+            ok = await self.retry_engine.execute_with_recovery_async(
+                runner,
+                step.cmd,
+                step.desc,
+                context_manager=context_manager,
+                state=self.state,
+                purpose=step.purpose,
+                risk=step.risk
+            )
+            if ok and journal and step.key and not self.executor.dry_run:
+                journal.mark_done(step.key, state=self.state.snapshot())
+            results[step.name] = ok
+            return ok
+
+        # Creating tasks in topological order guarantees dependencies exist
+        for name in order:
+            tasks[name] = asyncio.ensure_future(run_step(graph.steps[name]))
+
+        await asyncio.gather(*tasks.values())
+        return {name: results[name] for name in order}
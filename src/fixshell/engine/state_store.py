@@ -0,0 +1,209 @@
+import threading
+from collections.abc import MutableMapping
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+# Context keys probed from git/gh, and what may change them
+REPO_KEYS = ("REPO_STATE", "BRANCH_STATE", "REMOTE_STATE")
+AUTH_KEYS = ("AUTH_STATE",)
+READ_ONLY_GIT = {"status", "log", "diff", "show", "fetch", "ls-files", "rev-parse", "blame", "describe"}
+
+Subscriber = Callable[[str, Any], None]
+
+def affected_keys(cmd_list=None, category: Optional[str] = None) -> Tuple[str, ...]:
+    """
+    State keys a successful command (or a resolution of `category`) may have
+    changed, so only their probes are re-run.
+    """
+    keys: List[str] = []
+    words = cmd_list.split() if isinstance(cmd_list, str) else list(cmd_list or [])
+    if words[:2] == ["gh", "auth"]:
+        keys.extend(AUTH_KEYS)
+    elif words[:2] == ["gh", "repo"] or (words[:1] == ["git"] and (len(words) < 2 or words[1] not in READ_ONLY_GIT)):
+        keys.extend(REPO_KEYS)
+    if category:
+        if category.startswith("GH_AUTH"):
+            keys.extend(AUTH_KEYS)
+        elif category.startswith(("GIT_", "FS_")):
+            keys.extend(REPO_KEYS)
+    return tuple(dict.fromkeys(keys))
+
+class StateStore(MutableMapping):
+    """
+    Dict-compatible, typed workflow state with change tracking.
+
+    Every effective change bumps the key's version and notifies subscribers;
+    derived values are recomputed when a dependency changes. Keys backed by
+    a probe can be invalidated individually and are re-probed by ensure().
+    Assigning an equal value is not a change. Nested values (e.g.
+    DISTRO_STATE) must be replaced, not mutated, to be tracked.
+    """
+
+    def __init__(self, initial: Optional[Dict[str, Any]] = None, types: Optional[Dict[str, type]] = None):
+        self._data: Dict[str, Any] = {}
+        self._versions: Dict[str, int] = {}
+        self._dirty: Set[str] = set()
+        self._types: Dict[str, type] = dict(types or {})
+        self._subscribers: List[Tuple[Optional[frozenset], Subscriber]] = []
+        self._derived: Dict[str, Tuple[Tuple[str, ...], Callable[["StateStore"], Any]]] = {}
+        self._probes: Dict[str, Callable[[], Dict[str, Any]]] = {}
+        self._stale: Set[str] = set()
+        self._lock = threading.RLock()
+        # Bumped on every effective change
+        self.version = 0
+        if initial:
+            self.update(initial)
+
+    def __getitem__(self, key: str) -> Any:
+        return self._data[key]
+
+    def __setitem__(self, key: str, value: Any):
+        if key in self._derived:
+            raise TypeError(f"State key '{key}' is derived and cannot be assigned.")
+        self._set(key, value)
+
+    def _set(self, key: str, value: Any):
+        expected = self._types.get(key)
+        if expected is not None and value is not None and not isinstance(value, expected):
+            raise TypeError(f"State key '{key}' expects {expected.__name__}, got {type(value).__name__}.")
+        with self._lock:
+            if key in self._data and self._data[key] == value:
+                return
+            self._data[key] = value
+            self._dirty.add(key)
+            self._versions[key] = self._versions.get(key, 0) + 1
+            self.version += 1
+            subscribers = [cb for keys, cb in self._subscribers if keys is None or key in keys]
+            derived = [name for name, (deps, _) in self._derived.items() if key in deps]
+        # Callbacks run outside the lock so they may read or write the store
+        for callback in subscribers:
+            callback(key, value)
+        for name in derived:
+            self._recompute(name)
+
+    def __delitem__(self, key: str):
+        with self._lock:
+            del self._data[key]
+            self._dirty.add(key)
+            self._versions[key] = self._versions.get(key, 0) + 1
+            self.version += 1
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._data))
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __repr__(self) -> str:
+        return f"StateStore({self._data!r})"
+
+    def version_of(self, key: str) -> int:
+        return self._versions.get(key, 0)
+
+    def dirty(self) -> Set[str]:
+        with self._lock:
+            return set(self._dirty)
+
+    def take_dirty(self) -> Set[str]:
+        """
+        Returns the keys changed since the previous call and resets them.
+        """
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            return dirty
+
+    def mark_dirty(self, *keys: str):
+        with self._lock:
+            self._dirty.update(keys)
+
+    # Subscriptions and derived values
+
+    def subscribe(self, callback: Subscriber, keys: Optional[Iterable[str]] = None) -> Callable[[], None]:
+        """
+        Calls callback(key, value) after each change of `keys` (all keys when
+        omitted). Returns a function that removes the subscription.
+        """
+        entry = (frozenset(keys) if keys is not None else None, callback)
+        with self._lock:
+            self._subscribers.append(entry)
+
+        def unsubscribe():
+            with self._lock:
+                if entry in self._subscribers:
+                    self._subscribers.remove(entry)
+        return unsubscribe
+
+    def derive(self, key: str, depends_on: Sequence[str], compute: Callable[["StateStore"], Any]):
+        """
+        Defines `key` as compute(store), recomputed whenever one of
+        `depends_on` changes.
+        """
+        with self._lock:
+            self._derived[key] = (tuple(depends_on), compute)
+        self._recompute(key)
+
+    def _recompute(self, key: str):
+        _, compute = self._derived[key]
+        self._set(key, compute(self))
+
+    # Probes and per-key invalidation
+
+    def add_probe(self, keys: Sequence[str], probe: Callable[[], Dict[str, Any]]):
+        """
+        Registers probe() as the source of `keys`; it returns their values.
+        The keys start stale, so the first ensure() runs it.
+        """
+        with self._lock:
+            for key in keys:
+                self._probes[key] = probe
+            self._stale.update(keys)
+
+    def invalidate(self, *keys: str):
+        with self._lock:
+            self._stale.update(k for k in keys if k in self._probes)
+
+    def is_stale(self, key: str) -> bool:
+        return key in self._stale
+
+    def ensure(self, *keys: str) -> Set[str]:
+        """
+        Re-runs the probes of stale keys (all stale keys when none are given),
+        each probe at most once. Returns the keys whose value changed.
+        """
+        with self._lock:
+            wanted = [k for k in (keys or list(self._stale)) if k in self._stale]
+            probes: List[Callable[[], Dict[str, Any]]] = []
+            for key in wanted:
+                if self._probes[key] not in probes:
+                    probes.append(self._probes[key])
+
+        changed: Set[str] = set()
+        for probe in probes:
+            with self._lock:
+                owned = [k for k, p in self._probes.items() if p is probe]
+            before = {k: self.version_of(k) for k in owned}
+            for key, value in probe().items():
+                self._set(key, value)
+            with self._lock:
+                self._stale.difference_update(owned)
+            changed.update(k for k in owned if self.version_of(k) != before[k])
+        return changed
+
+    # Snapshot / restore
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        JSON-serializable copy of the stored (non-derived) values.
+        """
+        with self._lock:
+            return {k: v for k, v in self._data.items() if k not in self._derived}
+
+    def restore(self, snapshot: Dict[str, Any]):
+        """
+        Loads a snapshot. Restored probe-backed keys count as fresh, so a
+        resumed workflow does not re-probe them until they are invalidated.
+        """
+        for key, value in snapshot.items():
+            if key not in self._derived:
+                self._set(key, value)
+        with self._lock:
+            self._stale.difference_update(snapshot)
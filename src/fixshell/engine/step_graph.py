@@ -0,0 +1,67 @@
+from typing import Dict, List, Optional
+
+class WorkflowStep:
+    """
+    A single command in a StepGraph, along with the steps it waits on.
+    """
+
+    def __init__(self, name: str, cmd: list, desc: str, depends_on: Optional[List[str]] = None, purpose: str = None, risk: str = "low"):
+        self.name = name
+        self.cmd = cmd
+        self.desc = desc
+        self.depends_on = list(depends_on or [])
+        self.purpose = purpose
+        self.risk = risk
+        # Optional: skip the step when its effect is already in place
+        self.precondition = None
+        # Optional: identifies completed work across re-runs of a workflow
+        self.key: Optional[str] = None
+
+class StepGraph:
+    """
+    Dependency graph of workflow steps. Steps without a path between them
+    are independent and may be executed concurrently.
+    """
+
+    def __init__(self):
+        self.steps: Dict[str, WorkflowStep] = {}
+
+    def add_step(self, name: str, cmd: list, desc: str, depends_on: Optional[List[str]] = None, **kwargs) -> WorkflowStep:
+        if name in self.steps:
+            raise ValueError(f"Duplicate step '{name}' in workflow graph.")
+        step = WorkflowStep(name, cmd, desc, depends_on=depends_on, **kwargs)
+        self.steps[name] = step
+        return step
+
+    def topological_order(self) -> List[str]:
+        """
+        Returns step names so that every step follows its dependencies.
+        Raises ValueError on unknown dependencies or cycles.
+        """
+        for step in self.steps.values():
+            for dep in step.depends_on:
+                if dep not in self.steps:
+                    raise ValueError(f"Step '{step.name}' depends on unknown step '{dep}'.")
+
+        order = []
+        # 0 = unvisited, 1 = on the current path, 2 = done
+        marks = {name: 0 for name in self.steps}
+
+        def visit(name: str, path: List[str]):
+            if marks[name] == 2:
+                return
+            if marks[name] == 1:
+                cycle = " → ".join(path[path.index(name):] + [name])
+                raise ValueError(f"Cycle detected in workflow graph: {cycle}")
+            marks[name] = 1
+            for dep in self.steps[name].depends_on:
+                visit(dep, path + [name])
+            marks[name] = 2
+            order.append(name)
+
+        for name in self.steps:
+            visit(name, [])
+        return order
+
+    def validate(self):
+        self.topological_order()
@@ -0,0 +1,168 @@
+import asyncio
+import contextvars
+import itertools
+import json
+import os
+import subprocess
+import threading
+import time
+from typing import Dict, Any, List
+from .fixtures import fixtures
+
+# Innermost open span of the current thread / asyncio task
+_current: contextvars.ContextVar = contextvars.ContextVar("fixshell_span", default=None)
+
+class Span:
+    """
+    One timed operation. Spans opened while another span is active in the
+    same context become its children.
+    """
+
+    __slots__ = ("tracer", "id", "parent", "name", "cat", "args", "lane", "start", "end", "_token")
+
+    def __init__(self, tracer: "Tracer", name: str, cat: str, args: Dict[str, Any]):
+        self.tracer = tracer
+        self.id = next(tracer._ids)
+        self.parent = None
+        self.name = name
+        self.cat = cat
+        self.args = args
+        self.lane = None
+        self.start = 0.0
+        self.end = 0.0
+        self._token = None
+
+    def set(self, **args):
+        self.args.update(args)
+
+    def __enter__(self) -> "Span":
+        parent = _current.get()
+        self.parent = parent.id if parent else None
+        self.lane = self.tracer._lane()
+        self._token = _current.set(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end = time.perf_counter()
+        _current.reset(self._token)
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer._finish(self)
+        return False
+
+class _NoopSpan:
+    """
+    Returned while tracing is disabled so instrumented code pays for a
+    single attribute check.
+    """
+
+    __slots__ = ()
+
+    def set(self, **args):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+NOOP_SPAN = _NoopSpan()
+
+class Tracer:
+    """
+    Collects spans for subprocesses, classifications and resolver calls and
+    exports them as a Chrome trace (chrome://tracing, Perfetto).
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.spans: List[Span] = []
+        self._ids = itertools.count(1)
+        self._lanes: Dict[Any, int] = {}
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+
+    def enable(self):
+        self.enabled = True
+        self._origin = time.perf_counter()
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self.spans = []
+            self._lanes = {}
+
+    def span(self, name: str, cat: str = "fixshell", **args):
+        if not self.enabled:
+            return NOOP_SPAN
+        return Span(self, name, cat, args)
+
+    def _lane(self) -> int:
+        """
+        Concurrent asyncio steps share a thread, so each task gets its own
+        lane (trace 'tid') to keep overlapping spans readable.
+        """
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        key = (threading.get_ident(), id(task) if task else None)
+        with self._lock:
+            if key not in self._lanes:
+                self._lanes[key] = len(self._lanes) + 1
+            return self._lanes[key]
+
+    def _finish(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        pid = os.getpid()
+        events = []
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s.start)
+        for s in spans:
+            args = {k: _jsonable(v) for k, v in s.args.items()}
+            args["span_id"] = s.id
+            if s.parent:
+                args["parent_id"] = s.parent
+            events.append({
+                "name": s.name,
+                "cat": s.cat,
+                "ph": "X",
+                "ts": round((s.start - self._origin) * 1e6, 3),
+                "dur": round((s.end - s.start) * 1e6, 3),
+                "pid": pid,
+                "tid": s.lane,
+                "args": args
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export(self, path: str):
+        with open(path, 'w') as f:
+            json.dump(self.to_chrome_trace(), f, indent=1)
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, (list, tuple)):
+        return " ".join(str(v) for v in value)
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return str(value)
+
+# Process-wide tracer, enabled by `fixshell --trace out.json`
+tracer = Tracer()
+
+def traced_run(cmd, **kwargs) -> subprocess.CompletedProcess:
+    """
+    subprocess.run wrapped in a 'subprocess' span, for commands spawned
+    outside Executor (resolvers, context probes). Goes through the fixture
+    layer, so these commands are recorded and replayed too.
+    """
+    with tracer.span("subprocess", "subprocess", cmd=cmd) as span:
+        res = fixtures.run(cmd, **kwargs)
+        span.set(returncode=res.returncode)
+        return res
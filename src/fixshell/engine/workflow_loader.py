@@ -0,0 +1,181 @@
+import hashlib
+import json
+import os
+import re
+import time
+from typing import Dict, Any, List, Optional
+from .step_graph import StepGraph
+from ..config import WORKFLOW_DIR, STATE_DIR, WORKFLOW_JOURNAL_TTL
+
+SCHEMA_VERSION = 1
+_PLACEHOLDER = re.compile(r"\{([A-Za-z_][A-Za-z0-9_]*)\}")
+
+class WorkflowError(ValueError):
+    pass
+
+class Precondition:
+    """
+    Read-only probe that tells whether a step's effect is already in place
+    (image pulled, container running, nothing to push...).
+    """
+
+    def __init__(self, cmd: list, exit_code: Optional[int] = 0, stdout_contains: Optional[str] = None, stdout_nonempty: bool = False):
+        self.cmd = cmd
+        self.exit_code = exit_code
+        self.stdout_contains = stdout_contains
+        self.stdout_nonempty = stdout_nonempty
+
+    def satisfied_by(self, result) -> bool:
+        if self.exit_code is not None and result.returncode != self.exit_code:
+            return False
+        stdout = result.stdout or ""
+        if self.stdout_contains is not None and self.stdout_contains not in stdout:
+            return False
+        if self.stdout_nonempty and not stdout.strip():
+            return False
+        return True
+
+class WorkflowJournal:
+    """
+    Records idempotency keys of completed steps for one workflow run, along
+    with a snapshot of the workflow state, so a partially completed run can
+    be resumed. Cleared once the run succeeds; a journal older than `ttl`
+    is discarded when loaded.
+    """
+
+    def __init__(self, path: str, ttl: float = WORKFLOW_JOURNAL_TTL):
+        self.path = path
+        self.completed = set()
+        self.state: Dict[str, Any] = {}
+        self.started: Optional[float] = None
+        if os.path.exists(path):
+            try:
+                with open(path, 'r') as f:
+                    data = json.load(f)
+                self.completed = set(data.get("completed", []))
+                self.state = data.get("state", {})
+                self.started = data.get("started")
+            except (OSError, ValueError):
+                self.completed = set()
+            # Journals written before runs were timestamped count as stale
+            if self.started is None or time.time() - self.started > ttl:
+                self.clear()
+
+    @property
+    def pending(self) -> bool:
+        return bool(self.completed)
+
+    def is_done(self, key: str) -> bool:
+        return key in self.completed
+
+    def mark_done(self, key: str, state: Optional[Dict[str, Any]] = None):
+        self.completed.add(key)
+        if state is not None:
+            self.state = state
+        if self.started is None:
+            self.started = time.time()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump({"completed": sorted(self.completed), "state": self.state, "started": self.started}, f)
+        os.replace(tmp, self.path)
+
+    def clear(self):
+        self.completed = set()
+        self.state = {}
+        self.started = None
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    @staticmethod
+    def for_run(workflow_name: str, cwd: Optional[str] = None) -> "WorkflowJournal":
+        cwd = os.path.abspath(cwd or os.getcwd())
+        digest = hashlib.sha1(cwd.encode()).hexdigest()[:12]
+        return WorkflowJournal(os.path.join(STATE_DIR, "workflows", f"{workflow_name}-{digest}.json"))
+
+def resolve_workflow_path(source: str) -> str:
+    """
+    Accepts a path to a workflow file or the name of a packaged workflow.
+    """
+    if os.path.isfile(source):
+        return source
+    path = os.path.join(WORKFLOW_DIR, f"{source}.json")
+    if os.path.isfile(path):
+        return path
+    raise WorkflowError(f"Workflow '{source}' not found.")
+
+def load_workflow_definition(source: str) -> Dict[str, Any]:
+    with open(resolve_workflow_path(source), 'r') as f:
+        definition = json.load(f)
+
+    version = definition.get("schema_version", SCHEMA_VERSION)
+    if version != SCHEMA_VERSION:
+        raise WorkflowError(f"Unsupported workflow schema_version {version} (expected {SCHEMA_VERSION}).")
+    if not definition.get("name"):
+        raise WorkflowError("Workflow definition is missing 'name'.")
+    if not isinstance(definition.get("steps"), list) or not definition["steps"]:
+        raise WorkflowError(f"Workflow '{definition['name']}' defines no steps.")
+    return definition
+
+def resolve_inputs(definition: Dict[str, Any], inputs: Optional[Dict[str, Any]] = None) -> Dict[str, str]:
+    inputs = dict(inputs or {})
+    resolved = {}
+    for name, spec in definition.get("inputs", {}).items():
+        if name in inputs and inputs[name] is not None:
+            resolved[name] = str(inputs[name])
+        elif "default" in spec:
+            resolved[name] = str(spec["default"])
+        else:
+            raise WorkflowError(f"Workflow '{definition['name']}' requires input '{name}'.")
+    return resolved
+
+def render(value, inputs: Dict[str, str]):
+    """
+    Substitutes {input} placeholders in strings and lists of strings. Braces
+    that do not name a declared input (e.g. inline JS) are left untouched.
+    """
+    if isinstance(value, list):
+        return [render(v, inputs) for v in value]
+    if isinstance(value, str):
+        return _PLACEHOLDER.sub(lambda m: inputs.get(m.group(1), m.group(0)), value)
+    return value
+
+def build_graph(definition: Dict[str, Any], inputs: Optional[Dict[str, Any]] = None) -> StepGraph:
+    values = resolve_inputs(definition, inputs)
+    graph = StepGraph()
+
+    for raw in definition["steps"]:
+        if "id" not in raw or "cmd" not in raw:
+            raise WorkflowError(f"Workflow '{definition['name']}' has a step without 'id' or 'cmd'.")
+
+        cmd = render(raw["cmd"], values)
+        step = graph.add_step(
+            raw["id"],
+            cmd,
+            render(raw.get("desc", raw["id"]), values),
+            depends_on=raw.get("depends_on"),
+            purpose=render(raw.get("purpose"), values),
+            risk=raw.get("risk", "low")
+        )
+
+        pre = raw.get("precondition")
+        if pre:
+            step.precondition = Precondition(
+                render(pre["cmd"], values),
+                exit_code=pre.get("exit_code", 0),
+                stdout_contains=render(pre.get("stdout_contains"), values),
+                stdout_nonempty=pre.get("stdout_nonempty", False)
+            )
+
+        # Idempotency key: explicit template, or the step id plus its rendered command
+        key_template = raw.get("idempotency_key")
+        cmd_text = cmd if isinstance(cmd, str) else " ".join(cmd)
+        step.key = render(key_template, values) if key_template else f"{raw['id']}:{cmd_text}"
+
+    graph.validate()
+    return graph
+
+def list_workflows() -> List[str]:
+    if not os.path.isdir(WORKFLOW_DIR):
+        return []
+    return sorted(f[:-5] for f in os.listdir(WORKFLOW_DIR) if f.endswith(".json"))
@@ -1,42 +1,142 @@
 import click
+import json
 import sys
+from datetime import datetime
 from .ui.renderer import Renderer
 from .modes.git.git_mode import GitMode
+from .modes.git.git_fanout import GitFanout, PIPELINES
 from .modes.github.github_mode import GitHubMode
 from .modes.docker.docker_mode import DockerMode
 from .modes.linux.linux_mode import LinuxMode
-from .config import VERSION
+from .config import VERSION, FANOUT_WORKERS, AUDIT_ENABLED, AUDIT_DIR, AUDIT_MAX_BYTES, AUDIT_MAX_AGE, AUDIT_COMPRESSION, OUTCOMES_DB
+from .config import DATASET_DIR, RULE_TIME_BUDGET
+from .config import NETWORK_PROBE_ENABLED, NETWORK_ENDPOINTS, NETWORK_PROBE_TIMEOUT, NETWORK_PROBE_TTL
+from .engine.policy import Policy, PolicyError
+from .engine.fixtures import fixtures
+from .engine.audit import AuditQuery, audit as audit_journal, parse_time
+from .engine.metrics import StatsdSink, metrics
+from .engine.regex_lint import lint_rules, load_dataset_rules
+from .engine.rule_layers import RuleLayer, default_layers, find_project_dir, project_root, trust_project, trusted_projects
+from .engine.network_probe import network, parse_endpoints, proxy_endpoint
+from .engine.outcome_store import outcomes
+from .engine.tracing import tracer
+
+# Subcommands whose output is a report (`--json` lines or a table)
+REPORT_COMMANDS = {"audit", "dataset"}
 
 @click.group()
 @click.version_option(version=VERSION)
 @click.option('--dry-run', is_flag=True, help="Simulate execution without making changes.")
+@click.option('--policy', 'policy_path', type=click.Path(exists=True, dir_okay=False), envvar="FIXSHELL_POLICY", help="Policy file that pre-decides resolver prompts per category.")
+@click.option('--non-interactive', is_flag=True, help="Never prompt; anything the policy does not allow is denied.")
+@click.option('--trace', 'trace_path', type=click.Path(dir_okay=False, writable=True), help="Write a Chrome trace (JSON) of commands, classifications and resolvers.")
+@click.option('--metrics-file', type=click.Path(dir_okay=False), envvar="FIXSHELL_METRICS_FILE", help="Accumulate metrics in a Prometheus textfile-collector file.")
+@click.option('--statsd', 'statsd_address', metavar="HOST:PORT", envvar="FIXSHELL_STATSD", help="Send metrics to a StatsD-compatible UDP endpoint.")
+@click.option('--output', type=click.Choice(["auto", "rich", "plain", "json"]), default="auto", envvar="FIXSHELL_OUTPUT", show_default=True, help="Output format; auto uses rich on a terminal and plain otherwise.")
+@click.option('--record', 'record_path', type=click.Path(dir_okay=False), envvar="FIXSHELL_RECORD", help="Append a transcript of every command run to this fixture file.")
+@click.option('--replay', 'replay_path', type=click.Path(exists=True, dir_okay=False), envvar="FIXSHELL_REPLAY", help="Serve commands from a recorded fixture file instead of running them.")
 @click.pass_context
-def cli(ctx, dry_run):
+def cli(ctx, dry_run, policy_path, non_interactive, trace_path, metrics_file, statsd_address, output, record_path, replay_path):
     """
     FixShell - The Deterministic, State-Aware DevOps Engine.
     """
+    Renderer.use(output)
+    # Reports meant to be piped or parsed start with their first record
+    if Renderer.backend.name != "json" and ctx.invoked_subcommand not in REPORT_COMMANDS:
+        Renderer.print_banner("FixShell Engine")
     ctx.ensure_object(dict)
     ctx.obj['dry_run'] = dry_run
+    try:
+        policy = Policy.load(policy_path) if policy_path else Policy()
+    except PolicyError as e:
+        raise click.BadParameter(str(e), param_hint="--policy")
+    if non_interactive:
+        policy.non_interactive = True
+    ctx.obj['policy'] = policy
 
-@cli.command()
+    if record_path and replay_path:
+        raise click.BadParameter("cannot be combined with --replay", param_hint="--record")
+    if record_path:
+        fixtures.record_to(record_path)
+        ctx.call_on_close(fixtures.close)
+    elif replay_path:
+        try:
+            fixtures.replay_from(replay_path)
+        except ValueError as e:
+            raise click.BadParameter(str(e), param_hint="--replay")
+        ctx.call_on_close(_finish_replay)
+
+    if statsd_address:
+        try:
+            StatsdSink.from_address(statsd_address)
+        except ValueError as e:
+            raise click.BadParameter(str(e), param_hint="--statsd")
+    # Flushed once at exit
+    metrics.configure(textfile=metrics_file, statsd=statsd_address)
+    # Reports run offline and only read; they open no journal, history or sockets
+    reporting = ctx.invoked_subcommand in REPORT_COMMANDS
+    if AUDIT_ENABLED and not reporting:
+        audit_journal.open(AUDIT_DIR, max_bytes=AUDIT_MAX_BYTES, max_age=AUDIT_MAX_AGE, compression=AUDIT_COMPRESSION)
+    # Replayed runs do not feed the strategy success history
+    if not fixtures.replaying and not reporting:
+        outcomes.open(OUTCOMES_DB)
+    if NETWORK_PROBE_ENABLED and not fixtures.replaying and not reporting:
+        endpoints = parse_endpoints(NETWORK_ENDPOINTS)
+        proxy = proxy_endpoint()
+        if proxy and proxy not in endpoints:
+            endpoints.append(proxy)
+        network.configure(endpoints, timeout=NETWORK_PROBE_TIMEOUT, ttl=NETWORK_PROBE_TTL)
+        # Probe while the menus load so the first context panel has a result
+        network.refresh_async()
+
+    if trace_path:
+        tracer.enable()
+        ctx.call_on_close(lambda: _write_trace(trace_path))
+
+def _finish_replay():
+    misses = fixtures.misses
+    fixtures.close()
+    if misses:
+        Renderer.print_info(f"{len(misses)} command(s) had no recorded transcript in the replay fixture")
+
+def _write_trace(path: str):
+    tracer.export(path)
+    Renderer.print_info(f"Trace written to {path} ({len(tracer.spans)} spans)")
+
+@cli.group(invoke_without_command=True)
 @click.pass_context
 def git(ctx):
     """Git Guided Workflow Mode."""
-    mode = GitMode(dry_run=ctx.obj['dry_run'])
-    mode.run_guided_workflow()
+    if ctx.invoked_subcommand is None:
+        mode = GitMode(dry_run=ctx.obj['dry_run'], policy=ctx.obj['policy'])
+        mode.run_guided_workflow()
+
+@git.command()
+@click.option('--repos', required=True, help="Glob of repository paths, or a file listing one path per line.")
+@click.option('--pipeline', type=click.Choice(PIPELINES), default="sync_with_main", show_default=True, help="Pipeline to run in every repository.")
+@click.option('--message', default="Update", show_default=True, help="Commit message for the daily_work pipeline.")
+@click.option('--workers', type=int, default=FANOUT_WORKERS, show_default=True, help="Repositories processed concurrently.")
+@click.option('--no-prompt', is_flag=True, help="Report deferred decisions without resolving them.")
+@click.pass_context
+def sync(ctx, repos, pipeline, message, workers, no_prompt):
+    """Run a git pipeline across many repositories concurrently."""
+    policy = ctx.obj['policy']
+    fanout = GitFanout(dry_run=ctx.obj['dry_run'], workers=workers, policy=policy)
+    if not fanout.run(repos, pipeline, message=message, interactive=not (no_prompt or policy.non_interactive)):
+        ctx.exit(1)
 
 @cli.command()
 @click.pass_context
 def github(ctx):
     """GitHub Management Mode."""
-    mode = GitHubMode(dry_run=ctx.obj['dry_run'])
+    mode = GitHubMode(dry_run=ctx.obj['dry_run'], policy=ctx.obj['policy'])
     mode.run_menu()
 
 @cli.command()
 @click.pass_context
 def docker(ctx):
     """Docker Workflow Mode."""
-    mode = DockerMode(dry_run=ctx.obj['dry_run'])
+    mode = DockerMode(dry_run=ctx.obj['dry_run'], policy=ctx.obj['policy'])
     mode.run_guided_workflow()
 
 @cli.command(context_settings=dict(ignore_unknown_options=True))
@@ -45,11 +145,120 @@ def docker(ctx):
 @click.pass_context
 def diagnosis(ctx, ai, args):
     """Deterministic (default) or AI-powered diagnosis for arbitrary commands."""
-    mode = LinuxMode(dry_run=ctx.obj['dry_run'])
+    mode = LinuxMode(dry_run=ctx.obj['dry_run'], policy=ctx.obj['policy'])
     mode.diagnose_and_fix(list(args), use_ai=ai)
 
+@cli.group()
+def audit():
+    """Inspect the audit journal of executed commands and fixes."""
+
+@audit.command()
+@click.option('--since', help="Only entries newer than this (e.g. 30m, 2h, 7d or an ISO timestamp).")
+@click.option('--until', help="Only entries older than this.")
+@click.option('--event', type=click.Choice(["command", "authorization", "classification", "resolution", "recovery"]), help="Only this kind of entry.")
+@click.option('--category', help="Only entries for this error category.")
+@click.option('--cmd', 'command', help="Only commands containing this text.")
+@click.option('--failed', is_flag=True, help="Only non-zero exits, declined steps and failed fixes.")
+@click.option('--limit', type=int, default=50, show_default=True, help="Show the most recent N matches.")
+@click.option('--json', 'as_json', is_flag=True, help="Print matching entries as JSON Lines.")
+@click.option('--dir', 'directory', default=AUDIT_DIR, show_default=True, type=click.Path(file_okay=False), help="Journal directory.")
+def query(since, until, event, category, command, failed, limit, as_json, directory):
+    """Filter the audit journal (streams rotated and compressed segments)."""
+    try:
+        q = AuditQuery(
+            since=parse_time(since) if since else None,
+            until=parse_time(until) if until else None,
+            event=event,
+            category=category,
+            command=command,
+            failed=failed
+        )
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+    entries = q.tail(directory, limit)
+    if as_json:
+        for entry in entries:
+            click.echo(json.dumps(entry, ensure_ascii=False))
+        return
+
+    rows = []
+    for e in entries:
+        cmd = e.get("cmd", e.get("question", e.get("desc", "")))
+        rows.append((
+            datetime.fromtimestamp(e["ts"]).strftime("%Y-%m-%d %H:%M:%S"),
+            e.get("event", ""),
+            e.get("category", ""),
+            " ".join(cmd) if isinstance(cmd, list) else str(cmd),
+            str(e.get("exit_code", e.get("outcome", e.get("answer", "")))),
+            f"{e['duration']:.3f}s" if "duration" in e else ""
+        ))
+    Renderer.print_table(f"Audit Journal ({len(rows)} entries)", ["Time", "Event", "Category", "Command", "Result", "Duration"], rows)
+
+@cli.group()
+def dataset():
+    """Inspect the error datasets."""
+
+@dataset.command()
+@click.option('--dir', 'directory', type=click.Path(exists=True, file_okay=False), help="Lint the dataset files in this directory instead of the active rule layers.")
+@click.option('--budget-ms', type=float, default=RULE_TIME_BUDGET * 1000, show_default=True, help="Worst-case search time allowed per pattern.")
+@click.option('--no-fuzz', is_flag=True, help="Only run the static checks.")
+@click.option('--all', 'show_all', is_flag=True, help="Also list patterns without findings.")
+@click.option('--json', 'as_json', is_flag=True, help="Print one JSON report per pattern.")
+@click.pass_context
+def lint(ctx, directory, budget_ms, no_fuzz, show_all, as_json):
+    """Flag slow or backtracking-prone patterns (ReDoS guard)."""
+    # The packaged datasets plus every overlay in use (rules.d, trusted projects)
+    active = [RuleLayer("dir", directory)] if directory else default_layers(DATASET_DIR)
+    rules, errors = load_dataset_rules(layers=active)
+    reports = lint_rules(rules, budget=budget_ms / 1000, run_fuzz=not no_fuzz, errors=errors)
+    if as_json:
+        for report in reports:
+            click.echo(json.dumps(report, ensure_ascii=False))
+    else:
+        rows = []
+        for r in reports:
+            if r["severity"] == "ok" and not show_all:
+                continue
+            worst = f"{r['worst_seconds'] * 1000:.1f}" if r["worst_seconds"] is not None else "-"
+            rows.append((r["severity"], r["source"], r["category"], worst, "; ".join(m for _, m in r["findings"]) or "-"))
+        Renderer.print_table("Dataset Lint", ["Severity", "Dataset", "Category", "Worst ms", "Findings"], rows)
+        errors = sum(r["severity"] == "error" for r in reports)
+        Renderer.print_info(f"{len(reports)} patterns checked, {errors} with errors.")
+    if any(r["severity"] == "error" for r in reports):
+        ctx.exit(1)
+
+@dataset.command()
+@click.pass_context
+def layers(ctx):
+    """Show the rule layers (packaged, system, user, project) in precedence order."""
+    rows, errors = [], {}
+    for layer in default_layers(DATASET_DIR):
+        layer.refresh()
+        errors.update(layer.errors)
+        rows.append((layer.name, layer.directory, str(len(layer.rules)), ", ".join(sorted(layer.disabled)) or "-"))
+    Renderer.print_table("Rule Layers (later override earlier)", ["Layer", "Directory", "Rules", "Disables"], rows)
+    project = find_project_dir()
+    if project and project_root(project) not in trusted_projects():
+        Renderer.print_info(f"Ignoring untrusted project rules in {project} (trust them with `fixshell dataset trust`).")
+    for error in errors.values():
+        Renderer.print_error(error)
+    if errors:
+        ctx.exit(1)
+
+@dataset.command()
+@click.argument('path', required=False, type=click.Path(exists=True, file_okay=False))
+@click.pass_context
+def trust(ctx, path):
+    """Use the .fixshell/rules.d of this project (or PATH) from now on."""
+    project = find_project_dir(path)
+    if not project:
+        Renderer.print_error("No .fixshell/rules.d found in this directory or its parents.")
+        ctx.exit(1)
+    trust_project(project_root(project))
+    Renderer.print_success(f"Trusted {project_root(project)}")
+
 def main():
-    Renderer.print_banner("FixShell Engine")
     try:
         cli(obj={})
     except Exception as e:
@@ -9,7 +9,10 @@ from ...engine.resolver_registry import (
     ResolverRegistry, handle_docker_name_conflict, handle_docker_daemon_service,
     handle_docker_not_installed
 )
+from ...engine.policy import Prompter
 from ...engine.state_machine import WorkflowStateMachine
+from ...engine.workflow_loader import load_workflow_definition
+from ...ui.context_panel import prompt_guard
 from ...ui.renderer import Renderer
 
 class DockerMode:
@@ -17,7 +20,7 @@ class DockerMode:
     Controller for Docker guided workflow, synchronized with the FixShell Engine.
     """
     
-    def __init__(self, dry_run: bool = False):
+    def __init__(self, dry_run: bool = False, policy=None):
         self.dry_run = dry_run
         
         # 1. Initialize Engine
@@ -27,39 +30,37 @@ class DockerMode:
         
         # 2. Setup Registries
         self.registry = ResolverRegistry()
-        self.registry.register("docker_name_conflict", handle_docker_name_conflict)
+        self.registry.register("docker_name_conflict", handle_docker_name_conflict, risk="high")
         self.registry.register("docker_daemon_service", handle_docker_daemon_service)
-        self.registry.register("docker_not_installed", handle_docker_not_installed)
+        self.registry.register("docker_not_installed", handle_docker_not_installed, risk="high")
         
         # 3. Instantiate core components
-        self.sm = WorkflowStateMachine(self.classifier, self.registry, dry_run, mode="docker")
+        self.sm = WorkflowStateMachine(self.classifier, self.registry, dry_run, mode="docker", policy=policy)
 
     def run_guided_workflow(self):
+        Renderer.print_banner("Docker Guided Workflow")
         while True:
-            click.clear()
-            Renderer.print_banner("Docker Guided Workflow")
-            
-            # Use orchestrated StateMachine to refresh and render context
+            # Use orchestrated StateMachine to refresh and render context;
+            # only rows that changed since the last pass are redrawn
             self.sm.refresh_context()
 
-            # Step 1: Template Selection
-            click.secho("\n🎁 Available Templates:", fg="cyan", bold=True)
-            options = [
-                "Install Docker Engine (Guided)",
-                "Create Node Web App Container",
-                "Create Python Web App Container",
-                "Run MySQL Database",
-                "Run PostgreSQL Database",
-                "Build Image from Current Folder",
-                "Debug Running Container",
-                "Stop/Remove Container Safely",
-                "Exit Mode"
-            ]
-            
-            for i, opt in enumerate(options, 1):
-                click.echo(f"{i}. {opt}")
-                
-            choice = click.prompt("\nSelect an option", type=int, default=len(options))
+            with prompt_guard():
+                # Step 1: Template Selection
+                options = [
+                    "Install Docker Engine (Guided)",
+                    "Create Node Web App Container",
+                    "Create Python Web App Container",
+                    "Run MySQL Database",
+                    "Run PostgreSQL Database",
+                    "Build Image from Current Folder",
+                    "Debug Running Container",
+                    "Stop/Remove Container Safely",
+                    "Exit Mode"
+                ]
+
+                Renderer.print_menu("🎁 Available Templates:", [f"{i}. {opt}" for i, opt in enumerate(options, 1)])
+
+                choice = click.prompt("\nSelect an option", type=int, default=len(options))
             
             if choice >= len(options):
                 break
@@ -81,34 +82,28 @@ class DockerMode:
 
     def _install_docker_guided(self):
         """Manually trigger the installation resolver logic."""
-        handle_docker_not_installed([], dry_run=self.dry_run, state=self.sm.state)
+        policy = self.sm.executor.policy
+        prompter = Prompter(policy, "docker_not_installed", auto=policy.decide("docker_not_installed", "high") == "allow")
+        handle_docker_not_installed([], dry_run=self.dry_run, state=self.sm.state, prompter=prompter)
 
     def _run_predefined_template(self, template_key):
         template = DOCKER_TEMPLATES[template_key]
+        definition = load_workflow_definition(template['workflow'])
+        inputs = definition.get("inputs", {})
         Renderer.print_step(f"Template: {template['name']}")
         
         # Inputs
-        name = click.prompt("   Container name", default=template_key.replace("_", "-"))
-        port_host = click.prompt("   Host port", type=int, default=template['steps'][1].get('port', 8080))
+        name = click.prompt("   Container name", default=inputs.get("name", {}).get("default", template_key.replace("_", "-")))
+        port_host = click.prompt("   Host port", type=int, default=inputs.get("host_port", {}).get("default", 8080))
         
         # Basic validation (Manual for now, can be resolved by engine if it fails)
         if not is_port_free(port_host):
             Renderer.print_info(f"Port {port_host} is in use. Engine will attempt to resolve if it fails.")
 
-        # Construct commands from template
-        for step in template['steps']:
-            if 'cmd' in step:
-                cmd = step['cmd'].split()
-                # Simple replacement for demonstration
-                if "run" in cmd:
-                    # In a real tool, we'd have a better template engine
-                    for i, arg in enumerate(cmd):
-                        if arg == "--name": cmd[i+1] = name
-                        if arg == "-p":
-                            container_port = cmd[i+1].split(':')[1]
-                            cmd[i+1] = f"{port_host}:{container_port}"
-                
-                self.sm.execute_step(cmd, step['desc'])
+        # Steps already in place (image pulled, container running) are skipped
+        results = self.sm.run_workflow(template['workflow'], {"name": name, "host_port": port_host})
+        if all(results.values()):
+            Renderer.print_success(f"{template['name']} ready (container: {name}, port: {port_host})")
 
     def _build_current_folder(self):
         if not os.path.exists("Dockerfile"):
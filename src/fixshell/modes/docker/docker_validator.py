@@ -2,6 +2,7 @@ import subprocess
 import socket
 import shutil
 from typing import Optional
+from ...engine.tracing import traced_run
 
 def is_docker_installed() -> bool:
     """Check if docker binary exists in PATH."""
@@ -10,7 +11,7 @@ def is_docker_installed() -> bool:
 def is_docker_running() -> bool:
     """Check if docker daemon is responsive."""
     try:
-        subprocess.run(["docker", "info"], capture_output=True, check=True)
+        traced_run(["docker", "info"], capture_output=True, check=True)
         return True
     except (subprocess.CalledProcessError, FileNotFoundError):
         return False
@@ -23,7 +24,7 @@ def is_port_free(port: int) -> bool:
 def container_exists(name: str) -> bool:
     """Check if a container with this name already exists."""
     try:
-        res = subprocess.run(["docker", "ps", "-a", "--filter", f"name=^/{name}$", "--format", "{{.Names}}"], capture_output=True, text=True)
+        res = traced_run(["docker", "ps", "-a", "--filter", f"name=^/{name}$", "--format", "{{.Names}}"], capture_output=True, text=True)
         return name in res.stdout
     except Exception:
         return False
@@ -0,0 +1,131 @@
+import glob
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List
+from .git_mode import build_git_registry, list_remotes, sync_with_main_graph
+from ...config import DATASET_DIR, FANOUT_WORKERS
+from ...engine.classifier import Classifier
+from ...engine.decision_queue import DecisionQueue
+from ...engine.policy import Prompter
+from ...engine.state_machine import WorkflowStateMachine
+from ...ui.renderer import Renderer
+
+PIPELINES = ["sync_with_main", "daily_work"]
+
+def resolve_repos(spec: str) -> List[str]:
+    """
+    Expands a glob, or reads a file listing one repository path per line
+    ('#' starts a comment). Only directories containing .git are kept.
+    """
+    if os.path.isfile(spec):
+        with open(spec, 'r') as f:
+            candidates = [line.split("#", 1)[0].strip() for line in f]
+        base = os.path.dirname(os.path.abspath(spec))
+        candidates = [os.path.join(base, os.path.expanduser(c)) for c in candidates if c]
+    else:
+        candidates = glob.glob(os.path.expanduser(spec))
+
+    repos = []
+    for path in sorted(set(os.path.abspath(c) for c in candidates)):
+        if os.path.isdir(path) and os.path.exists(os.path.join(path, ".git")):
+            repos.append(path)
+    return repos
+
+class GitFanout:
+    """
+    Runs a git pipeline across many repositories with a worker pool. Each
+    repository gets its own recovery loop; resolutions that would prompt are
+    deferred and handled together once every repository has finished.
+    """
+
+    def __init__(self, dry_run: bool = False, workers: int = FANOUT_WORKERS, policy=None):
+        self.dry_run = dry_run
+        self.policy = policy
+        self.workers = max(1, workers)
+        self.classifier = Classifier(DATASET_DIR)
+        self.registry = build_git_registry()
+        self.decisions = DecisionQueue()
+
+    def run(self, spec: str, pipeline: str, message: str = "Update", interactive: bool = True) -> bool:
+        repos = resolve_repos(spec)
+        if not repos:
+            Renderer.print_error(f"No git repositories matched '{spec}'.")
+            return False
+
+        Renderer.print_info(f"Running '{pipeline}' across {len(repos)} repositories ({self.workers} workers)")
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            outcomes = list(pool.map(lambda repo: self._run_repo(repo, pipeline, message), repos))
+
+        self._print_summary(outcomes)
+
+        if interactive and len(self.decisions):
+            outcomes = self._resolve_deferred(outcomes, pipeline, message)
+            self._print_summary(outcomes, title="Outcome after deferred decisions")
+
+        return all(o["outcome"] == "ok" for o in outcomes)
+
+    def _run_repo(self, repo: str, pipeline: str, message: str, unattended: bool = True) -> Dict[str, Any]:
+        # Unattended runs send resolutions to the shared decision queue
+        queue = self.decisions if unattended else None
+        sm = WorkflowStateMachine(self.classifier, self.registry, self.dry_run, mode="git", cwd=repo, decision_queue=queue, policy=self.policy)
+        label = os.path.basename(repo)
+        start = time.monotonic()
+
+        try:
+            if pipeline == "daily_work":
+                results = sm.run_workflow("git_daily_work", {"message": message}, resume=False)
+            else:
+                graph = sync_with_main_graph(list_remotes(repo))
+                for step in graph.steps.values():
+                    step.desc = f"{label}: {step.desc}"
+                results = sm.execute_graph(graph)
+        except Exception as e:
+            Renderer.print_error(f"{label}: {e}")
+            results = {}
+
+        if results and all(results.values()):
+            outcome = "ok"
+        elif queue is not None and queue.for_cwd(repo):
+            outcome = "deferred"
+        else:
+            outcome = "failed"
+
+        return {
+            "repo": repo,
+            "outcome": outcome,
+            "steps_ok": sum(1 for ok in results.values() if ok),
+            "steps": len(results),
+            "seconds": time.monotonic() - start
+        }
+
+    def _resolve_deferred(self, outcomes: List[Dict[str, Any]], pipeline: str, message: str) -> List[Dict[str, Any]]:
+        """
+        Walks the consolidated decision queue one repository at a time and
+        re-runs its pipeline interactively so the resolvers can prompt.
+        """
+        Renderer.print_step(f"Decision Queue: {len(self.decisions)} pending resolution(s)")
+        resolved = []
+        for outcome in outcomes:
+            decisions = self.decisions.for_cwd(outcome["repo"])
+            if outcome["outcome"] != "deferred" or not decisions:
+                resolved.append(outcome)
+                continue
+
+            for d in decisions:
+                cmd = d.cmd_list if isinstance(d.cmd_list, str) else " ".join(d.cmd_list)
+                Renderer.print_info(f"{outcome['repo']}: {d.category} while running '{cmd}'")
+
+            prompter = Prompter(self.policy, decisions[0].category)
+            if not prompter.confirm(f"Resolve {os.path.basename(outcome['repo'])} now?", default=True):
+                resolved.append(outcome)
+                continue
+            resolved.append(self._run_repo(outcome["repo"], pipeline, message, unattended=False))
+        return resolved
+
+    def _print_summary(self, outcomes: List[Dict[str, Any]], title: str = "Fan-out Summary"):
+        rows = [
+            (o["repo"], o["outcome"].upper(), f"{o['steps_ok']}/{o['steps']}", f"{o['seconds']:.2f}s")
+            for o in outcomes
+        ]
+        Renderer.print_table(title, ["Repository", "Outcome", "Steps", "Time"], rows)
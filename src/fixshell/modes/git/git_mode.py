@@ -2,7 +2,6 @@
 import click
 import os
 import json
-import subprocess
 from .git_templates import GIT_MENU, GITIGNORE_CONTENT, CI_TEMPLATES
 from .git_validator import GitValidator
 from ...engine.classifier import Classifier
@@ -12,10 +11,42 @@ from ...engine.resolver_registry import (
     handle_directory_exists, handle_gh_auth_login
 )
 from ...engine.state_machine import WorkflowStateMachine
+from ...engine.step_graph import StepGraph
+from ...engine.git_queries import git_queries
 from ..github.github_context import GitHubContext
+from ...ui.context_panel import prompt_guard
+from ...ui.renderer import Renderer
+
+def build_git_registry() -> ResolverRegistry:
+    registry = ResolverRegistry()
+    registry.register("GIT_NO_UPSTREAM", handle_git_no_upstream, risk="low")
+    registry.register("GIT_NO_TRACKING_INFO", handle_git_no_tracking)
+    registry.register("GIT_UPSTREAM_MISMATCH", handle_git_upstream_mismatch)
+    registry.register("GIT_DELETE_CURRENT_BRANCH", handle_git_delete_current_branch, risk="high")
+    registry.register("FS_DIRECTORY_EXISTS", handle_directory_exists, risk="high")
+    registry.register("GH_AUTH_REQUIRED", handle_gh_auth_login, risk="low")
+    registry.register("AUTH_DENIED", handle_gh_auth_login, risk="low")
+    return registry
+
+def list_remotes(cwd: str = None) -> list:
+    try:
+        res = git_queries.query(["remote"], cwd=cwd)
+        return [r.strip() for r in res.stdout.splitlines() if r.strip()]
+    except Exception:
+        return []
+
+def sync_with_main_graph(remotes: list) -> StepGraph:
+    # Fetches from every remote are independent; only the merge waits on origin
+    graph = StepGraph()
+    remotes = remotes or ["origin"]
+    for remote in remotes:
+        graph.add_step(f"fetch:{remote}", ["git", "fetch", remote], f"Fetching updates from {remote}")
+    merge_deps = ["fetch:origin"] if "origin" in remotes else []
+    graph.add_step("merge", ["git", "merge", "origin/main"], "Merging main branch", depends_on=merge_deps)
+    return graph
 
 class GitMode:
-    def __init__(self, dry_run: bool = False):
+    def __init__(self, dry_run: bool = False, policy=None):
         self.dry_run = dry_run
         
         # 1. Initialize Engine
@@ -24,31 +55,21 @@ class GitMode:
         self.classifier = Classifier(dataset_dir)
         
         # 2. Setup Registries
-        self.registry = ResolverRegistry()
-        self.registry.register("GIT_NO_UPSTREAM", handle_git_no_upstream)
-        self.registry.register("GIT_NO_TRACKING_INFO", handle_git_no_tracking)
-        self.registry.register("GIT_UPSTREAM_MISMATCH", handle_git_upstream_mismatch)
-        self.registry.register("GIT_DELETE_CURRENT_BRANCH", handle_git_delete_current_branch)
-        self.registry.register("FS_DIRECTORY_EXISTS", handle_directory_exists)
-        self.registry.register("GH_AUTH_REQUIRED", handle_gh_auth_login)
-        self.registry.register("AUTH_DENIED", handle_gh_auth_login)
+        self.registry = build_git_registry()
         
         # 3. Instantiate core components
         self.context = GitHubContext(dry_run)
-        self.sm = WorkflowStateMachine(self.classifier, self.registry, dry_run, mode="git")
+        self.sm = WorkflowStateMachine(self.classifier, self.registry, dry_run, mode="git", policy=policy)
 
     def run_guided_workflow(self):
         while True:
-            click.clear()
-            self.context.refresh()
-            self.context.display(click)
-            
-            click.secho("🐙 Git Mode – Smart Workflow Engine", fg="magenta", bold=True)
-            
-            for key, val in GIT_MENU.items():
-                click.echo(f"{key}. {val}")
-            
-            choice = click.prompt("\nSelect an option", type=str, default="11")
+            # Redraws only the context rows that changed since the last pass
+            self.sm.refresh_context(self.context)
+
+            with prompt_guard():
+                Renderer.print_menu("🐙 Git Mode – Smart Workflow Engine", [f"{key}. {val}" for key, val in GIT_MENU.items()])
+
+                choice = click.prompt("\nSelect an option", type=str, default="11")
             
             if choice == "11": break
             elif choice == "1": self.start_new_project()
@@ -61,7 +82,7 @@ class GitMode:
             elif choice == "8": self.add_ci_workflow()
             elif choice == "9": self.show_status()
             elif choice == "10": self.sm.execute_step(["gh", "auth", "login"], "Login", context_manager=self.context, interactive=True)
-            else: click.secho("Invalid option.", fg="red")
+            else: Renderer.print_error("Invalid option.")
             
             if choice != "11":
                 input("\nPress Enter to return to menu...")
@@ -74,22 +95,18 @@ class GitMode:
 
     def daily_work(self):
         msg = click.prompt("Commit message", default="Update")
-        self.sm.execute_step(["git", "pull"], "Syncing (Pulling)", context_manager=self.context)
-        self.sm.execute_step(["git", "add", "."], "Staging changes", context_manager=self.context)
-        self.sm.execute_step(["git", "commit", "-m", msg], "Committing", context_manager=self.context)
-        self.sm.execute_step(["git", "push"], "Pushing to remote", context_manager=self.context)
+        self.sm.run_workflow("git_daily_work", {"message": msg}, context_manager=self.context)
 
     def create_feature_branch(self):
         branch = click.prompt("Feature branch name")
         self.sm.execute_step(["git", "checkout", "-b", branch], f"Creating branch '{branch}'", context_manager=self.context)
 
     def sync_with_main(self):
-        self.sm.execute_step(["git", "fetch", "origin"], "Fetching updates", context_manager=self.context)
-        self.sm.execute_step(["git", "merge", "origin/main"], "Merging main branch", context_manager=self.context)
+        self.sm.execute_graph(sync_with_main_graph(list_remotes()), context_manager=self.context)
 
     def resolve_merge_conflict(self):
         self.sm.execute_step(["git", "status"], "Checking status", context_manager=self.context)
-        click.echo("Please resolve conflicts in your editor, then stage the files.")
+        Renderer.print_info("Please resolve conflicts in your editor, then stage the files.")
         if click.confirm("Have you resolved the conflicts?", default=True):
             self.sm.execute_step(["git", "add", "."], "Staging resolved files", context_manager=self.context)
             self.sm.execute_step(["git", "commit", "--no-edit"], "Finalizing merge", context_manager=self.context)
@@ -99,14 +116,14 @@ class GitMode:
         self.sm.execute_step(["git", "branch", "-d", branch], f"Deleting branch '{branch}'", context_manager=self.context)
 
     def add_ci_workflow(self):
-        click.echo("1. Python CI\n2. Node CI")
+        Renderer.print_menu("", ["1. Python CI", "2. Node CI"])
         c = click.prompt("Choice", type=int)
         if c in [1, 2]:
             mode = "python" if c == 1 else "node"
             os.makedirs(".github/workflows", exist_ok=True)
             with open(f".github/workflows/{mode}-ci.yml", "w") as f:
                 f.write(CI_TEMPLATES[mode])
-            click.secho(f"✔ {mode.capitalize()} CI template added.", fg="green")
+            Renderer.print_success(f"{mode.capitalize()} CI template added.")
 
     def show_status(self):
         self.sm.execute_step(["git", "status", "-s"], "Showing short status", context_manager=self.context)
@@ -1,9 +1,10 @@
 
 import shutil
-import subprocess
 import os
-import re
 from typing import List, Tuple, Optional
+from ...engine.fix_template import is_branch_name
+from ...engine.git_queries import git_queries
+from ...engine.tracing import traced_run
 
 class GitValidator:
     """
@@ -28,7 +29,7 @@ class GitValidator:
 
         # 3. GH Authenticated
         try:
-            gh_auth = subprocess.run(["gh", "auth", "status"], capture_output=True, text=True)
+            gh_auth = traced_run(["gh", "auth", "status"], capture_output=True, text=True)
             if gh_auth.returncode == 0:
                 results.append((True, "GitHub CLI is authenticated."))
             else:
@@ -40,18 +41,19 @@ class GitValidator:
 
     @staticmethod
     def is_git_repo() -> bool:
-        return os.path.isdir(".git") or subprocess.run(["git", "rev-parse", "--is-inside-work-tree"], capture_output=True).returncode == 0
+        return os.path.isdir(".git") or git_queries.query(["rev-parse", "--is-inside-work-tree"]).returncode == 0
 
     @staticmethod
     def get_current_branch() -> str:
         try:
-            return subprocess.check_output(["git", "branch", "--show-current"], text=True).strip()
-        except:
+            res = git_queries.query(["branch", "--show-current"])
+        except Exception:
             return ""
+        return res.stdout.strip() if res.returncode == 0 else ""
 
     @staticmethod
     def is_working_dir_clean() -> bool:
-        status = subprocess.check_output(["git", "status", "--porcelain"], text=True)
+        status = traced_run(["git", "status", "--porcelain"], capture_output=True, text=True, check=True).stdout
         return len(status.strip()) == 0
 
     @staticmethod
@@ -64,18 +66,17 @@ class GitValidator:
 
     @staticmethod
     def is_detached_head() -> bool:
-        res = subprocess.run(["git", "symbolic-ref", "-q", "HEAD"], capture_output=True)
+        res = git_queries.query(["symbolic-ref", "-q", "HEAD"])
         return res.returncode != 0
 
     @staticmethod
     def validate_branch_name(name: str) -> bool:
-        # Simple regex for valid git branch names
-        if not name or " " in name: return False
-        return re.match(r"^[a-zA-Z0-9._\-/]+$", name) is not None
+        # Shared with the branch slots of dataset fix templates
+        return is_branch_name(name)
 
     @staticmethod
     def branch_exists(name: str) -> bool:
-        res = subprocess.run(["git", "show-ref", "--verify", f"refs/heads/{name}"], capture_output=True)
+        res = git_queries.query(["show-ref", "--verify", f"refs/heads/{name}"])
         return res.returncode == 0
 
     @staticmethod
@@ -85,5 +86,5 @@ class GitValidator:
 
     @staticmethod
     def has_upstream() -> bool:
-        res = subprocess.run(["git", "rev-parse", "--abbrev-ref", "--symbolic-full-name", "@{u}"], capture_output=True)
+        res = git_queries.query(["rev-parse", "--abbrev-ref", "--symbolic-full-name", "@{u}"])
         return res.returncode == 0
@@ -1,6 +1,7 @@
 
-import subprocess
-import os
+from ...engine.git_queries import git_queries
+from ...engine.tracing import traced_run
+from ...ui.renderer import Renderer
 
 class GitHubContext:
     def __init__(self, dry_run=False):
@@ -14,22 +15,31 @@ class GitHubContext:
         self.default_branch = "main"
 
     def refresh(self):
+        self.refresh_repo()
+        self.refresh_auth()
+
+    def refresh_repo(self):
         try:
             # 1. Check if Git repo
-            res = subprocess.run(["git", "rev-parse", "--is-inside-work-tree"], capture_output=True, text=True)
+            res = git_queries.query(["rev-parse", "--is-inside-work-tree"])
             self.is_repo = res.returncode == 0
             
             if self.is_repo:
                 # 2. Get Branch
-                b_res = subprocess.run(["git", "branch", "--show-current"], capture_output=True, text=True)
+                b_res = git_queries.query(["branch", "--show-current"])
                 self.branch = b_res.stdout.strip() or "DETACHED"
                 
                 # 3. Get Remote
-                r_res = subprocess.run(["git", "remote", "get-url", "origin"], capture_output=True, text=True)
+                r_res = git_queries.query(["remote", "get-url", "origin"])
                 self.remote_url = r_res.stdout.strip() if r_res.returncode == 0 else "None"
-            
+        except Exception:
+            pass
+
+    def refresh_auth(self):
+        # Network round-trip to GitHub; only re-run after auth may have changed
+        try:
             # 4. Get GH User
-            u_res = subprocess.run(["gh", "api", "user", "--template", "{{.login}}"], capture_output=True, text=True)
+            u_res = traced_run(["gh", "api", "user", "--template", "{{.login}}"], capture_output=True, text=True)
             if u_res.returncode == 0:
                 self.user = u_res.stdout.strip()
             else:
@@ -38,21 +48,11 @@ class GitHubContext:
         except Exception:
             pass
 
-    def display(self, click):
-        click.secho("-" * 56, fg="bright_black")
-        click.secho("🔎 CURRENT GITHUB CONTEXT", fg="cyan", bold=True)
-        click.secho("-" * 56, fg="bright_black")
-        
-        user_color = "green" if self.user != "Not Logged In" else "red"
-        click.echo(f"{'👤 User:':<18} " + click.style(self.user, fg=user_color))
-        
-        repo_status = "Yes" if self.is_repo else "No"
-        repo_color = "green" if self.is_repo else "red"
-        click.echo(f"{'📦 Is Git Repo:':<18} " + click.style(repo_status, fg=repo_color))
-        
+    def display(self):
+        rows = [
+            ("👤", "User", self.user, "green" if self.user != "Not Logged In" else "red"),
+            ("📦", "Is Git Repo", "Yes" if self.is_repo else "No", "green" if self.is_repo else "red"),
+        ]
         if self.is_repo:
-            click.echo(f"{'🌿 Branch:':<18} " + click.style(self.branch, fg="magenta"))
-            click.echo(f"{'🔗 Remote:':<18} " + click.style(self.remote_url, fg="blue"))
-            
-        click.secho("-" * 56, fg="bright_black")
-        click.echo("")
+            rows += [("🌿", "Branch", self.branch, "magenta"), ("🔗", "Remote", self.remote_url, "blue")]
+        Renderer.backend.context(rows)
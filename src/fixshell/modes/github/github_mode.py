@@ -12,9 +12,11 @@ from ...engine.resolver_registry import (
 from ...engine.state_machine import WorkflowStateMachine
 from .github_context import GitHubContext
 from .github_templates import GH_MAIN_MENU
+from ...ui.context_panel import prompt_guard
+from ...ui.renderer import Renderer
 
 class GitHubMode:
-    def __init__(self, dry_run: bool = False):
+    def __init__(self, dry_run: bool = False, policy=None):
         self.dry_run = dry_run
         
         # 1. Initialize Engine
@@ -24,25 +26,26 @@ class GitHubMode:
         
         # 2. Setup Registries
         self.registry = ResolverRegistry()
-        self.registry.register("GH_AUTH_REQUIRED", handle_gh_auth_login)
-        self.registry.register("GIT_NO_UPSTREAM", handle_git_no_upstream)
+        self.registry.register("GH_AUTH_REQUIRED", handle_gh_auth_login, risk="low")
+        self.registry.register("GIT_NO_UPSTREAM", handle_git_no_upstream, risk="low")
         self.registry.register("GIT_NO_TRACKING_INFO", handle_git_no_tracking)
         self.registry.register("GIT_UPSTREAM_MISMATCH", handle_git_upstream_mismatch)
-        self.registry.register("GIT_DELETE_CURRENT_BRANCH", handle_git_delete_current_branch)
-        self.registry.register("FS_DIRECTORY_EXISTS", handle_directory_exists)
+        self.registry.register("GIT_DELETE_CURRENT_BRANCH", handle_git_delete_current_branch, risk="high")
+        self.registry.register("FS_DIRECTORY_EXISTS", handle_directory_exists, risk="high")
         
         # 3. Instantiate core components
         self.context = GitHubContext(dry_run)
-        self.sm = WorkflowStateMachine(self.classifier, self.registry, dry_run, mode="github")
+        self.sm = WorkflowStateMachine(self.classifier, self.registry, dry_run, mode="github", policy=policy)
 
     def run_menu(self):
         while True:
-            click.clear()
-            self.context.refresh()
-            self.context.display(click)
-            
-            click.echo(GH_MAIN_MENU)
-            choice = click.prompt("Select an option", type=int, default=12)
+            # Redraws only the context rows that changed since the last pass
+            self.sm.refresh_context(self.context)
+
+            with prompt_guard():
+                title, *options = GH_MAIN_MENU.strip().splitlines()
+                Renderer.print_menu(title, options)
+                choice = click.prompt("Select an option", type=int, default=12)
             
             if choice == 12: break
             elif choice == 1: self.auth_menu()
@@ -56,16 +59,13 @@ class GitHubMode:
             elif choice == 9: self.manage_ci()
             elif choice == 10: self.manage_releases()
             elif choice == 11: self.sm.execute_step(["gh", "repo", "view"], "Showing Repo Details", context_manager=self.context)
-            else: click.secho("Invalid option.", fg="red")
+            else: Renderer.print_error("Invalid option.")
             
             if choice != 12:
                 input("\nPress Enter to continue...")
 
     def auth_menu(self):
-        click.clear()
-        self.context.refresh()
-        click.echo("\n--- GitHub Authentication ---")
-        click.echo("1. Login\n2. Logout\n3. Refresh Token\n4. Status\n5. Cancel")
+        Renderer.print_menu("--- GitHub Authentication ---", ["1. Login", "2. Logout", "3. Refresh Token", "4. Status", "5. Cancel"])
         c = click.prompt("Choice", type=int)
         if c == 1: self.sm.execute_step(["gh", "auth", "login"], "Login", context_manager=self.context, interactive=True)
         elif c == 2: self.sm.execute_step(["gh", "auth", "logout"], "Logout", context_manager=self.context)
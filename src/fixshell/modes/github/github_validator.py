@@ -1,5 +1,6 @@
-import subprocess
 import shutil
+from ...engine.git_queries import git_queries
+from ...engine.tracing import traced_run
 
 def is_git_installed() -> bool:
     return shutil.which("git") is not None
@@ -9,21 +10,21 @@ def is_gh_installed() -> bool:
 
 def has_remote() -> bool:
     try:
-        res = subprocess.run(["git", "remote"], capture_output=True, text=True)
+        res = git_queries.query(["remote"])
         return "origin" in res.stdout
     except Exception:
         return False
 
 def is_dirty() -> bool:
     try:
-        res = subprocess.run(["git", "status", "--porcelain"], capture_output=True, text=True)
+        res = traced_run(["git", "status", "--porcelain"], capture_output=True, text=True)
         return bool(res.stdout.strip())
     except Exception:
         return False
 
 def current_branch() -> str:
     try:
-        res = subprocess.run(["git", "branch", "--show-current"], capture_output=True, text=True)
+        res = git_queries.query(["branch", "--show-current"])
         return res.stdout.strip()
     except Exception:
         return ""
@@ -1,9 +1,10 @@
 import os
-import subprocess
 from ...engine.classifier import Classifier, ErrorCategory
+from ...engine.llm_diagnosis import LLMDiagnoser, OllamaBackend, DiagnosisCache
 from ...engine.resolver_registry import ResolverRegistry
 from ...engine.state_machine import WorkflowStateMachine
-from ...config import DATASET_DIR
+from ...engine.tracing import traced_run
+from ...config import DATASET_DIR, LLM_MODEL, LLM_URL, LLM_TIMEOUT, LLM_CACHE_DIR, LLM_CACHE_TTL, AI_EVIDENCE_THRESHOLD
 from ...ui.renderer import Renderer
 
 class LinuxMode:
@@ -12,11 +13,11 @@ class LinuxMode:
     and evidence-based scoring.
     """
 
-    def __init__(self, dry_run: bool = False):
+    def __init__(self, dry_run: bool = False, policy=None):
         self.dry_run = dry_run
         self.classifier = Classifier(DATASET_DIR)
         self.registry = ResolverRegistry()
-        self.sm = WorkflowStateMachine(self.classifier, self.registry, dry_run=dry_run, mode="linux")
+        self.sm = WorkflowStateMachine(self.classifier, self.registry, dry_run=dry_run, mode="linux", policy=policy)
 
     def diagnose_and_fix(self, cmd_list: list, use_ai: bool = False):
         if not cmd_list:
@@ -24,9 +25,13 @@ class LinuxMode:
             return
 
         if use_ai:
-            Renderer.print_info("🚀 AI-Powered Diagnosis enabled (using Ollama)")
-            # In a real implementation, this would call the LLM engine
-            # For v0.2.0, we prioritize deterministic paths.
+            model = LLM_MODEL.split("/", 1)[-1]
+            Renderer.print_info(f"🚀 AI-Powered Diagnosis enabled (Ollama '{model}' at {LLM_URL}, used only for unrecognized errors)")
+            self.classifier.ai = LLMDiagnoser(
+                OllamaBackend(LLM_URL, model=model, timeout=LLM_TIMEOUT),
+                cache=DiagnosisCache(LLM_CACHE_DIR, ttl=LLM_CACHE_TTL),
+                threshold=AI_EVIDENCE_THRESHOLD
+            )
         
         Renderer.print_info(f"Probing environment context for: {' '.join(cmd_list)}")
         
@@ -60,7 +65,7 @@ class LinuxMode:
         # Check for Port Conflicts
         if "server" in cmd_str or "listen" in cmd_str:
             # Probe: Check for suspicious open ports (generic check)
-            res = subprocess.run("ss -tulpn | wc -l", shell=True, capture_output=True, text=True)
+            res = traced_run("ss -tulpn | wc -l", shell=True, capture_output=True, text=True)
             if int(res.stdout.strip()) > 5:
                 score += 0.4
                 suspect = "PORT_CONFLICT"
@@ -68,7 +73,7 @@ class LinuxMode:
 
         # Check for Disk Issues
         if "write" in cmd_str or "save" in cmd_str or "install" in cmd_str:
-            res = subprocess.run("df / --output=pcent | tail -n 1", shell=True, capture_output=True, text=True)
+            res = traced_run("df / --output=pcent | tail -n 1", shell=True, capture_output=True, text=True)
             usage = int(res.stdout.strip().replace('%', ''))
             if usage > 90:
                 score += 0.8
@@ -1,38 +1,479 @@
+"""
+Imports thefuck rules (https://github.com/nvbn/thefuck) into FixShell datasets.
 
+Each rule module's match() is parsed with `ast`; the checks it makes against
+the command output (`'x' in command.output`, `.startswith`, `any(p in
+command.output for p in PATTERNS)`, `re.search(...)`) become one pattern:
+
+- a single literal is escaped as is,
+- alternatives become a non-capturing group,
+- literals that must all appear become lookaheads anchored at the start
+  (`\\A(?=[\\s\\S]*?a)(?=[\\s\\S]*?b)`), which scan the output once each instead
+  of backtracking over `a.*b`.
+
+Required literals are also stored as a `prefilter` so the matcher skips the
+regex when one of them is absent. `@for_app(...)`/`@git_support` and checks
+on the script (`'stash' in command.script_parts`, `command.script_parts[1]
+== 'pull'`, `'mkdir' in command.script`) become the rule's `commands`.
+Rules whose match() checks anything else (negations, helper calls, options)
+are reported and not imported: dropping the check would widen the rule. Rules already covered by a curated entry
+are dropped, and imported rules rank below curated ones. Patterns are
+checked with the dataset linter (`fixshell dataset lint`); rules it flags as
+errors are not imported.
+
+Usage:
+    python -m fixshell.tools.import_thefuck_rules [RULES_DIR] [--write]
+"""
+import argparse
+import ast
 import os
 import re
-from typing import List, Dict, Any
-
-def extract_rules_from_thefuck(rules_dir: str) -> List[Dict[str, Any]]:
-    extracted = []
-    if not os.path.exists(rules_dir): return []
-    for filename in os.listdir(rules_dir):
-        if filename.startswith("git_") and filename.endswith(".py"):
-            path = os.path.join(rules_dir, filename)
-            with open(path, 'r') as f:
-                content = f.read()
-                patterns = re.findall(r"'(.*?)' in command\.output", content)
-                if not patterns:
-                    patterns = re.findall(r"\"(.*?)\" in command\.output", content)
-                
-                if patterns:
-                    combined_pattern = ".*".join(patterns)
-                    extracted.append({
-                        "filename": filename,
-                        "potential_pattern": combined_pattern,
-                        "category": filename.replace(".py", "").upper()
-                    })
-    return extracted
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from ..engine.regex_lint import analyze, ERROR, WARNING, INFO
+from ..engine.rule_model import DATASET_FILES, Rule, RuleSet, load_dataset, write_dataset
 
-if __name__ == "__main__":
+SOURCE = "thefuck"
+# Output attributes of thefuck's Command object
+OUTPUT_ATTRS = {"output", "stdout", "stderr"}
+MODE_PREFIXES = (("git_", "git"), ("docker_", "docker"), ("gh_", "github"))
+MIN_LITERAL = 4
+
+# Output condition trees: ("lit", text) | ("re", pattern) | ("and", [...]) | ("or", [...])
+Node = Tuple[str, Any]
+# What a check constrains: (output condition, command tags), None where it
+# does not constrain that side
+Check = Tuple[Optional[Node], Optional[List[str]]]
+
+class UnsupportedRule(ValueError):
+    """
+    match() makes a check that has no dataset equivalent; importing the
+    rule without it would make it match far more than it does in thefuck.
+    """
+
+def _is_output(node: ast.AST) -> bool:
+    """
+    command.output, command.output.lower(), command.stderr.strip(), ...
+    """
+    while isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr in ("lower", "strip", "rstrip", "lstrip", "casefold"):
+        node = node.func.value
+    return isinstance(node, ast.Attribute) and node.attr in OUTPUT_ATTRS
+
+def _script_attr(node: ast.AST) -> Optional[str]:
+    """
+    "script" or "script_parts" for command.script / command.script_parts.
+    """
+    if isinstance(node, ast.Attribute) and node.attr in ("script", "script_parts") and isinstance(node.value, ast.Name):
+        return node.attr
+    return None
+
+def _strings(node: ast.AST, constants: Dict[str, List[str]]) -> Optional[List[str]]:
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return [node.value]
+    if isinstance(node, ast.Name):
+        return constants.get(node.id)
+    if isinstance(node, (ast.List, ast.Tuple, ast.Set)):
+        values = [e.value for e in node.elts if isinstance(e, ast.Constant) and isinstance(e.value, str)]
+        return values if len(values) == len(node.elts) else None
+    return None
+
+def _module_constants(tree: ast.Module) -> Dict[str, List[str]]:
+    constants = {}
+    for stmt in tree.body:
+        if isinstance(stmt, ast.Assign) and len(stmt.targets) == 1 and isinstance(stmt.targets[0], ast.Name):
+            values = _strings(stmt.value, {})
+            if values:
+                constants[stmt.targets[0].id] = values
+    return constants
+
+def _either(values: List[str], kind: str = "lit") -> Optional[Node]:
+    if not values:
+        return None
+    nodes = [(kind, v) for v in values]
+    return nodes[0] if len(nodes) == 1 else ("or", nodes)
+
+def _tags(text: str, apps: List[str], index: Optional[int] = None) -> List[str]:
+    """
+    Command tags for a script check: `text` in command.script (index None)
+    or command.script_parts[index] == text. Checks on options or on later
+    arguments are narrower than any tag and raise UnsupportedRule.
+    """
+    words = text.lower().split()
+    if not words or any(w.startswith("-") for w in words) or (index is not None and len(words) != 1):
+        raise UnsupportedRule(f"script check on {text!r}")
+    if index == 0 or (index is None and (not apps or words[0] in apps)):
+        if len(words) > 2:
+            raise UnsupportedRule(f"script check on {text!r}")
+        return [" ".join(words)]
+    if (index is None or index == 1) and apps and len(words) == 1:
+        return [f"{app} {words[0]}" for app in apps]
+    raise UnsupportedRule(f"script check on {text!r}")
+
+def _narrow(first: List[str], second: List[str]) -> List[str]:
+    """
+    Tags satisfying both lists: "git stash" narrows "git".
+    """
+    tags = [a for a in first if any(a == b or a.startswith(b + " ") for b in second)]
+    tags += [b for b in second if any(b.startswith(a + " ") for a in first)]
+    if not tags:
+        raise UnsupportedRule(f"contradictory command checks {first!r} and {second!r}")
+    return list(dict.fromkeys(tags))
+
+def _all(checks: List[Check]) -> Check:
+    outputs = [o for o, _ in checks if o]
+    commands = None
+    for _, tags in checks:
+        if tags:
+            commands = tags if commands is None else _narrow(commands, tags)
+    output = None if not outputs else outputs[0] if len(outputs) == 1 else ("and", outputs)
+    return output, commands
+
+def _any(checks: List[Check]) -> Check:
+    if len(checks) == 1:
+        return checks[0]
+    if any(o is None and t is None for o, t in checks):
+        # One alternative constrains nothing
+        return None, None
+    if all(t is None for _, t in checks):
+        return ("or", [o for o, _ in checks]), None
+    if all(o is None for o, _ in checks):
+        return None, list(dict.fromkeys(tag for _, tags in checks for tag in tags))
+    raise UnsupportedRule("`or` between command and output checks")
+
+def _condition(node: ast.AST, constants: Dict[str, List[str]], apps: List[str]) -> Check:
+    """
+    What the expression `node` checks. Script checks become command tags;
+    anything else that could narrow the rule (negations, helper calls,
+    environment lookups) raises UnsupportedRule.
+    """
+    if isinstance(node, ast.BoolOp):
+        checks = [_condition(v, constants, apps) for v in node.values]
+        return _all(checks) if isinstance(node.op, ast.And) else _any(checks)
+
+    # `if command.script_parts` / `len(command.script_parts) > 1` only guard indexing
+    if _script_attr(node):
+        return None, None
+    if isinstance(node, ast.Compare) and isinstance(node.left, ast.Call) and getattr(node.left.func, "id", None) == "len" and node.left.args and _script_attr(node.left.args[0]):
+        return None, None
+
+    if isinstance(node, ast.Call) and getattr(node.func, "id", None) == "bool" and len(node.args) == 1:
+        return _condition(node.args[0], constants, apps)
+    if isinstance(node, ast.Compare) and len(node.ops) == 1 and isinstance(node.ops[0], ast.IsNot) and isinstance(node.comparators[0], ast.Constant) and node.comparators[0].value is None:
+        return _condition(node.left, constants, apps)
+
+    if isinstance(node, ast.Compare) and len(node.ops) == 1 and isinstance(node.ops[0], ast.In):
+        values = _strings(node.left, constants)
+        if values and _is_output(node.comparators[0]):
+            return _either(values), None
+        if values and _script_attr(node.comparators[0]):
+            return None, [tag for v in values for tag in _tags(v, apps)]
+
+    # command.script_parts[1] == 'stash' / command.script_parts[0] in ('pacman', 'yay')
+    if isinstance(node, ast.Compare) and len(node.ops) == 1 and isinstance(node.ops[0], (ast.Eq, ast.In)):
+        part, value = node.left, node.comparators[0]
+        if isinstance(value, ast.Subscript) and isinstance(node.ops[0], ast.Eq):
+            part, value = value, part
+        values = _strings(value, constants) if isinstance(node.ops[0], ast.In) else _strings(value, {}) if isinstance(value, ast.Constant) else None
+        if (values and isinstance(part, ast.Subscript) and _script_attr(part.value) == "script_parts"
+                and isinstance(part.slice, ast.Constant) and isinstance(part.slice.value, int)):
+            return None, [tag for v in values for tag in _tags(v, apps, index=part.slice.value)]
+
+    if isinstance(node, ast.Call):
+        func = node.func
+        # command.output.startswith('x') / endswith(('x', 'y'))
+        if isinstance(func, ast.Attribute) and func.attr in ("startswith", "endswith") and node.args:
+            values = _strings(node.args[0], constants)
+            if values and _is_output(func.value):
+                return _either(values), None
+            if values and func.attr == "startswith" and _script_attr(func.value) == "script":
+                return None, [tag for v in values for tag in _tags(v, apps)]
+        # re.search(r'...', command.output) / re.match / re.findall
+        if isinstance(func, ast.Attribute) and func.attr in ("search", "match", "findall") and len(node.args) >= 2 and _is_output(node.args[1]):
+            values = _strings(node.args[0], constants)
+            if values:
+                return _either(values, kind="re"), None
+        # any(('x' in command.output, 'y' in command.output))
+        if isinstance(func, ast.Name) and func.id == "any" and node.args and isinstance(node.args[0], (ast.Tuple, ast.List)):
+            return _any([_condition(e, constants, apps) for e in node.args[0].elts])
+        # any('x' in command.output for x in PATTERNS)
+        if isinstance(func, ast.Name) and func.id == "any" and node.args and isinstance(node.args[0], ast.GeneratorExp):
+            gen = node.args[0]
+            elt, comp = gen.elt, gen.generators[0]
+            if (len(gen.generators) == 1 and isinstance(elt, ast.Compare) and isinstance(elt.ops[0], ast.In)
+                    and isinstance(elt.left, ast.Name) and isinstance(comp.target, ast.Name)
+                    and elt.left.id == comp.target.id and _is_output(elt.comparators[0])):
+                values = _strings(comp.iter, constants)
+                if values:
+                    return _either(values), None
+    raise UnsupportedRule(f"cannot translate `{ast.unparse(node)}`")
+
+def _returns(stmts: List[ast.stmt]) -> bool:
+    return bool(stmts) and isinstance(stmts[-1], ast.Return)
+
+def _paths(stmts: List[ast.stmt], guards: List[ast.AST]) -> List[List[ast.AST]]:
+    """
+    For each `return` in stmts that can return a true value, the tests of
+    the enclosing `if`s plus the returned expression.
+    """
+    paths = []
+    for stmt in stmts:
+        if isinstance(stmt, ast.Expr) and isinstance(stmt.value, ast.Constant):
+            continue
+        if isinstance(stmt, ast.Return):
+            value = stmt.value
+            if value is not None and not (isinstance(value, ast.Constant) and not value.value):
+                paths.append(guards + ([] if isinstance(value, ast.Constant) else [value]))
+            return paths
+        if not isinstance(stmt, ast.If):
+            raise UnsupportedRule(f"match() runs `{type(stmt).__name__.lower()}` statements")
+        negated = ast.UnaryOp(op=ast.Not(), operand=stmt.test)
+        paths += _paths(stmt.body, guards + [stmt.test])
+        paths += _paths(stmt.orelse, guards + [negated])
+        if _returns(stmt.body) and _returns(stmt.orelse):
+            return paths
+        if _returns(stmt.body):
+            # After `if a: return True`, `a or (not a and b)` is just `a or b`
+            if not (len(stmt.body) == 1 and isinstance(stmt.body[0].value, ast.Constant) and stmt.body[0].value.value):
+                guards = guards + [negated]
+        elif _returns(stmt.orelse):
+            guards = guards + [stmt.test]
+    return paths
+
+def _match_condition(tree: ast.Module, apps: List[str]) -> Check:
+    constants = _module_constants(tree)
+    for stmt in tree.body:
+        if isinstance(stmt, ast.FunctionDef) and stmt.name == "match":
+            paths = _paths(stmt.body, [])
+            if not paths:
+                return None, None
+            return _any([_all([_condition(n, constants, apps) for n in path]) for path in paths])
+    return None, None
+
+def _suggestion(tree: ast.Module) -> Optional[str]:
+    """
+    A literal command returned by get_new_command(), if there is one.
+    """
+    for stmt in tree.body:
+        if isinstance(stmt, ast.FunctionDef) and stmt.name == "get_new_command":
+            for node in ast.walk(stmt):
+                if isinstance(node, ast.Return) and isinstance(node.value, ast.Constant) and isinstance(node.value.value, str):
+                    return node.value.value
+    return None
+
+def _apps(tree: ast.Module) -> List[str]:
+    """
+    Commands named by match()'s @for_app(...) decorator (`@git_support`
+    means git).
+    """
+    for stmt in tree.body:
+        if isinstance(stmt, ast.FunctionDef) and stmt.name == "match":
+            apps = []
+            for dec in stmt.decorator_list:
+                name = dec.func if isinstance(dec, ast.Call) else dec
+                name = name.attr if isinstance(name, ast.Attribute) else getattr(name, "id", "")
+                if name == "git_support":
+                    apps.append("git")
+                elif name == "for_app" and isinstance(dec, ast.Call):
+                    apps.extend(a.value for a in dec.args if isinstance(a, ast.Constant) and isinstance(a.value, str))
+            return apps
+    return []
+
+def to_pattern(node: Node) -> str:
+    kind, value = node
+    if kind == "lit":
+        return re.escape(value)
+    if kind == "re":
+        return value
+    if kind == "or":
+        return "(?:" + "|".join(to_pattern(n) for n in value) + ")"
+    return r"\A" + "".join(rf"(?=[\s\S]*?{to_pattern(n)})" for n in value)
+
+def required_literals(node: Node) -> List[str]:
+    kind, value = node
+    if kind == "lit":
+        return [value.lower()]
+    if kind == "and":
+        return list(dict.fromkeys(lit for n in value for lit in required_literals(n)))
+    return []
+
+def sample_text(node: Node) -> str:
+    """
+    Text the condition matches when every literal is present (regex leaves
+    are skipped), used to detect curated rules that already cover it.
+    """
+    kind, value = node
+    if kind == "lit":
+        return value
+    if kind == "or":
+        return sample_text(value[0])
+    if kind == "and":
+        return "\n".join(sample_text(n) for n in value)
+    return ""
+
+def _literals(node: Node) -> List[str]:
+    kind, value = node
+    if kind == "lit":
+        return [value]
+    if kind in ("and", "or"):
+        return [lit for n in value for lit in _literals(n)]
+    return []
+
+def pattern_warnings(pattern: str, node: Optional[Node] = None) -> List[Tuple[str, str]]:
+    """
+    Static cost findings for an imported pattern, as (severity, message).
+    """
+    warnings = list(analyze(pattern)["findings"])
+    if node is not None:
+        short = [lit for lit in _literals(node) if len(lit.strip()) < MIN_LITERAL]
+        if short:
+            warnings.append((WARNING, f"short literal(s) {short!r} match too broadly"))
+        if node[0] == "re" or (node[0] == "or" and any(n[0] == "re" for n in node[1])):
+            warnings.append((INFO, "regex copied verbatim from the rule"))
+    return warnings
+
+def mode_for(filename: str) -> str:
+    for prefix, mode in MODE_PREFIXES:
+        if filename.startswith(prefix):
+            return mode
+    return "linux"
+
+def parse_rule(source: str, filename: str) -> Optional[Dict[str, Any]]:
+    """
+    Converts one thefuck rule module into a dataset entry, or None when its
+    match() does not look at the command output. Raises UnsupportedRule
+    when match() checks something a dataset entry cannot express.
+    """
+    try:
+        tree = ast.parse(source, filename=filename)
+    except SyntaxError:
+        return None
+    apps = _apps(tree)
+    node, commands = _match_condition(tree, apps)
+    if node is None:
+        return None
+    if apps:
+        commands = _narrow(apps, commands) if commands else apps
+
+    stem = os.path.splitext(os.path.basename(filename))[0]
+    prefilter = required_literals(node)
+    suggestion = _suggestion(tree)
+    entry = {
+        "error_pattern": to_pattern(node),
+        "category": f"TF_{stem.upper()}",
+        "type": "RECOVERABLE",
+        # Curated rules outrank imported ones whatever their priority; among
+        # imported rules, more required literals mean a more specific rule
+        "priority": min(1 + len(prefilter), 4),
+        "suggested_fix": [f"Try: {suggestion}" if suggestion else f"See thefuck rule '{stem}' for the usual fix."],
+        "source": SOURCE,
+    }
+    if commands:
+        entry["commands"] = commands
+    if prefilter:
+        entry["prefilter"] = prefilter
+    return {"mode": mode_for(stem), "entry": entry, "sample": sample_text(node), "warnings": pattern_warnings(entry["error_pattern"], node)}
+
+def load_datasets(dataset_dir: str) -> Dict[str, List[Rule]]:
+    datasets = {}
+    for mode, filename in DATASET_FILES.items():
+        path = os.path.join(dataset_dir, filename)
+        datasets[mode] = load_dataset(path, mode) if os.path.exists(path) else []
+    return datasets
+
+def _covered(rule: Dict[str, Any], existing: RuleSet) -> Optional[str]:
+    """
+    Category of a rule that already matches what `rule` matches.
+    """
+    category = rule["entry"]["category"]
+    if category in existing:
+        return category
+    if rule["sample"]:
+        for entry in existing:
+            if entry.compiled.search(rule["sample"]):
+                return entry.category
+    return None
+
+def import_rules(rules_dir: str, dataset_dir: str) -> Dict[str, Any]:
+    """
+    Parses every rule module under rules_dir and merges the new rules into
+    the datasets in memory. Returns the merged datasets and a report.
+    """
+    started = time.perf_counter()
+    datasets = load_datasets(dataset_dir)
+    # Re-imports replace earlier imports instead of deduplicating against them
+    for mode, rules in datasets.items():
+        datasets[mode] = [r for r in rules if r.source != SOURCE]
+    existing = RuleSet([r for rules in datasets.values() for r in rules])
+
+    report = {"parsed": 0, "imported": [], "duplicates": [], "skipped": [], "unsupported": [], "warnings": {}}
+    seen = set()
+    for filename in sorted(os.listdir(rules_dir)):
+        if not filename.endswith(".py") or filename.startswith("__"):
+            continue
+        with open(os.path.join(rules_dir, filename), encoding="utf-8") as f:
+            source = f.read()
+        report["parsed"] += 1
+        try:
+            rule = parse_rule(source, filename)
+        except UnsupportedRule as e:
+            report["unsupported"].append((filename, str(e)))
+            continue
+        if rule is None:
+            report["skipped"].append(filename)
+            continue
+        entry = rule["entry"]
+        key = (entry["error_pattern"], tuple(entry.get("commands", ())))
+        covered = _covered(rule, existing)
+        if covered or key in seen:
+            report["duplicates"].append((filename, covered or "imported twice"))
+            continue
+        if any(severity == ERROR for severity, _ in rule["warnings"]):
+            report["skipped"].append(filename)
+            report["warnings"][filename] = rule["warnings"]
+            continue
+        if rule["warnings"]:
+            report["warnings"][filename] = rule["warnings"]
+        seen.add(key)
+        datasets[rule["mode"]].append(Rule.from_dict(entry, mode=rule["mode"]))
+        report["imported"].append((filename, rule["mode"], entry["category"]))
+
+    report["seconds"] = round(time.perf_counter() - started, 3)
+    return {"datasets": datasets, "report": report}
+
+def write_datasets(datasets: Dict[str, List[Rule]], dataset_dir: str):
+    for mode, rules in datasets.items():
+        write_dataset(os.path.join(dataset_dir, DATASET_FILES[mode]), rules, mode)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from ..config import DATASET_DIR
     base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-    thefuck_rules = os.path.join(base_dir, "external/thefuck/thefuck/rules")
-    
-    if os.path.exists(thefuck_rules):
-        print(f"🔍 Analyzing rules in {thefuck_rules}...")
-        rules = extract_rules_from_thefuck(thefuck_rules)
-        print(f"✅ Found {len(rules)} potential Git rules to adapt.")
-        for r in rules[:5]:
-            print(f"  - {r['filename']}: {r['potential_pattern']}")
-    else:
-        print(f"❌ Could not find thefuck rules at {thefuck_rules}")
+    parser = argparse.ArgumentParser(description="Import thefuck rules into FixShell datasets.")
+    parser.add_argument("rules_dir", nargs="?", default=os.path.join(base_dir, "external/thefuck/thefuck/rules"))
+    parser.add_argument("--datasets", default=DATASET_DIR, help="Dataset directory to merge into.")
+    parser.add_argument("--write", action="store_true", help="Write the merged datasets (default: report only).")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.rules_dir):
+        print(f"❌ Could not find thefuck rules at {args.rules_dir}")
+        return 1
+
+    print(f"🔍 Analyzing rules in {args.rules_dir}...")
+    result = import_rules(args.rules_dir, args.datasets)
+    report = result["report"]
+    for filename, warnings in report["warnings"].items():
+        for severity, warning in warnings:
+            print(f"  ⚠️  {filename}: [{severity}] {warning}")
+    for filename, reason in report["unsupported"]:
+        print(f"  ⚠️  {filename}: not imported, {reason}")
+    print(f"✅ Parsed {report['parsed']} rules in {report['seconds']}s: {len(report['imported'])} imported, "
+          f"{len(report['duplicates'])} duplicates, {len(report['skipped'])} without usable output checks, "
+          f"{len(report['unsupported'])} with checks datasets cannot express.")
+
+    if args.write:
+        write_datasets(result["datasets"], args.datasets)
+        print(f"💾 Datasets written to {args.datasets}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,274 @@
+import json
+import re
+import sys
+import time
+from rich.console import Console
+from rich.markup import escape
+from rich.panel import Panel
+from rich.table import Table
+from rich.text import Text
+from rich.theme import Theme
+from rich.box import ROUNDED, DOUBLE_EDGE
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+# Custom theme for FixShell
+fixshell_theme = Theme({
+    "info": "cyan",
+    "warning": "yellow",
+    "error": "red bold",
+    "success": "green bold",
+    "command": "bright_white on grey11 bold",
+    "step": "magenta bold",
+    "banner": "bright_blue bold",
+})
+
+console = Console(theme=fixshell_theme)
+
+# Raw stderr kept in fatal reports (head + tail, the tail usually holds the error)
+MAX_RAW_ERROR = 4000
+_MARKUP = re.compile(r"\[/?[a-z_ ]+\]")
+
+# (icon, name, value, style) rows of the context panel
+ContextRow = Tuple[str, str, Any, str]
+
+def truncate(text: str, limit: int = MAX_RAW_ERROR) -> str:
+    text = text or ""
+    if len(text) <= limit:
+        return text
+    head = limit // 4
+    tail = limit - head
+    return f"{text[:head]}\n… [{len(text) - limit} characters omitted] …\n{text[-tail:]}"
+
+def strip_markup(msg: str) -> str:
+    return _MARKUP.sub("", msg)
+
+class RichBackend:
+    """
+    Interactive terminal output: panels, tables and colour.
+    """
+
+    name = "rich"
+
+    def banner(self, text: str):
+        console.print(Panel(
+            Text(text.upper(), justify="center", style="banner"),
+            box=DOUBLE_EDGE,
+            padding=(1, 2)
+        ))
+
+    def step(self, desc: str):
+        console.print(f"\n[step]🚀 {desc}[/step]")
+
+    def command(self, cmd: str):
+        # Premium command display box
+        console.print(Panel(
+            Text(f" $ {cmd} ", style="command"),
+            box=ROUNDED,
+            title="[dim]PLAN[/dim]",
+            title_align="left",
+            border_style="bright_black"
+        ))
+
+    def success(self, msg: str):
+        console.print(f"   [success]✔ {msg}[/success]")
+
+    def error(self, msg: str):
+        console.print(f"   [error]❌ {msg}[/error]")
+
+    def info(self, msg: str):
+        console.print(f"   [info]ℹ {msg}[/info]")
+
+    def warning(self, msg: str):
+        console.print(f"\n[warning]⚠ {msg}[/warning]")
+
+    def menu(self, title: str, options: Sequence[str]):
+        if title:
+            console.print(f"\n[bold cyan]{escape(title)}[/bold cyan]")
+        for option in options:
+            console.print(escape(option), highlight=False)
+
+    def preview(self, purpose: str, risk: str):
+        color = "red" if risk == "high" else "yellow" if risk == "medium" else "green"
+        console.print(f"   [dim]→ Purpose: {escape(purpose)}[/dim]")
+        console.print(f"   [{color}]→ Risk: {risk.upper()}[/{color}]")
+
+    def resolution(self, category: str):
+        console.print(Panel(
+            f"[warning]💊 Needs Resolution:[/warning] [bold]{category}[/bold]\n"
+            f"[dim]Attempting to Shift State...[/dim]",
+            border_style="yellow",
+            box=ROUNDED
+        ))
+
+    def fatal(self, category: str, suggestion: str, raw_error: str):
+        console.print("\n")
+        console.print(Panel(
+            Text.assemble(
+                ("FATAL ERROR: UNRECOVERABLE\n", "error"),
+                (f"Category: {category}\n\n", "white"),
+                ("Suggestion: ", "cyan"), (f"{suggestion}\n\n", "white"),
+                ("Raw Stderr:\n", "dim"), (truncate(raw_error), "red dim")
+            ),
+            title="[error]CRITICAL FAILURE[/error]",
+            border_style="red",
+            box=DOUBLE_EDGE
+        ))
+
+    def table(self, title: str, columns: Sequence[str], rows: Sequence[Sequence[Any]]):
+        table = Table(title=f"[bold cyan]{title}[/bold cyan]", box=ROUNDED, border_style="bright_black")
+        for col in columns:
+            table.add_column(col)
+        for row in rows:
+            table.add_row(*[str(v) for v in row])
+        console.print(table)
+
+    def context(self, rows: Sequence[ContextRow]):
+        table = Table(show_header=False, box=None, padding=(0, 2))
+        table.add_column("Icon", no_wrap=True)
+        table.add_column("Value", no_wrap=True)
+        for icon, name, val, color in rows:
+            table.add_row(
+                Text(f"{icon} {name}", style="bold white"),
+                Text(str(val), style=color)
+            )
+
+        console.print(Panel(
+            table,
+            title="[bold cyan]SYSTEM CONTEXT[/bold cyan]",
+            border_style="bright_black",
+            expand=False,
+            padding=(0, 2)
+        ))
+        console.print("")
+
+class PlainBackend:
+    """
+    Uncoloured line output for pipes, CI logs and batch runs. Writes
+    straight to the stream without building renderables.
+    """
+
+    name = "plain"
+
+    def __init__(self, stream=None):
+        self._stream = stream
+
+    def _write(self, line: str):
+        (self._stream or sys.stdout).write(line + "\n")
+
+    def banner(self, text: str):
+        self._write(f"== {text.upper()} ==")
+
+    def step(self, desc: str):
+        self._write(f"\n==> {strip_markup(desc)}")
+
+    def command(self, cmd: str):
+        self._write(f"    $ {cmd}")
+
+    def success(self, msg: str):
+        self._write(f"    OK: {strip_markup(msg)}")
+
+    def error(self, msg: str):
+        self._write(f"    ERROR: {strip_markup(msg)}")
+
+    def info(self, msg: str):
+        self._write(f"    {strip_markup(msg)}")
+
+    def warning(self, msg: str):
+        self._write(f"    WARNING: {strip_markup(msg)}")
+
+    def menu(self, title: str, options: Sequence[str]):
+        if title:
+            self._write(title)
+        for option in options:
+            self._write(f"  {option}")
+
+    def preview(self, purpose: str, risk: str):
+        self._write(f"    Purpose: {purpose}")
+        self._write(f"    Risk: {risk.upper()}")
+
+    def resolution(self, category: str):
+        self._write(f"    NEEDS RESOLUTION: {category}")
+
+    def fatal(self, category: str, suggestion: str, raw_error: str):
+        self._write(f"FATAL: {category}")
+        self._write(f"Suggestion: {suggestion}")
+        self._write("Raw stderr:")
+        self._write(truncate(raw_error).rstrip())
+
+    def table(self, title: str, columns: Sequence[str], rows: Sequence[Sequence[Any]]):
+        cells = [list(columns)] + [[str(v) for v in row] for row in rows]
+        widths = [max(len(r[i]) for r in cells) for i in range(len(columns))]
+        self._write(title)
+        for row in cells:
+            self._write("  ".join(v.ljust(w) for v, w in zip(row, widths)).rstrip())
+
+    def context(self, rows: Sequence[ContextRow]):
+        self._write(" | ".join(f"{name}: {val}" for _, name, val, _ in rows))
+
+class JsonBackend:
+    """
+    Machine-readable output: one JSON object per line (JSON Lines).
+    """
+
+    name = "json"
+
+    def __init__(self, stream=None):
+        self._stream = stream
+
+    def _emit(self, kind: str, **fields):
+        record = {"type": kind, "ts": round(time.time(), 3)}
+        record.update(fields)
+        (self._stream or sys.stdout).write(json.dumps(record, default=str, ensure_ascii=False) + "\n")
+
+    def banner(self, text: str):
+        pass
+
+    def step(self, desc: str):
+        self._emit("step", desc=strip_markup(desc))
+
+    def command(self, cmd: str):
+        self._emit("command", cmd=cmd)
+
+    def success(self, msg: str):
+        self._emit("success", msg=strip_markup(msg))
+
+    def error(self, msg: str):
+        self._emit("error", msg=strip_markup(msg))
+
+    def info(self, msg: str):
+        self._emit("info", msg=strip_markup(msg))
+
+    def warning(self, msg: str):
+        self._emit("warning", msg=strip_markup(msg))
+
+    def menu(self, title: str, options: Sequence[str]):
+        self._emit("menu", title=title, options=list(options))
+
+    def preview(self, purpose: str, risk: str):
+        self._emit("preview", purpose=purpose, risk=risk)
+
+    def resolution(self, category: str):
+        self._emit("resolution", category=category)
+
+    def fatal(self, category: str, suggestion: str, raw_error: str):
+        raw = raw_error or ""
+        self._emit("fatal", category=category, suggestion=suggestion, stderr=truncate(raw), truncated=len(raw) > MAX_RAW_ERROR)
+
+    def table(self, title: str, columns: Sequence[str], rows: Sequence[Sequence[Any]]):
+        self._emit("table", title=title, columns=list(columns), rows=[[str(v) for v in row] for row in rows])
+
+    def context(self, rows: Sequence[ContextRow]):
+        self._emit("context", state={name: val for _, name, val, _ in rows})
+
+BACKENDS = {"rich": RichBackend, "plain": PlainBackend, "json": JsonBackend}
+
+def select_backend(name: Optional[str] = "auto", stream=None):
+    """
+    'auto' picks rich for an interactive terminal and plain otherwise.
+    """
+    if not name or name == "auto":
+        stream = stream or sys.stdout
+        name = "rich" if hasattr(stream, "isatty") and stream.isatty() else "plain"
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown output backend '{name}' (expected auto, {', '.join(BACKENDS)}).")
+    return BACKENDS[name]()
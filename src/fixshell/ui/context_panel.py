@@ -1,45 +1,166 @@
-from rich.console import Console
-from rich.table import Table
+import contextlib
+import threading
+from rich.live import Live
 from rich.panel import Panel
-from rich.layout import Layout
+from rich.table import Table
 from rich.text import Text
-from typing import Dict, Any
+from typing import Callable, Dict, Any, List, Optional, Sequence, Tuple
+from .backends import RichBackend, console
+from .renderer import Renderer
+
+# (icon, name, state keys it reads, value(state), style(state))
+RowSpec = Tuple[str, str, Tuple[str, ...], Callable[[Dict[str, Any]], Any], Callable[[Dict[str, Any]], str]]
+
+def _os_value(state: Dict[str, Any]) -> str:
+    distro = state.get('DISTRO_STATE', {})
+    return f"{distro.get('pretty_name', state.get('OS_STATE', 'N/A'))} ({distro.get('codename', 'N/A')}/{state.get('ARCH_STATE', 'N/A')})"
 
-console = Console()
+# CATEGORIES: AUTH, REPO, BRANCH, NETWORK, etc.
+ROWS: List[RowSpec] = [
+    ("👤", "USER", ("AUTH_STATE",), lambda s: s.get("AUTH_STATE", "Unknown"), lambda s: "green" if s.get("AUTH_STATE") != "Unknown" else "red"),
+    ("🌿", "BRANCH", ("BRANCH_STATE",), lambda s: s.get("BRANCH_STATE", "N/A"), lambda s: "magenta"),
+    ("📦", "REPO", ("REPO_STATE",), lambda s: s.get("REPO_STATE", "No"), lambda s: "cyan"),
+    ("🔗", "REMOTE", ("REMOTE_STATE",), lambda s: s.get("REMOTE_STATE"), lambda s: "cyan"),
+    ("🌐", "NETWORK", ("NETWORK_STATE",), lambda s: s.get("NETWORK_STATE", "Unchecked"), lambda s: "red" if s.get("NETWORK_STATE") in ("Offline", "DNS Failure") else "blue"),
+    ("🖥️ ", "OS", ("DISTRO_STATE", "OS_STATE", "ARCH_STATE"), _os_value, lambda s: "white"),
+    ("🔒", "PERMS", ("PERMISSION_STATE",), lambda s: s.get("PERMISSION_STATE", "User"), lambda s: "yellow"),
+    ("⚙️ ", "STEP", ("WORKFLOW_STATE",), lambda s: s.get("WORKFLOW_STATE"), lambda s: "bright_black"),
+]
 
 class ContextPanel:
     """
-    Renders the state-aware dashboard showing the current health and 
+    Renders the state-aware dashboard showing the current health and
     context of the dev environment.
     """
 
+    @staticmethod
+    def rows(state: Dict[str, Any], names: Optional[Sequence[str]] = None):
+        # Rows whose state key is absent (e.g. REMOTE outside git modes) are hidden
+        return [
+            (icon, name, value(state), style(state))
+            for icon, name, keys, value, style in ROWS
+            if (names is None or name in names) and (name not in ("REMOTE", "STEP") or keys[0] in state)
+        ]
+
     @staticmethod
     def render(state: Dict[str, Any]):
+        Renderer.backend.context(ContextPanel.rows(state))
+
+# Panel currently owning a live region; prompts must pause it first
+_active: Optional["LiveContextPanel"] = None
+_active_lock = threading.Lock()
+
+@contextlib.contextmanager
+def prompt_guard():
+    """
+    Wrap anything that reads from the terminal. A running live region is
+    stopped (its last frame stays on screen) and redrawn on the next change.
+    """
+    panel = _active
+    if panel is not None:
+        panel.pause()
+    yield
+
+class LiveContextPanel:
+    """
+    Keeps the context panel on screen in a rich Live region. It subscribes
+    to the StateStore and redraws only when keys it displays changed,
+    rebuilding just the rows that read them. Plain/JSON backends get a
+    record of the changed rows.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.shown = False
+        self._cells: Dict[str, Tuple[Text, Text]] = {}
+        self._live: Optional[Live] = None
+        self._pending = set()
+        self._pending_lock = threading.Lock()
+        store.subscribe(self._changed, [k for spec in ROWS for k in spec[2]])
+
+    def _changed(self, key: str, value: Any):
+        with self._pending_lock:
+            self._pending.add(key)
+
+    @property
+    def is_live(self) -> bool:
+        return self._live is not None
+
+    def show(self):
+        """
+        Draws the panel for the first time; later changes go through sync().
+        """
+        self.shown = True
+        with self._pending_lock:
+            self._pending.update(k for spec in ROWS for k in spec[2])
+        self.sync()
+
+    def sync(self) -> bool:
+        """
+        Redraws if anything changed since the last frame. Returns whether a
+        redraw happened.
+        """
+        if not self.shown:
+            return False
+        with self._pending_lock:
+            dirty, self._pending = self._pending, set()
+        if not dirty:
+            return False
+
+        state = dict(self.store)
+        changed = [spec[1] for spec in ROWS if dirty.intersection(spec[2])]
+        rows = ContextPanel.rows(state, changed)
+
+        if not isinstance(Renderer.backend, RichBackend):
+            # Line-oriented backends only get the fields that changed
+            if rows:
+                Renderer.backend.context(rows)
+            return bool(rows)
+
+        for icon, name, val, color in rows:
+            self._cells[name] = (Text(f"{icon} {name}", style="bold white"), Text(str(val), style=color))
+        visible = {name for _, name, _, _ in ContextPanel.rows(state)}
+        for name in list(self._cells):
+            if name not in visible:
+                del self._cells[name]
+
+        self._draw()
+        return True
+
+    def _renderable(self) -> Panel:
         table = Table(show_header=False, box=None, padding=(0, 2))
         table.add_column("Icon", no_wrap=True)
         table.add_column("Value", no_wrap=True)
-        
-        # CATEGORIES: AUTH, REPO, BRANCH, NETWORK, etc.
-        rows = [
-            ("👤 USER", state.get("AUTH_STATE", "Unknown"), "green" if state.get("AUTH_STATE") != "Unknown" else "red"),
-            ("🌿 BRANCH", state.get("BRANCH_STATE", "N/A"), "magenta"),
-            ("📦 REPO", state.get("REPO_STATE", "No"), "cyan"),
-            ("🌐 NETWORK", state.get("NETWORK_STATE", "Online"), "blue"),
-            ("🖥️  OS", f"{state.get('DISTRO_STATE', {}).get('pretty_name', state.get('OS_STATE', 'N/A'))} ({state.get('DISTRO_STATE', {}).get('codename', 'N/A')}/{state.get('ARCH_STATE', 'N/A')})", "white"),
-            ("🔒 PERMS", state.get("PERMISSION_STATE", "User"), "yellow"),
-        ]
-
-        for icon, val, color in rows:
-            table.add_row(
-                Text(icon, style="bold white"),
-                Text(str(val), style=color)
-            )
-
-        console.print(Panel(
+        for spec in ROWS:
+            if spec[1] in self._cells:
+                table.add_row(*self._cells[spec[1]])
+        return Panel(
             table,
             title="[bold cyan]SYSTEM CONTEXT[/bold cyan]",
             border_style="bright_black",
             expand=False,
             padding=(0, 2)
-        ))
-        console.print("")
+        )
+
+    def _draw(self):
+        global _active
+        if self._live is None:
+            self._live = Live(self._renderable(), console=console, auto_refresh=False, redirect_stdout=True, redirect_stderr=True)
+            self._live.start()
+            with _active_lock:
+                _active = self
+        else:
+            self._live.update(self._renderable(), refresh=True)
+
+    def pause(self):
+        global _active
+        if self._live is not None:
+            self._live.stop()
+            self._live = None
+        with _active_lock:
+            if _active is self:
+                _active = None
+
+    def close(self):
+        self.pause()
+        self.shown = False
@@ -0,0 +1,66 @@
+import subprocess
+import pytest
+from fixshell.config import DATASET_DIR
+from fixshell.engine import workflow_loader
+from fixshell.engine.classifier import Classifier
+from fixshell.engine.resolver_registry import ResolverRegistry
+from fixshell.engine.state_machine import WorkflowStateMachine
+from fixshell.engine.tracing import tracer
+
+class FixedClassifier:
+    """
+    Classifies every output as the same diagnosis.
+    """
+
+    def __init__(self, diagnosis):
+        self.diagnosis = diagnosis
+
+    def classify(self, output, mode=None, argv=None):
+        with tracer.span("classify", "classifier"):
+            return dict(self.diagnosis)
+
+def _git(cwd, *args):
+    return subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True, text=True).stdout
+
+def _make_repo(path):
+    path.mkdir()
+    _git(path, "init", "-q", "-b", "main")
+    _git(path, "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-q", "--allow-empty", "-m", "init")
+    return path
+
+@pytest.fixture
+def fixed_classifier():
+    """
+    FixedClassifier(diagnosis): classifies every output as `diagnosis`.
+    """
+    return FixedClassifier
+
+@pytest.fixture
+def git():
+    """
+    git(cwd, *args) -> stdout, raising on failure.
+    """
+    return _git
+
+@pytest.fixture
+def make_repo():
+    """
+    make_repo(path) -> path of a new repository with one empty commit on main.
+    """
+    return _make_repo
+
+@pytest.fixture
+def make_sm():
+    """
+    make_sm() -> a linux-mode WorkflowStateMachine over the packaged datasets.
+    """
+    return lambda: WorkflowStateMachine(Classifier(DATASET_DIR), ResolverRegistry(), mode="linux")
+
+@pytest.fixture
+def repo(tmp_path):
+    return _make_repo(tmp_path / "repo")
+
+@pytest.fixture(autouse=True)
+def isolated_state(tmp_path, monkeypatch):
+    # Workflow journals never leak between tests or into ~/.local/state
+    monkeypatch.setattr(workflow_loader, "STATE_DIR", str(tmp_path / "state"))
@@ -0,0 +1,51 @@
+import sys
+from fixshell.config import DATASET_DIR
+from fixshell.engine.backoff import BackoffScheduler, RetryPolicy
+from fixshell.engine.classifier import Classifier
+from fixshell.engine.executor import Executor
+from fixshell.engine.resolver_registry import ResolverRegistry
+from fixshell.engine.retry_engine import RetryEngine
+
+def test_exponential_delays_without_jitter():
+    scheduler = BackoffScheduler(RetryPolicy(max_attempts=4, base_delay=1.0, max_delay=5.0, jitter=0.0))
+    delays = [scheduler.next_delay() for _ in range(5)]
+    assert delays == [1.0, 2.0, 4.0, 5.0, None]
+
+def test_jitter_stays_within_bounds():
+    low = BackoffScheduler(RetryPolicy(base_delay=4.0, jitter=0.5), rng=lambda: 0.0)
+    high = BackoffScheduler(RetryPolicy(base_delay=4.0, jitter=0.5), rng=lambda: 1.0)
+    assert low.next_delay() == 2.0
+    assert high.next_delay() == 4.0
+
+def test_deadline_caps_and_stops_retries():
+    now = [0.0]
+    scheduler = BackoffScheduler(RetryPolicy(max_attempts=10, base_delay=4.0, jitter=0.0, deadline=5.0), clock=lambda: now[0])
+    assert scheduler.next_delay() == 4.0
+    now[0] = 4.0
+    assert scheduler.next_delay() == 1.0
+    now[0] = 5.0
+    assert scheduler.next_delay() is None
+
+def test_transient_failures_skip_resolvers_and_report_waiting(tmp_path):
+    counter = tmp_path / "count"
+    # Fails with a DNS error twice, then succeeds
+    script = (
+        "import os, sys\n"
+        f"p = {str(counter)!r}\n"
+        "n = int(open(p).read()) if os.path.exists(p) else 0\n"
+        "open(p, 'w').write(str(n + 1))\n"
+        "if n < 2:\n"
+        "    sys.stderr.write('fatal: unable to access: Could not resolve host: github.com')\n"
+        "    sys.exit(128)\n"
+    )
+    called = []
+    registry = ResolverRegistry()
+    registry.register("NETWORK_DNS_FAILURE", lambda *a, **k: called.append(1) or True)
+
+    engine = RetryEngine(Classifier(DATASET_DIR), registry, Executor(), mode="git")
+    slept = []
+    engine.sleep = slept.append
+
+    assert engine.execute_with_recovery([sys.executable, "-c", script], "fetch")
+    assert len(slept) == 2
+    assert called == []
@@ -0,0 +1,48 @@
+from fixshell.config import DATASET_DIR
+from fixshell.engine.classifier import Classifier
+from fixshell.engine.command_router import route
+from fixshell.engine.rule_model import Rule, RuleSet
+
+def test_routes_tool_and_subcommand_past_wrappers_and_global_options():
+    assert route(["git", "-C", "/repo", "push", "origin"]).commands == ("git", "git push")
+    assert route(["sudo", "-u", "ci", "env", "LANG=C", "/usr/bin/docker", "--context", "prod", "build", "."]).commands == ("docker", "docker build")
+    assert route("timeout 30 gh pr create --fill").modes == ("github", "git", "linux")
+    assert route(["docker", "run", "nginx"]).modes == ("docker", "linux")
+    # Unknown tools keep the caller's mode
+    npm = route(["npm", "install"], mode="docker")
+    assert (npm.tool, npm.subcommand, npm.modes) == ("npm", "install", ("docker", "linux"))
+    assert route(["sudo"]).modes == ("linux",)
+
+def test_rule_set_indexes_command_tags():
+    tagged = Rule.from_dict({"error_pattern": "x", "category": "PUSH", "commands": ["Git  Push"]}, mode="git")
+    generic = Rule.from_dict({"error_pattern": "y", "category": "ANY"}, mode="git")
+    apt = Rule.from_dict({"error_pattern": "z", "category": "APT", "commands": ["apt-get"]}, mode="docker")
+    rules = RuleSet([tagged, generic, apt])
+    assert rules.by_command["git push"] == [tagged]
+    assert rules.for_commands(("git",), ("git", "git pull")) == [generic]
+    assert rules.for_commands(("git",), ("git", "git push")) == [generic, tagged]
+    # Tagged rules apply to their command whatever the routed datasets
+    assert rules.for_commands(("linux",), ("apt-get", "apt-get update")) == [apt]
+
+def test_classifier_scans_only_the_routed_rules():
+    classifier = Classifier(DATASET_DIR)
+    rejected = " ! [rejected]        main -> main (non-fast-forward)"
+    assert classifier.classify(rejected, mode="linux", argv=["git", "push"])["category"] == "GIT_PUSH_REJECTED"
+    # Same text from another command is not a git push failure
+    assert classifier.classify(rejected, mode="linux", argv=["docker", "build", "."])["category"] == "unknown"
+    assert classifier.classify("W: NO_PUBKEY 7EA0A9C3F273FCD8", mode="linux", argv=["sudo", "apt-get", "update"])["category"] == "docker_gpg_failure"
+
+    docker = classifier.matcher_for(route(["docker", "build"]))
+    assert all(rule.mode in ("docker", "linux") for rule in docker.rules)
+    assert len(docker.rules) < len(classifier.rules)
+    # Commands that select the same rules share a matcher
+    assert classifier.matcher_for(route(["docker", "pull"])) is docker
+
+def test_wrapped_commands_fall_back_to_every_dataset():
+    classifier = Classifier(DATASET_DIR)
+    not_a_repo = "fatal: not a git repository (or any of the parent directories): .git"
+    assert classifier.classify(not_a_repo, mode="linux")["category"] == "NOT_A_GIT_REPO"
+    assert classifier.classify(not_a_repo, mode="linux", argv=["./deploy.sh"])["category"] == "NOT_A_GIT_REPO"
+    rejected = " ! [rejected]        main -> main (non-fast-forward)"
+    for argv in (["make", "deploy"], ["bash", "-c", "git push"]):
+        assert classifier.classify(rejected, mode="linux", argv=argv)["category"] == "GIT_PUSH_REJECTED"
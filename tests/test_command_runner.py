@@ -0,0 +1,42 @@
+import sys
+import time
+import pytest
+from fixshell.engine.command_runner import CommandRunner
+from fixshell.engine.executor import Executor
+from fixshell.engine.policy import Policy, PolicyRule, Prompter
+from fixshell.engine.resolver_registry import handle_git_delete_current_branch
+
+@pytest.fixture
+def repo(repo, git):
+    git(repo, "checkout", "-q", "-b", "topic")
+    return repo
+
+def test_queries_are_cached_until_a_command_changes_state(repo):
+    runner = CommandRunner(Executor(cwd=str(repo)))
+    current = ["git", "branch", "--show-current"]
+    first = runner.query(current)
+    assert first.stdout.strip() == "topic"
+    assert runner.query(current) is first
+
+    runner.run(["git", "checkout", "-q", "main"], "switch")
+    assert runner.query(current).stdout.strip() == "main"
+    assert [r.stdout.strip() for r in runner.batch([current, ["git", "rev-parse", "--abbrev-ref", "HEAD"]])] == ["main", "main"]
+
+def test_dry_run_parity_and_timeouts(repo):
+    runner = CommandRunner(Executor(dry_run=True, cwd=str(repo)), timeout=0.2, query_timeout=0.2)
+    # Mutations are simulated like any Executor step; queries still answer
+    assert runner.run(["git", "branch", "-D", "main"], "delete").returncode == 0
+    assert "main" in runner.query(["git", "branch", "--list"]).stdout
+
+    started = time.perf_counter()
+    assert runner.query([sys.executable, "-c", "import time; time.sleep(5)"]).returncode == 124
+    assert CommandRunner(Executor(cwd=str(repo)), timeout=0.2).run([sys.executable, "-c", "import time; time.sleep(5)"], "slow").returncode == 124
+    assert time.perf_counter() - started < 3
+
+def test_resolver_uses_the_injected_runner(repo):
+    policy = Policy({"GIT_DELETE_CURRENT_BRANCH": PolicyRule("allow")}, non_interactive=True)
+    runner = CommandRunner(Executor(cwd=str(repo), policy=policy))
+    prompter = Prompter(policy, "GIT_DELETE_CURRENT_BRANCH", auto=True)
+    assert handle_git_delete_current_branch(["topic"], runner=runner, prompter=prompter)
+    branches = runner.query(["git", "branch", "--format=%(refname:short)"]).stdout.split()
+    assert branches == ["main"]
@@ -0,0 +1,86 @@
+import sys
+import time
+from fixshell.config import DATASET_DIR
+from fixshell.engine.classifier import Classifier
+from fixshell.engine.executor import Executor
+from fixshell.engine.extractors import extractors
+from fixshell.engine.policy import Policy, PolicyRule
+from fixshell.engine.resolver_registry import ResolverRegistry
+from fixshell.engine.retry_engine import RetryEngine
+
+TRACEBACK = """Traceback (most recent call last):
+  File "/app/settings.py", line 3, in <module>
+    import yaml
+ModuleNotFoundError: No module named 'yaml'
+
+During handling of the above exception, another exception occurred:
+
+Traceback (most recent call last):
+  File "/app/main.py", line 12, in <module>
+    from app.settings import load
+  File "/app/settings.py", line 5, in load
+    from ruamel.yaml import YAML
+ModuleNotFoundError: No module named 'ruamel.yaml'
+"""
+
+BUILDKIT = """#8 [3/5] RUN npm ci
+#8 0.912 npm ERR! code E404
+#8 0.913 npm ERR! 404 Not Found - GET https://registry.npmjs.org/@acme%2fwidgets - Not found
+#8 ERROR: process "/bin/sh -c npm ci" did not complete successfully: exit code: 1
+------
+ > [3/5] RUN npm ci:
+------
+Dockerfile:7
+--------------------
+   7 | >>> RUN npm ci
+--------------------
+ERROR: failed to solve: process "/bin/sh -c npm ci" did not complete successfully: exit code: 1
+"""
+
+def test_python_traceback_reports_the_last_exception_and_innermost_frame():
+    fields = extractors.extract(TRACEBACK)
+    assert fields == {
+        "exception": "ModuleNotFoundError", "message": "No module named 'ruamel.yaml'",
+        "file": "/app/settings.py", "line": 5, "function": "load",
+        "missing_module": "ruamel.yaml", "missing_package": "ruamel",
+    }
+
+def test_build_log_formats():
+    fields = extractors.extract(BUILDKIT)
+    assert (fields["step"], fields["instruction"], fields["exit_code"], fields["dockerfile_line"]) == ("3/5", "RUN npm ci", 1, 7)
+    assert fields["command"] == "/bin/sh -c npm ci"
+    # Prefixed npm lines inside the build are not npm's own output
+    assert "npm_code" not in fields
+
+    legacy = extractors.extract("Step 4/9 : RUN pip install -r requirements.txt\n"
+                                "ERROR: No matching distribution found for torch==9.9\n"
+                                "The command '/bin/sh -c pip install -r requirements.txt' returned a non-zero code: 1\n")
+    assert (legacy["step"], legacy["exit_code"], legacy["missing_package"], legacy["requirement"]) == ("4/9", 1, "torch", "torch==9.9")
+
+    npm = extractors.extract("npm error code ERESOLVE\nnpm error Could not resolve dependency:\nnpm error peer react@\"^17.0.0\" from legacy-ui@1.2.0\n")
+    assert npm == {"npm_code": "ERESOLVE", "conflict": "react@\"^17.0.0\"", "required_by": "legacy-ui@1.2.0"}
+    assert extractors.extract("npm ERR! 404  '@acme/widgets@^2.0.0' is not in this registry.")["missing_package"] == "@acme/widgets"
+
+def test_extraction_stays_linear_on_large_logs():
+    noise = "INFO compiling module 12345 of 99999 ... ok\n" * 120000
+    started = time.perf_counter()
+    assert extractors.extract(noise) == {}
+    assert extractors.extract(noise + TRACEBACK)["missing_module"] == "ruamel.yaml"
+    assert extractors.extract("x" * 5_000_000 + "\n" + TRACEBACK)["line"] == 5
+    assert time.perf_counter() - started < 2
+
+def test_fields_reach_the_diagnosis_and_fix_templates(tmp_path):
+    diagnosis = Classifier(DATASET_DIR).classify(TRACEBACK, argv=["python3", "main.py"])
+    assert diagnosis["category"] == "PYTHON_MODULE_MISSING"
+    # The rule's named group wins over the extractor's value
+    assert diagnosis["fields"]["missing_package"] == "yaml"
+    assert diagnosis["fields"]["file"] == "/app/settings.py"
+
+    flag = tmp_path / "installed"
+    policy = Policy({"DEMO": PolicyRule("allow")}, non_interactive=True)
+    engine = RetryEngine(None, ResolverRegistry(), Executor(policy=policy))
+    write = [sys.executable, "-c", "import sys; open(sys.argv[1], 'w').write(sys.argv[2])", str(flag), "{MISSING_PACKAGE}@{MATCH_1}"]
+    assert engine._apply_template_fix([write], ["main"], category="DEMO", fields={"missing_package": "ruamel"})
+    assert flag.read_text() == "ruamel@main"
+    # A placeholder the error did not provide cancels the fix
+    assert not engine._apply_template_fix([write], [None], category="DEMO", fields={"missing_package": "ruamel"})
@@ -0,0 +1,50 @@
+import pytest
+from fixshell.config import DATASET_DIR
+from fixshell.engine.classifier import Classifier
+from fixshell.engine.fix_template import FixTemplate, TemplateError, is_branch_name, slot_values
+from fixshell.engine.rule_model import DatasetError, Rule
+from fixshell.modes.git.git_validator import GitValidator
+
+def test_templates_compile_into_literals_and_typed_slots():
+    template = FixTemplate(["git", "push", "origin", "HEAD:{MATCH_1:branch}", "{MISSING_PACKAGE}"])
+    assert template.parts[:3] == ("git", "push", "origin")
+    assert template.slots == ("MATCH_1", "MISSING_PACKAGE")
+    head, slot = template.parts[3]
+    assert (head, slot.validator) == ("HEAD:", "branch")
+    # Well-known field names pick their validator
+    assert template.parts[4][0].validator == "package"
+    assert template.render({"MATCH_1": "feature/x", "MISSING_PACKAGE": "requests"}) == ["git", "push", "origin", "HEAD:feature/x", "requests"]
+
+    # Destructive literals make the fix high risk for policy max_risk
+    assert template.risk == "medium" and FixTemplate(["git", "branch", "-D", "{MATCH_1:branch}"]).risk == "high"
+
+    with pytest.raises(TemplateError, match="unknown validator"):
+        FixTemplate(["rm", "{MATCH_1:anything}"])
+    with pytest.raises(DatasetError, match="invalid fix_commands"):
+        Rule.from_dict({"error_pattern": "x", "category": "A", "fix_commands": [["rm", "{MATCH_1:anything}"]]})
+
+@pytest.mark.parametrize("template, value", [
+    (["git", "branch", "-D", "{MATCH_1:branch}"], "--upload-pack=touch /tmp/pwned"),
+    (["git", "branch", "-D", "{MATCH_1:branch}"], "main; rm -rf ~"),
+    (["git", "branch", "-D", "{MATCH_1:branch}"], "a..b"),
+    (["docker", "rm", "-f", "{MATCH_1:container}"], "web $(id)"),
+    (["ls", "-l", "{MATCH_1}"], "-rf"),
+    (["ls", "-l", "{MATCH_1}"], "ok\nrm -rf /"),
+    (["ls", "-l", "{MATCH_1}"], None),
+])
+def test_captured_text_cannot_inject(template, value):
+    with pytest.raises(TemplateError):
+        FixTemplate(template).render(slot_values([value]))
+
+def test_branch_names_follow_git_rules():
+    assert all(is_branch_name(n) for n in ("main", "feature/login-v2", "release_1.0"))
+    assert not any(is_branch_name(n) for n in ("", "-x", "a b", "a..b", "topic.lock", "a//b", "end/", "/abs"))
+    assert GitValidator.validate_branch_name("feature/x") and not GitValidator.validate_branch_name("-x")
+
+def test_dataset_fix_is_rendered_from_either_pattern_alternative():
+    classifier = Classifier(DATASET_DIR)
+    for output in ("error: cannot delete branch 'topic' used by worktree at '/w'",
+                   "error: Cannot delete branch 'topic' checked out at '/w'"):
+        diagnosis = classifier.classify(output, argv=["git", "branch", "-d", "topic"])
+        rendered = [t.render(slot_values(diagnosis["matches"], diagnosis["fields"])) for t in diagnosis["fix_templates"]]
+        assert rendered == [["git", "checkout", "main"], ["git", "branch", "-D", "topic"]]
@@ -0,0 +1,65 @@
+import json
+import os
+import stat
+import subprocess
+import sys
+import time
+import pytest
+from fixshell.config import DATASET_DIR
+from fixshell.engine.classifier import Classifier
+from fixshell.engine.executor import Executor
+from fixshell.engine.fixtures import fixtures
+from fixshell.engine.outcome_store import OutcomeStore
+from fixshell.engine.policy import Policy, PolicyRule
+from fixshell.engine.retry_engine import RetryEngine
+from fixshell.engine.tracing import traced_run
+from fixshell.modes.git.git_mode import build_git_registry
+
+@pytest.fixture
+def store(tmp_path):
+    yield tmp_path / "fixtures.jsonl"
+    fixtures.close()
+
+def write_transcripts(path, *entries):
+    path.write_text("".join(json.dumps({"cwd": ".", "stdout": "", "stderr": "", **e}) + "\n" for e in entries))
+
+def test_recorded_commands_replay_without_spawning(store, tmp_path):
+    fixtures.record_to(str(store), root=str(tmp_path))
+    script = [sys.executable, "-c", "import sys; print('out'); sys.exit(3)"]
+    assert Executor(cwd=str(tmp_path)).run(script, "probe").returncode == 3
+    fixtures.close()
+    # Full command output: readable by the owner only
+    assert stat.S_IMODE(os.stat(store).st_mode) == 0o600
+    entry = json.loads(store.read_text())
+    assert (entry["argv"], entry["cwd"], entry["returncode"], entry["stdout"]) == (script, ".", 3, "out\n")
+
+    fixtures.replay_from(str(store), root=str(tmp_path))
+    res = traced_run(script, capture_output=True, cwd=str(tmp_path))
+    # Bytes unless text was asked for, exactly as subprocess.run
+    assert (res.returncode, res.stdout) == (3, b"out\n")
+    with pytest.raises(subprocess.CalledProcessError):
+        traced_run(script, capture_output=True, text=True, cwd=str(tmp_path), check=True)
+
+    # Nothing is spawned: the binary does not exist here
+    write_transcripts(store, {"argv": ["no-such-binary", "--version"], "returncode": 0, "stdout": "1.0\n"})
+    fixtures.replay_from(str(store), root=str(tmp_path))
+    assert traced_run(["no-such-binary", "--version"], capture_output=True, text=True, cwd=str(tmp_path)).stdout == "1.0\n"
+    miss = traced_run(["git", "status"], capture_output=True, text=True, cwd=str(tmp_path))
+    assert miss.returncode == 127 and "no recorded transcript" in miss.stderr
+    assert fixtures.misses == [["git", "status"]]
+
+def test_whole_recovery_replays_offline(store, tmp_path):
+    write_transcripts(
+        store,
+        {"argv": ["git", "push"], "returncode": 128, "stderr": "fatal: The current branch topic has no upstream branch.\n"},
+        {"argv": ["git", "push", "--set-upstream", "origin", "topic"], "returncode": 0},
+        {"argv": ["git", "push"], "returncode": 0, "stdout": "Everything up-to-date\n"},
+    )
+    fixtures.replay_from(str(store), root=str(tmp_path))
+    policy = Policy({"GIT_NO_UPSTREAM": PolicyRule("allow")}, non_interactive=True)
+    engine = RetryEngine(Classifier(DATASET_DIR), build_git_registry(), Executor(cwd=str(tmp_path), policy=policy), mode="git", outcomes=OutcomeStore())
+
+    started = time.perf_counter()
+    assert engine.execute_with_recovery(["git", "push"], "Push")
+    assert time.perf_counter() - started < 1
+    assert fixtures.misses == []
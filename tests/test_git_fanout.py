@@ -0,0 +1,49 @@
+import os
+from fixshell.engine.decision_queue import DeferredDecision
+from fixshell.engine.policy import Prompter
+from fixshell.modes.git.git_fanout import GitFanout, resolve_repos
+
+def test_resolve_repos_from_glob_and_file(tmp_path, make_repo):
+    a = make_repo(tmp_path / "a")
+    b = make_repo(tmp_path / "b")
+    (tmp_path / "not_a_repo").mkdir()
+
+    assert resolve_repos(str(tmp_path / "*")) == [str(a), str(b)]
+
+    listing = tmp_path / "repos.txt"
+    listing.write_text("# fleet\nb\n")
+    assert resolve_repos(str(listing)) == [str(b)]
+
+def test_prompting_resolutions_are_deferred(tmp_path, monkeypatch, git, make_repo):
+    remote = tmp_path / "remote.git"
+    git(tmp_path, "init", "-q", "--bare", str(remote))
+    repo = make_repo(tmp_path / "repo")
+    git(repo, "remote", "add", "origin", str(remote))
+    git(repo, "checkout", "-q", "-b", "feature")
+    (repo / "file.txt").write_text("change")
+
+    for var in ["GIT_AUTHOR_NAME", "GIT_COMMITTER_NAME", "GIT_AUTHOR_EMAIL", "GIT_COMMITTER_EMAIL"]:
+        monkeypatch.setenv(var, "t")
+
+    fanout = GitFanout(workers=2)
+    ok = fanout.run(str(repo), "daily_work", message="wip", interactive=False)
+
+    assert not ok
+    decisions = fanout.decisions.for_cwd(str(repo))
+    assert [d.category for d in decisions] == ["GIT_NO_TRACKING_INFO"]
+
+def test_deferred_repos_are_resolved_in_place_after_asking(tmp_path, monkeypatch, make_repo):
+    repo = make_repo(tmp_path / "repo")
+    fanout = GitFanout()
+    fanout.decisions.defer(DeferredDecision(str(repo), ["git", "push"], "GIT_NO_TRACKING_INFO", {}))
+    deferred = {"repo": str(repo), "outcome": "deferred", "steps_ok": 0, "steps": 1, "seconds": 0.0}
+    asked, answers, cwds = [], [False, True], []
+    monkeypatch.setattr(Prompter, "confirm", lambda self, text, default=True, risk="low": asked.append((self.category, text)) or answers.pop(0))
+    monkeypatch.setattr(fanout, "_run_repo", lambda repo, *args, **kwargs: cwds.append(os.getcwd()) or {**deferred, "outcome": "ok"})
+
+    assert fanout._resolve_deferred([deferred], "daily_work", "wip") == [deferred]
+    assert asked == [("GIT_NO_TRACKING_INFO", "Resolve repo now?")]
+    cwd = os.getcwd()
+    assert fanout._resolve_deferred([deferred], "daily_work", "wip")[0]["outcome"] == "ok"
+    # The re-run gets the repository as its cwd; the process never changes directory
+    assert cwds == [cwd] and os.getcwd() == cwd
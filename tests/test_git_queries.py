@@ -0,0 +1,60 @@
+import pytest
+from fixshell.engine import git_queries as module
+from fixshell.engine.command_runner import CommandRunner
+from fixshell.engine.executor import Executor
+from fixshell.engine.git_queries import GitQueryCache, find_git_dir, is_read_only
+
+@pytest.fixture
+def spawned(monkeypatch):
+    calls = []
+    real = module.traced_run
+
+    def counting(cmd, **kwargs):
+        calls.append(cmd[1:])
+        return real(cmd, **kwargs)
+    monkeypatch.setattr(module, "traced_run", counting)
+    return calls
+
+def test_answers_are_reused_until_the_repository_changes(repo, spawned, git):
+    cache = GitQueryCache()
+    branch = lambda: cache.query(["branch", "--show-current"], cwd=str(repo)).stdout.strip()
+    assert [branch(), branch(), branch()] == ["main"] * 3
+    assert len(spawned) == 1
+
+    # Changes made outside FixShell are seen on the next lookup
+    git(repo, "checkout", "-q", "-b", "topic")
+    assert branch() == "topic"
+    git(repo, "branch", "extra")
+    assert cache.query(["branch", "--format=%(refname:short)"], cwd=str(repo)).stdout.split() == ["extra", "main", "topic"]
+    head = cache.query(["rev-parse", "HEAD"], cwd=str(repo)).stdout
+    git(repo, "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-q", "--allow-empty", "-m", "next")
+    assert cache.query(["rev-parse", "HEAD"], cwd=str(repo)).stdout != head
+    assert cache.query(["remote", "get-url", "origin"], cwd=str(repo)).returncode != 0
+    git(repo, "remote", "add", "origin", "https://example.com/r.git")
+    assert cache.query(["remote", "get-url", "origin"], cwd=str(repo)).stdout.strip() == "https://example.com/r.git"
+
+    count = len(spawned)
+    cache.query(["status", "--porcelain"], cwd=str(repo))
+    cache.query(["status", "--porcelain"], cwd=str(repo))
+    assert len(spawned) == count + 2
+
+def test_worktrees_have_their_own_head(repo, tmp_path, git):
+    worktree = tmp_path / "wt"
+    git(repo, "worktree", "add", "-q", "-b", "side", str(worktree))
+    git_dir, common = find_git_dir(str(worktree))
+    assert common == str(repo / ".git") and git_dir != common
+    cache = GitQueryCache()
+    assert cache.query(["branch", "--show-current"], cwd=str(repo)).stdout.strip() == "main"
+    assert cache.query(["branch", "--show-current"], cwd=str(worktree)).stdout.strip() == "side"
+
+def test_only_read_only_queries_are_cached():
+    assert all(is_read_only(a) for a in (["branch"], ["branch", "--list", "feat*"], ["branch", "-a", "--format=%(refname)"],
+                                         ["remote", "-v"], ["remote", "get-url", "origin"], ["symbolic-ref", "-q", "HEAD"], ["rev-parse", "@{u}"]))
+    assert not any(is_read_only(a) for a in (["branch", "-D", "x"], ["branch", "--list", "-D", "x"], ["branch", "new"], ["remote", "add", "o", "u"],
+                                             ["symbolic-ref", "HEAD", "refs/heads/x"], ["symbolic-ref", "-d", "HEAD"], ["status"], []))
+
+def test_runner_queries_see_external_changes(repo, git):
+    runner = CommandRunner(Executor(cwd=str(repo)))
+    assert runner.query(["git", "branch", "--show-current"]).stdout.strip() == "main"
+    git(repo, "checkout", "-q", "-b", "elsewhere")
+    assert runner.query(["git", "branch", "--show-current"]).stdout.strip() == "elsewhere"
@@ -0,0 +1,168 @@
+import json
+import re
+import shutil
+import time
+import pytest
+from fixshell.config import DATASET_DIR
+from fixshell.engine.classifier import Classifier
+from fixshell.engine.rule_layers import RuleLayers, default_layers
+from fixshell.engine.rule_matcher import RuleMatcher
+from fixshell.tools.import_thefuck_rules import UnsupportedRule, import_rules, parse_rule, write_datasets
+
+GIT_STASH = '''
+from thefuck.specific.git import git_support
+
+@git_support
+def match(command):
+    return ('error: Your local changes to the following files would be overwritten' in command.output
+            and 'Please commit your changes or stash them' in command.output
+            and command.script_parts[1] == 'pull')
+
+def get_new_command(command):
+    return 'git stash && git pull'
+'''
+
+NO_COMMAND = '''
+patterns = ['command not found', 'is not recognized as an internal']
+
+def match(command):
+    return any(pattern in command.output.lower() for pattern in patterns)
+'''
+
+GIT_TAG_FORCE = '''
+from thefuck.specific.git import git_support
+
+@git_support
+def match(command):
+    return ('tag' in command.script_parts
+            and 'already exists' in command.output)
+'''
+
+MKDIR_P = '''
+def match(command):
+    return ('mkdir' in command.script
+            and 'No such file or directory' in command.output)
+'''
+
+NO_COMMAND_WHICH = '''
+def match(command):
+    return (not which(command.script_parts[0])
+            and ('not found' in command.output
+                 or 'is not recognized as' in command.output))
+'''
+
+SCRIPT_ONLY = '''
+def match(command):
+    return command.script.startswith('cd..')
+'''
+
+def test_and_checks_become_anchored_lookaheads_with_prefilter():
+    rule = parse_rule(GIT_STASH, "git_pull_uncommitted.py")
+    entry = rule["entry"]
+    assert rule["mode"] == "git"
+    assert entry["category"] == "TF_GIT_PULL_UNCOMMITTED"
+    # @git_support plus the script_parts check limit the rule to git pull
+    assert entry["commands"] == ["git pull"]
+    assert entry["error_pattern"].startswith(r"\A(?=")
+    assert ".*" not in entry["error_pattern"]
+    assert entry["prefilter"] == ["error: your local changes to the following files would be overwritten", "please commit your changes or stash them"]
+    assert entry["suggested_fix"] == ["Try: git stash && git pull"]
+
+    output = "From x\nerror: Your local changes to the following files would be overwritten by merge:\n  a.txt\nPlease commit your changes or stash them before you merge."
+    assert re.search(entry["error_pattern"], output, re.IGNORECASE | re.MULTILINE)
+
+def test_any_over_module_constant_becomes_alternation():
+    entry = parse_rule(NO_COMMAND, "no_command.py")["entry"]
+    assert entry["error_pattern"] == r"(?:command\ not\ found|is\ not\ recognized\ as\ an\ internal)"
+    assert "prefilter" not in entry
+
+def test_rules_without_output_checks_are_skipped():
+    assert parse_rule(SCRIPT_ONLY, "cd_correction.py") is None
+
+def test_script_checks_become_command_tags():
+    assert parse_rule(GIT_TAG_FORCE, "git_tag_force.py")["entry"]["commands"] == ["git tag"]
+    assert parse_rule(MKDIR_P, "mkdir_p.py")["entry"]["commands"] == ["mkdir"]
+    stash = "@git_support\ndef match(command):\n    if command.script_parts and len(command.script_parts) > 1:\n        return command.script_parts[1] == 'stash' and 'usage:' in command.output\n    else:\n        return False\n"
+    assert parse_rule(stash, "git_fix_stash.py")["entry"]["commands"] == ["git stash"]
+
+def test_checks_without_a_dataset_equivalent_are_not_imported(tmp_path):
+    with pytest.raises(UnsupportedRule):
+        parse_rule(NO_COMMAND_WHICH, "no_command.py")
+    with pytest.raises(UnsupportedRule):
+        parse_rule("def match(command):\n    return '--force' in command.script and 'rejected' in command.output\n", "force.py")
+    rules = tmp_path / "rules"
+    rules.mkdir()
+    (rules / "no_command.py").write_text(NO_COMMAND_WHICH)
+    report = import_rules(str(rules), str(tmp_path))["report"]
+    assert report["imported"] == []
+    assert [f for f, _ in report["unsupported"]] == ["no_command.py"]
+
+def test_tagged_imports_only_classify_their_command(tmp_path):
+    rules = tmp_path / "rules"
+    rules.mkdir()
+    (rules / "git_tag_force.py").write_text(GIT_TAG_FORCE)
+    (rules / "mkdir_p.py").write_text(MKDIR_P)
+    datasets = tmp_path / "datasets"
+    shutil.copytree(DATASET_DIR, datasets)
+    write_datasets(import_rules(str(rules), str(datasets))["datasets"], str(datasets))
+    classifier = Classifier(str(datasets), layers=RuleLayers(default_layers(str(datasets), overlays=False)))
+
+    exists = "fatal: tag 'v1' already exists"
+    assert classifier.classify(exists, mode="git", argv=["git", "tag", "v1"])["category"] == "TF_GIT_TAG_FORCE"
+    assert classifier.classify("fatal: destination path 'x' already exists and is not an empty directory.", mode="git", argv=["git", "clone", "u", "x"])["category"] != "TF_GIT_TAG_FORCE"
+    missing = "mkdir: cannot create directory 'a/b': No such file or directory"
+    assert classifier.classify(missing, mode="linux", argv=["mkdir", "a/b"])["category"] == "TF_MKDIR_P"
+    # cp is not a tool the router knows, so this is the wrapper fallback
+    assert classifier.classify("cp: cannot stat 'a': No such file or directory", mode="linux", argv=["cp", "a", "b"])["category"] != "TF_MKDIR_P"
+
+def test_import_dedupes_against_curated_rules_and_writes(tmp_path):
+    rules = tmp_path / "rules"
+    rules.mkdir()
+    (rules / "git_pull_uncommitted.py").write_text(GIT_STASH)
+    (rules / "no_command.py").write_text(NO_COMMAND)
+    (rules / "cd_correction.py").write_text(SCRIPT_ONLY)
+    # Covered by the curated NOT_A_GIT_REPO entry
+    (rules / "git_not_repo.py").write_text("def match(command):\n    return 'fatal: not a git repository' in command.output\n")
+    (rules / "broken.py").write_text("def match(command):\n    return re.search('(a+)+$', command.output)\n")
+    datasets = tmp_path / "datasets"
+    datasets.mkdir()
+    for name in ("git_errors.json", "linux_errors.json"):
+        shutil.copy(f"{DATASET_DIR}/{name}", datasets / name)
+
+    result = import_rules(str(rules), str(datasets))
+    report = result["report"]
+    assert [f for f, _, _ in report["imported"]] == ["git_pull_uncommitted.py"]
+    assert report["duplicates"] == [("git_not_repo.py", "NOT_A_GIT_REPO"), ("no_command.py", "COMMAND_MISSING")]
+    assert "broken.py" in report["warnings"]
+    assert "broken.py" in report["skipped"]
+
+    write_datasets(result["datasets"], str(datasets))
+    git = json.loads((datasets / "git_errors.json").read_text())["rules"]
+    assert git[-1]["category"] == "TF_GIT_PULL_UNCOMMITTED"
+    assert git[-1]["source"] == "thefuck"
+
+    # Re-importing replaces the earlier import instead of duplicating it
+    again = import_rules(str(rules), str(datasets))
+    assert len(again["datasets"]["git"]) == len(git)
+
+def test_curated_rules_outrank_imported_ones():
+    curated = {"error_pattern": "command not found", "category": "COMMAND_MISSING"}
+    imported = parse_rule(NO_COMMAND, "no_command.py")["entry"]
+    assert RuleMatcher([imported, curated]).get_best_match("bash: foo: command not found")["category"] == "COMMAND_MISSING"
+    # Curated wins even over a higher priority; priority beats specificity
+    assert RuleMatcher([{**imported, "priority": 10}, {**curated, "priority": 0}]).get_best_match("bash: foo: command not found")["category"] == "COMMAND_MISSING"
+    urgent = {"error_pattern": "not found", "category": "URGENT", "priority": 8}
+    assert RuleMatcher([curated, urgent]).get_best_match("bash: foo: command not found")["category"] == "URGENT"
+
+def test_prefilter_skips_regex_and_large_trees_import_fast(tmp_path):
+    entry = parse_rule(GIT_STASH, "git_pull_uncommitted.py")["entry"]
+    assert RuleMatcher([entry]).find_matches("x" * 100000) == []
+
+    rules = tmp_path / "rules"
+    rules.mkdir()
+    for i in range(300):
+        (rules / f"rule_{i}.py").write_text(f"def match(command):\n    return 'unique failure {i}' in command.output and 'detail {i}' in command.output\n")
+    started = time.perf_counter()
+    report = import_rules(str(rules), str(tmp_path))["report"]
+    assert len(report["imported"]) == 300
+    assert time.perf_counter() - started < 5
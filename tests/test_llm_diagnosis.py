@@ -0,0 +1,133 @@
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from fixshell.config import DATASET_DIR
+from fixshell.engine.classifier import Classifier
+from fixshell.engine.llm_diagnosis import LLMDiagnoser, OllamaBackend, DiagnosisCache, fingerprint, trim_output
+
+class FakeOllama:
+    """
+    Local stand-in for Ollama's /api/generate that counts requests and
+    TCP connections.
+    """
+
+    def __init__(self, answer):
+        self.answer = answer
+        self.requests = []
+        self.connections = 0
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                fake.connections += 1
+                super().setup()
+
+            def do_POST(self):
+                fake.requests.append(json.loads(self.rfile.read(int(self.headers["Content-Length"]))))
+                body = json.dumps({"response": json.dumps(fake.answer), "done": True}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+ANSWER = {"category": "frobnicator crash", "explanation": "The frobnicator ran out of widgets.", "suggested_fix": ["Refill widgets"], "confidence": 0.9}
+
+def test_trim_output_keeps_error_window_and_tail():
+    lines = [f"progress {i}" for i in range(500)]
+    lines[100] = "error: widget missing"
+    trimmed = trim_output("\n".join(lines), max_lines=20).splitlines()
+    assert len(trimmed) <= 21
+    assert "error: widget missing" in trimmed
+    assert trimmed[-1] == "progress 499"
+
+def test_fingerprint_ignores_volatile_tokens():
+    assert fingerprint("error: pid 1234 crashed at 0xdeadbeef") == fingerprint("error: pid 98 crashed at 0x1f")
+    assert fingerprint("error: disk full") != fingerprint("error: out of memory")
+    assert fingerprint('File "/tmp/pytest-1/app.py", line 12\n2026-10-19T08:01:02Z ValueError at 7f3a9c1') == \
+        fingerprint('File "/tmp/pytest-9/app.py", line 40\n2026-10-20T11:22:33Z ValueError at 0b12e4d')
+    # Quoted names and plain numbers still tell errors apart
+    assert fingerprint("No module named 'requests'") != fingerprint("No module named 'numpy'")
+    assert fingerprint("HTTP 404 from registry") != fingerprint("HTTP 500 from registry")
+
+def test_cache_is_per_model_and_expires(tmp_path):
+    fake = FakeOllama(ANSWER)
+    try:
+        ask = lambda model, ttl=None: LLMDiagnoser(OllamaBackend(fake.url, model=model, timeout=2), cache=DiagnosisCache(str(tmp_path), ttl=ttl)).diagnose("frobnicate failed")
+        assert ask("llama3") and ask("llama3")
+        assert len(fake.requests) == 1
+        ask("mistral")
+        assert len(fake.requests) == 2
+        for entry in tmp_path.iterdir():
+            os.utime(entry, (0, 0))
+        ask("llama3", ttl=3600)
+        assert len(fake.requests) == 3
+    finally:
+        fake.close()
+
+def test_unknown_errors_use_llm_with_one_connection_and_disk_cache(tmp_path):
+    fake = FakeOllama(ANSWER)
+    try:
+        classifier = Classifier(DATASET_DIR)
+        classifier.ai = LLMDiagnoser(OllamaBackend(fake.url, model="llama3", timeout=2), cache=DiagnosisCache(str(tmp_path)))
+
+        diagnosis = classifier.classify("frobnicate: widget pool exhausted (pid 12)")
+        assert diagnosis["category"] == "FROBNICATOR_CRASH"
+        assert diagnosis["source"] == "llm"
+        assert diagnosis["suggested_fix"] == ["Refill widgets"]
+        assert diagnosis["fix_commands"] == []
+        assert fake.requests[0]["model"] == "llama3"
+
+        classifier.classify("frobnicate: unrelated other failure")
+        assert len(fake.requests) == 2
+        assert fake.connections == 1
+
+        # Same fingerprint, fresh process: answered from disk
+        cold = Classifier(DATASET_DIR)
+        cold.ai = LLMDiagnoser(OllamaBackend(fake.url, timeout=2), cache=DiagnosisCache(str(tmp_path)))
+        assert cold.classify("frobnicate: widget pool exhausted (pid 99)")["category"] == "FROBNICATOR_CRASH"
+        assert len(fake.requests) == 2
+    finally:
+        fake.close()
+
+def test_batch_asks_once_per_fingerprint():
+    fake = FakeOllama(ANSWER)
+    try:
+        diagnoser = LLMDiagnoser(OllamaBackend(fake.url, timeout=2))
+        answers = diagnoser.diagnose_batch(["12:00:01 boom in /tmp/step-a", "12:00:02 boom in /tmp/step-b", "other failure"])
+        assert all(answers)
+        assert len(fake.requests) == 2
+    finally:
+        fake.close()
+
+def test_deterministic_matches_and_low_confidence_skip_llm():
+    fake = FakeOllama(dict(ANSWER, confidence=0.2))
+    try:
+        classifier = Classifier(DATASET_DIR)
+        classifier.ai = LLMDiagnoser(OllamaBackend(fake.url, timeout=2))
+        assert classifier.classify("fatal: not a git repository (or any of the parent directories): .git")["category"] != "FROBNICATOR_CRASH"
+        assert fake.requests == []
+        assert classifier.classify("frobnicate failed")["category"] == "unknown"
+    finally:
+        fake.close()
+
+def test_unreachable_backend_is_disabled_after_first_failure():
+    classifier = Classifier(DATASET_DIR)
+    classifier.ai = LLMDiagnoser(OllamaBackend("http://127.0.0.1:9", timeout=0.5))
+    assert classifier.classify("frobnicate failed")["category"] == "unknown"
+    assert not classifier.ai.available
+    assert classifier.classify("another unknown failure")["category"] == "unknown"
@@ -0,0 +1,96 @@
+import socket
+import sys
+import threading
+import pytest
+from fixshell.engine.executor import Executor
+from fixshell.engine.metrics import MetricsRegistry, PrometheusTextfileSink, StatsdSink, metrics
+from fixshell.engine.policy import Policy, PolicyRule
+from fixshell.engine.resolver_registry import ResolverRegistry
+from fixshell.engine.retry_engine import RetryEngine
+
+def enabled_registry():
+    registry = MetricsRegistry()
+    registry.enabled = True
+    return registry
+
+def test_thread_shards_are_merged():
+    registry = enabled_registry()
+
+    def work():
+        for _ in range(100):
+            registry.inc("errors_total", category="X")
+            registry.observe("classify_seconds", 0.002, mode="git")
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+
+    snap = registry.snapshot()
+    assert snap["counters"][("errors_total", (("category", "X"),))] == 400
+    hist = snap["histograms"][("classify_seconds", (("mode", "git"),))]
+    n = len(registry.buckets)
+    assert hist[1] == 400 and hist[n + 1] == 400
+
+def test_prometheus_textfile_accumulates_across_runs(tmp_path):
+    path = tmp_path / "fixshell.prom"
+    for _ in range(2):
+        registry = enabled_registry()
+        registry.sinks.append(PrometheusTextfileSink(str(path)))
+        registry.inc("recoveries_total", category="GIT_NO_UPSTREAM", mode="git", outcome="recovered")
+        registry.observe("recovery_seconds", 0.3, mode="git", outcome="recovered")
+        registry.flush()
+
+    text = path.read_text()
+    assert "# TYPE fixshell_recoveries_total counter" in text
+    assert 'fixshell_recoveries_total{category="GIT_NO_UPSTREAM",mode="git",outcome="recovered"} 2' in text
+    assert 'fixshell_recovery_seconds_bucket{mode="git",outcome="recovered",le="0.25"} 0' in text
+    assert 'fixshell_recovery_seconds_bucket{mode="git",outcome="recovered",le="+Inf"} 2' in text
+    assert 'fixshell_recovery_seconds_count{mode="git",outcome="recovered"} 2' in text
+
+def test_statsd_sink_sends_counters_and_sampled_timers():
+    server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    server.bind(("127.0.0.1", 0))
+    server.settimeout(2)
+    registry = enabled_registry()
+    registry.sinks.append(StatsdSink.from_address(f"127.0.0.1:{server.getsockname()[1]}"))
+    registry.inc("errors_total", category="X")
+    for _ in range(4):
+        registry.observe("command_seconds", 0.04, mode="git")
+    registry.flush()
+
+    packets = {server.recv(1024).decode() for _ in range(2)}
+    server.close()
+    assert "fixshell_errors_total:1|c|#category:X" in packets
+    assert "fixshell_command_seconds:50.000|ms|@0.25|#mode:git" in packets
+
+def test_statsd_address_is_validated():
+    assert StatsdSink.from_address("stats.local").address == ("stats.local", 8125)
+    assert StatsdSink.from_address(":9125").address == ("127.0.0.1", 9125)
+    with pytest.raises(ValueError):
+        StatsdSink.from_address("stats.local:abc")
+
+    from click.testing import CliRunner
+    from fixshell.main import cli
+    result = CliRunner().invoke(cli, ["--statsd", "stats.local:abc", "dataset", "layers"], obj={})
+    assert result.exit_code == 2 and "Invalid value for --statsd: invalid port 'abc'" in result.output
+
+def test_retry_engine_records_recovery_outcome(tmp_path, fixed_classifier):
+    flag = tmp_path / "flag"
+    registry = ResolverRegistry()
+    registry.register("DEMO", lambda *a, **k: flag.write_text("") or True)
+    policy = Policy({"DEMO": PolicyRule("allow")}, non_interactive=True)
+    engine = RetryEngine(fixed_classifier({"category": "DEMO", "type": "RECOVERABLE"}), registry, Executor(policy=policy), mode="git")
+    cmd = [sys.executable, "-c", f"import os, sys; sys.exit(0 if os.path.exists({str(flag)!r}) else 1)"]
+
+    metrics.enabled = True
+    try:
+        assert engine.execute_with_recovery(cmd, "demo")
+        snap = metrics.snapshot()
+    finally:
+        metrics.enabled = False
+        metrics.reset()
+
+    counters = snap["counters"]
+    assert counters[("recoveries_total", (("category", "DEMO"), ("mode", "git"), ("outcome", "recovered")))] == 1
+    assert counters[("resolutions_total", (("category", "DEMO"), ("outcome", "applied"), ("strategy", "resolver")))] == 1
+    assert snap["histograms"][("command_seconds", (("mode", "git"),))][len(metrics.buckets) + 1] == 2
@@ -0,0 +1,108 @@
+import socket
+import sys
+from fixshell.config import DATASET_DIR
+from fixshell.engine.classifier import Classifier
+from fixshell.engine.executor import Executor
+from fixshell.engine.network_probe import NetworkProbe, parse_endpoints, proxy_endpoint, ONLINE, DEGRADED, OFFLINE, NO_DNS
+from fixshell.engine.resolver_registry import ResolverRegistry
+from fixshell.engine.retry_engine import RetryEngine
+
+def _listener():
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen()
+    return server
+
+def _closed_port() -> int:
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+def _probe(endpoints, **kwargs) -> NetworkProbe:
+    probe = NetworkProbe(timeout=1.0, **kwargs)
+    probe.configure(endpoints)
+    return probe
+
+def test_parse_endpoints_and_proxy():
+    assert parse_endpoints("github.com:443, registry, [::1]:8080") == [("github.com", 443), ("registry", 443), ("::1", 8080)]
+    assert proxy_endpoint({"HTTPS_PROXY": "http://proxy.local:3128"}) == ("proxy.local", 3128)
+    assert proxy_endpoint({}) is None
+
+def test_local_listener_is_online_and_closed_port_offline():
+    server = _listener()
+    try:
+        port = server.getsockname()[1]
+        assert _probe([("127.0.0.1", port)]).refresh().label == ONLINE
+        assert _probe([("127.0.0.1", port), ("127.0.0.1", _closed_port())]).refresh().label == DEGRADED
+    finally:
+        server.close()
+    status = _probe([("127.0.0.1", _closed_port())]).refresh()
+    assert status.label == OFFLINE
+    assert status.offline
+
+def test_dns_failure_is_reported():
+    def resolve(*args):
+        raise socket.gaierror("Temporary failure in name resolution")
+    status = _probe([("github.com", 443)], resolve=resolve).refresh()
+    assert status.label == NO_DNS
+    assert status.results["github.com:443"]["dns"] is False
+
+def test_results_are_cached_for_ttl():
+    now = [0.0]
+    lookups = []
+    def resolve(*args):
+        lookups.append(args)
+        return socket.getaddrinfo(*args)
+    server = _listener()
+    try:
+        probe = _probe([("127.0.0.1", server.getsockname()[1])], resolve=resolve, clock=lambda: now[0])
+        probe.ttl = 30
+        assert probe.status(wait=True).label == ONLINE
+        now[0] = 10.0
+        probe.status(wait=True)
+        assert len(lookups) == 1
+        now[0] = 31.0
+        probe.status(wait=True)
+        assert len(lookups) == 2
+    finally:
+        server.close()
+
+def test_disabled_probe_never_reports_offline():
+    probe = NetworkProbe()
+    assert probe.label() == "Unchecked"
+    assert not probe.is_offline()
+
+def test_transient_failure_fails_fast_when_offline():
+    offline = _probe([("127.0.0.1", _closed_port())])
+    engine = RetryEngine(Classifier(DATASET_DIR, network=offline), ResolverRegistry(), Executor(), mode="git")
+    slept = []
+    engine.sleep = slept.append
+    state = {}
+
+    script = "import sys; sys.stderr.write('fatal: unable to access: Could not resolve host: github.com'); sys.exit(128)"
+    assert not engine.execute_with_recovery([sys.executable, "-c", script], "fetch", state=state)
+    assert slept == []
+    assert state["NETWORK_STATE"] == OFFLINE
+
+def test_report_commands_start_no_probe_journal_or_history(tmp_path, monkeypatch):
+    from click.testing import CliRunner
+    from fixshell import main
+    opened = []
+
+    class Recorder:
+        def __init__(self, name):
+            self.name = name
+
+        def __getattr__(self, attr):
+            return lambda *args, **kwargs: opened.append((self.name, attr))
+
+    monkeypatch.setattr(main, "AUDIT_ENABLED", True)
+    monkeypatch.setattr(main, "NETWORK_PROBE_ENABLED", True)
+    for name in ("audit_journal", "outcomes", "network"):
+        monkeypatch.setattr(main, name, Recorder(name))
+    runner = CliRunner()
+    assert runner.invoke(main.cli, ["dataset", "layers"], obj={}).exit_code == 0
+    assert runner.invoke(main.cli, ["audit", "query", "--dir", str(tmp_path)], obj={}).exit_code == 0
+    assert opened == []
@@ -0,0 +1,85 @@
+import sys
+from fixshell.engine.executor import Executor
+from fixshell.engine.outcome_store import OutcomeStore
+from fixshell.engine.policy import Policy, PolicyRule
+from fixshell.engine.resolver_registry import ResolverRegistry
+from fixshell.engine.retry_engine import RetryEngine
+from fixshell.engine.rule_matcher import RuleMatcher
+
+def test_counts_persist_and_are_smoothed(tmp_path):
+    path = str(tmp_path / "outcomes.db")
+    store = OutcomeStore(path)
+    assert store.success_rate("X", "resolver") == 0.5
+    store.record("X", "resolver", True)
+    store.record("X", "resolver", True)
+    store.record("X", "template", False)
+    store.close()
+
+    reopened = OutcomeStore(path)
+    assert reopened.counts("X", "resolver") == (2, 2)
+    assert reopened.counts("X") == (2, 3)
+    assert reopened.success_rate("X", "resolver") > reopened.success_rate("X", "template")
+
+def test_history_only_breaks_ties_between_matching_rules():
+    rules = [
+        {"category": "SPECIFIC", "error_pattern": "permission denied \\(publickey\\)"},
+        {"category": "GENERIC", "error_pattern": "permission denied"},
+        {"category": "OTHER", "error_pattern": "Permission denied"},
+    ]
+    store = OutcomeStore()
+    matcher = RuleMatcher(rules)
+    output = "git@github.com: Permission denied (publickey)."
+    for _ in range(3):
+        store.record("GENERIC", "resolver", True)
+        store.record("SPECIFIC", "resolver", False)
+    # A less specific rule with a better history still loses
+    assert matcher.get_best_match(output, store.rule_score)["category"] == "SPECIFIC"
+
+    matcher = RuleMatcher(rules[1:])
+    assert matcher.get_best_match(output, store.rule_score)["category"] == "GENERIC"
+    for _ in range(5):
+        store.record("OTHER", "resolver", True)
+    assert matcher.get_best_match(output, store.rule_score)["category"] == "OTHER"
+
+def test_strategy_order_follows_success_history(tmp_path, fixed_classifier):
+    flag = tmp_path / "flag"
+    calls = []
+
+    def resolver(matches, dry_run=False, **kwargs):
+        calls.append("resolver")
+        return True  # claims success but never fixes anything
+
+    registry = ResolverRegistry()
+    registry.register("DEMO", resolver)
+    fix = [[sys.executable, "-c", f"open({str(flag)!r}, 'w').close()"]]
+    diagnosis = {"category": "DEMO", "type": "RECOVERABLE", "fix_commands": fix}
+    cmd = [sys.executable, "-c", f"import os, sys; sys.exit(0 if os.path.exists({str(flag)!r}) else 1)"]
+    policy = Policy({"DEMO": PolicyRule("allow")}, non_interactive=True)
+    store = OutcomeStore()
+
+    # Without history the resolver goes first; it does not shift state
+    engine = RetryEngine(fixed_classifier(diagnosis), registry, Executor(policy=policy), outcomes=store)
+    assert not engine.execute_with_recovery(cmd, "demo")
+    assert calls == ["resolver"] and store.counts("DEMO", "resolver") == (0, 1)
+
+    # The template fix now ranks first and is recorded as shifting state
+    assert engine.execute_with_recovery(cmd, "demo")
+    assert calls == ["resolver"]
+    assert store.counts("DEMO", "template") == (1, 1)
+
+def test_cancelled_resolutions_are_not_learned(tmp_path, fixed_classifier):
+    def cancelled(matches, prompter=None, **kwargs):
+        # Menu option 1 is "Cancel"
+        return prompter.prompt("Select option", default="1") != "1"
+
+    registry = ResolverRegistry()
+    registry.register("DEMO", cancelled)
+    fix = [[sys.executable, "-c", "pass"]]
+    diagnosis = {"category": "DEMO", "type": "RECOVERABLE", "fix_commands": fix}
+    policy = Policy({"DEMO": PolicyRule("allow", auto_choice="1")})
+    store = OutcomeStore()
+    engine = RetryEngine(fixed_classifier(diagnosis), registry, Executor(policy=policy), outcomes=store)
+    # Declines "Apply this suggested fix?" too
+    engine.executor.confirm = lambda *args, **kwargs: False
+    assert not engine.execute_with_recovery([sys.executable, "-c", "import sys; sys.exit(1)"], "demo")
+    assert store.counts("DEMO") == (0, 0)
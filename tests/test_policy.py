@@ -0,0 +1,80 @@
+import json
+import sys
+import pytest
+from fixshell.engine.executor import Executor
+from fixshell.engine.policy import Policy, PolicyError, PolicyRule, Prompter
+from fixshell.engine.resolver_registry import ResolverRegistry, handle_directory_exists
+from fixshell.engine.retry_engine import RetryEngine
+
+def flaky_command(flag):
+    # Fails until the flag file exists
+    return [sys.executable, "-c", f"import os, sys; sys.exit(0 if os.path.exists({str(flag)!r}) else 1)"]
+
+def test_load_policy_file(tmp_path):
+    path = tmp_path / "policy.json"
+    path.write_text(json.dumps({
+        "non_interactive": True,
+        "default": {"action": "allow", "max_risk": "low"},
+        "categories": {"X": {"action": "deny"}}
+    }))
+    policy = Policy.load(str(path))
+    assert policy.decide("X") == "deny"
+    assert policy.decide("OTHER", "low") == "allow"
+    # Riskier than max_risk falls back to asking, which is denied unattended
+    assert policy.decide("OTHER", "high") == "deny"
+
+def test_invalid_action_is_rejected():
+    with pytest.raises(PolicyError):
+        PolicyRule(action="maybe")
+
+def test_allowed_category_runs_resolver_with_auto_choice(tmp_path, fixed_classifier):
+    flag = tmp_path / "flag"
+    answers = []
+
+    def resolver(matches, dry_run=False, **kwargs):
+        answers.append(kwargs["prompter"].prompt("Resolution", type=int, default=1))
+        flag.write_text("")
+        return True
+
+    registry = ResolverRegistry()
+    registry.register("DEMO", resolver)
+    policy = Policy({"DEMO": PolicyRule("allow", auto_choice=2)}, non_interactive=True)
+    engine = RetryEngine(fixed_classifier({"category": "DEMO", "type": "RECOVERABLE"}), registry, Executor(policy=policy))
+
+    assert engine.execute_with_recovery(flaky_command(flag), "demo")
+    assert answers == [2]
+    assert policy.decisions[0]["category"] == "DEMO"
+
+def test_denied_category_never_reaches_resolver(tmp_path, fixed_classifier):
+    called = []
+    registry = ResolverRegistry()
+    registry.register("DEMO", lambda *a, **k: called.append(1) or True)
+    policy = Policy(non_interactive=True)
+    engine = RetryEngine(fixed_classifier({"category": "DEMO", "type": "RECOVERABLE"}), registry, Executor(policy=policy))
+
+    assert not engine.execute_with_recovery(flaky_command(tmp_path / "flag"), "demo")
+    assert called == []
+    assert policy.decisions[0]["answer"] is False
+
+def test_destructive_confirms_are_never_auto_approved(tmp_path):
+    target = tmp_path / "build"
+    target.mkdir()
+    (target / "keep.txt").write_text("data")
+    policy = Policy({"FS_DIRECTORY_EXISTS": PolicyRule("allow", auto_choice=2)}, non_interactive=True)
+    prompter = Prompter(policy, "FS_DIRECTORY_EXISTS", auto=True)
+
+    assert not handle_directory_exists(["build"], cwd=str(tmp_path), prompter=prompter)
+    assert (target / "keep.txt").read_text() == "data"
+    assert policy.decisions[-1]["answer"] is False
+    # Confirms that default to yes still follow the policy
+    assert prompter.confirm("Start the service?", default=True, risk="medium")
+
+def test_max_risk_applies_to_the_resolver_action(tmp_path, fixed_classifier):
+    policy = Policy({"DEMO": PolicyRule("allow", max_risk="low")}, non_interactive=True)
+    for risk, reached in (("high", False), ("low", True)):
+        called = []
+        registry = ResolverRegistry()
+        registry.register("DEMO", lambda *a, **k: called.append(1) or True, risk=risk)
+        engine = RetryEngine(fixed_classifier({"category": "DEMO", "type": "RECOVERABLE", "severity": "low"}), registry, Executor(policy=policy))
+        engine.execute_with_recovery(flaky_command(tmp_path / "flag"), "demo")
+        assert bool(called) is reached
@@ -0,0 +1,68 @@
+import json
+from click.testing import CliRunner
+from fixshell.config import DATASET_DIR
+from fixshell.engine.regex_lint import ERROR, WARNING, INFO, analyze, lint_rules, load_dataset_rules
+from fixshell.engine.rule_layers import RuleLayer
+from fixshell.main import cli
+from fixshell.engine.rule_matcher import RuleMatcher
+
+def severities(pattern):
+    return {severity for severity, _ in analyze(pattern)["findings"]}
+
+def test_static_checks_flag_backtracking_shapes():
+    assert ERROR in severities(r"(a+)+$")
+    assert ERROR in severities(r"(\w+\s?)+$")
+    assert ERROR in severities(r"(a|aa)*$")
+    assert WARNING in severities(r"does not match.*use.*HEAD:(\S+)")
+    assert INFO in severities(r"cannot delete branch '(.*)' used by worktree")
+
+def test_static_checks_accept_unambiguous_patterns():
+    assert severities(r"(a|ab)*c") == set()
+    assert severities(r"(a+b)+") == set()
+    assert severities(r"cannot delete branch '([^']*)' used by worktree") == set()
+    # Lookaheads generated by the thefuck importer
+    assert severities(r"\A(?=[\s\S]*?foo)(?=[\s\S]*?bar)") == set()
+
+def test_shipped_datasets_pass_lint():
+    rules, errors = load_dataset_rules(DATASET_DIR)
+    assert errors == []
+    reports = lint_rules(rules, budget=0.05, timeout=2)
+    assert [(r["category"], r["findings"]) for r in reports if r["severity"] != "ok"] == []
+
+def test_lint_covers_overlay_files_and_reports_broken_ones(tmp_path):
+    rules_d = tmp_path / "rules.d"
+    rules_d.mkdir()
+    (rules_d / "git-corp.json").write_text(json.dumps({"schema_version": 2, "rules": [{"category": "CORP_SLOW", "error_pattern": "^(a|a)+$"}]}))
+    (rules_d / "docker-old.json").write_text(json.dumps({"schema_version": 7, "rules": []}))
+    rules, errors = load_dataset_rules(layers=[RuleLayer("user", str(rules_d))])
+    assert [(source, rule["category"]) for source, rule in rules] == [("user:git-corp.json", "CORP_SLOW")]
+    assert [source for source, _ in errors] == ["user:docker-old.json"]
+    reports = {r["source"]: r for r in lint_rules(rules, run_fuzz=False, errors=errors)}
+    assert reports["user:git-corp.json"]["severity"] == ERROR
+    assert "schema_version" in reports["user:docker-old.json"]["findings"][0][1]
+
+    # A bad schema_version is a lint error, not an "Internal Error"
+    result = CliRunner().invoke(cli, ["dataset", "lint", "--dir", str(rules_d), "--no-fuzz", "--json"], obj={})
+    assert result.exit_code == 1
+    assert {json.loads(line)["source"] for line in result.output.splitlines()} == {"dir:git-corp.json", "dir:docker-old.json"}
+
+def test_fuzzing_catches_catastrophic_pattern_without_hanging():
+    reports = lint_rules([("test", {"category": "BAD", "error_pattern": r"^(a|a)+$"}), ("test", {"category": "GOOD", "error_pattern": "fatal: not a git repository"})], budget=0.05, timeout=2)
+    bad, good = reports
+    assert bad["severity"] == ERROR
+    assert any("fuzzing timed out" in m or "exceeds" in m for _, m in bad["findings"])
+    assert good["severity"] == "ok"
+    assert good["worst_seconds"] < 0.05
+
+def test_runtime_guard_demotes_slow_rules_for_large_outputs():
+    rules = [{"error_pattern": "boom", "category": "SLOW"}]
+    matcher = RuleMatcher(rules, budget=0.0, demoted_max_chars=100)
+    assert matcher.find_matches("boom")
+    assert matcher.demoted == {0}
+    # Still used for short outputs, skipped for large ones
+    assert matcher.find_matches("boom")
+    assert matcher.find_matches("boom" + "x" * 200) == []
+
+    fast = RuleMatcher(rules)
+    fast.find_matches("boom" + "x" * 200)
+    assert fast.demoted == set()
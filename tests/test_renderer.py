@@ -0,0 +1,77 @@
+import io
+import json
+from fixshell.ui.backends import JsonBackend, PlainBackend, MAX_RAW_ERROR, select_backend, truncate
+from fixshell.ui.context_panel import ContextPanel
+from fixshell.ui.renderer import Renderer
+
+def test_auto_selects_plain_when_not_a_tty():
+    assert select_backend("auto", io.StringIO()).name == "plain"
+    assert select_backend("json").name == "json"
+
+def test_truncate_keeps_head_and_tail():
+    raw = "HEAD" + "x" * 100_000 + "the actual error"
+    short = truncate(raw)
+    assert len(short) < MAX_RAW_ERROR + 100
+    assert short.startswith("HEAD") and short.endswith("the actual error")
+    assert "characters omitted" in short
+
+def test_plain_backend_strips_markup():
+    out = io.StringIO()
+    backend = PlainBackend(out)
+    backend.info("Top Suspect: [bold]DISK_FULL[/bold]")
+    backend.table("Summary", ["Repo", "Outcome"], [("a", "OK")])
+    lines = out.getvalue().splitlines()
+    assert lines[0] == "    Top Suspect: DISK_FULL"
+    assert lines[2].split() == ["Repo", "Outcome"]
+
+def test_json_backend_emits_json_lines():
+    out = io.StringIO()
+    previous = Renderer.backend
+    Renderer.backend = JsonBackend(out)
+    try:
+        Renderer.print_fatal("GIT_NO_UPSTREAM", "Set upstream", "e" * (MAX_RAW_ERROR * 3))
+        ContextPanel.render({"AUTH_STATE": "octocat", "BRANCH_STATE": "main"})
+    finally:
+        Renderer.backend = previous
+
+    fatal, context = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert fatal["type"] == "fatal" and fatal["truncated"] is True
+    assert context["state"]["USER"] == "octocat" and context["state"]["BRANCH"] == "main"
+
+def test_resolver_menus_and_previews_go_through_the_backend():
+    from fixshell.engine.executor import Executor
+    from fixshell.engine.policy import Policy, PolicyRule, Prompter
+    from fixshell.engine.resolver_registry import handle_directory_exists
+    out = io.StringIO()
+    previous = Renderer.backend
+    Renderer.backend = JsonBackend(out)
+    try:
+        prompter = Prompter(Policy({"FS": PolicyRule("allow", auto_choice=4)}), "FS", auto=True)
+        assert not handle_directory_exists(["build"], prompter=prompter)
+        policy = Policy({"X": PolicyRule("deny")})
+        Executor(policy=policy).run(["true"], "Install", purpose="Adds a package", risk="high", category="X")
+    finally:
+        Renderer.backend = previous
+
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    kinds = [r["type"] for r in records]
+    assert kinds[:2] == ["warning", "menu"] and records[1]["options"][-1] == "4. Cancel"
+    assert {"type": "preview", "purpose": "Adds a package", "risk": "high"}.items() <= records[kinds.index("preview")].items()
+    assert records[-1] == {**records[-1], "type": "warning", "msg": "Step skipped by user."}
+
+def test_report_commands_print_no_banner(tmp_path, monkeypatch):
+    from click.testing import CliRunner
+    from fixshell import main
+    from fixshell.engine.outcome_store import OutcomeStore
+    # Keep the process-wide journal, history and probe untouched
+    monkeypatch.setattr(main, "AUDIT_ENABLED", False)
+    monkeypatch.setattr(main, "NETWORK_PROBE_ENABLED", False)
+    monkeypatch.setattr(main, "outcomes", OutcomeStore())
+    monkeypatch.setattr(main, "OUTCOMES_DB", str(tmp_path / "outcomes.db"))
+    cli = main.cli
+    runner = CliRunner()
+    result = runner.invoke(cli, ["--output", "plain", "dataset", "lint", "--no-fuzz", "--json"], obj={})
+    assert result.exit_code == 0
+    assert all(json.loads(line) for line in result.output.splitlines())
+    result = runner.invoke(cli, ["--output", "plain", "audit", "query", "--dir", str(tmp_path), "--json"], obj={})
+    assert "FIXSHELL" not in result.output
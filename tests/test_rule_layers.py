@@ -0,0 +1,101 @@
+import json
+import os
+import pytest
+from fixshell.engine.classifier import Classifier
+from fixshell.engine.rule_layers import RuleLayer, RuleLayers, default_layers, find_project_dir, mode_for_file, trust_project, trusted_projects
+from fixshell.engine.rule_model import DatasetError
+
+def write(path, data, bump=0):
+    path.write_text(json.dumps(data))
+    # mtime granularity can hide quick successive edits
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + bump * 10**9))
+
+@pytest.fixture
+def tree(tmp_path):
+    packaged, user, project = tmp_path / "packaged", tmp_path / "user", tmp_path / "repo" / ".fixshell" / "rules.d"
+    for d in (packaged, user, project):
+        d.mkdir(parents=True)
+    write(packaged / "git_errors.json", [
+        {"error_pattern": "not a git repository", "category": "NOT_A_GIT_REPO", "suggested_fix": ["git init"]},
+        {"error_pattern": "could not resolve host", "category": "NETWORK_DNS_FAILURE"},
+    ])
+    write(packaged / "linux_errors.json", [{"error_pattern": "could not resolve host", "category": "NETWORK_DNS_FAILURE"}])
+    layers = [
+        RuleLayer("packaged", str(packaged), files={"git_errors.json": "git", "linux_errors.json": "linux"}),
+        RuleLayer("user", str(user)),
+        RuleLayer("project", str(project)),
+    ]
+    return {"packaged": packaged, "user": user, "project": project, "layers": layers}
+
+def test_later_layers_override_and_disable(tree):
+    write(tree["user"] / "git-corp.json", [{"error_pattern": "not a git repository", "category": "NOT_A_GIT_REPO", "suggested_fix": ["Clone from git.corp"]}])
+    write(tree["project"] / "sso.json", {"schema_version": 2, "mode": "linux", "disable": ["NETWORK_DNS_FAILURE"],
+                                          "rules": [{"error_pattern": "SSO session expired", "category": "CORP_SSO_EXPIRED"}]})
+    layers = RuleLayers(tree["layers"])
+    assert layers.ruleset.get("NOT_A_GIT_REPO")[0].suggested_fix == ("Clone from git.corp",)
+    assert "NETWORK_DNS_FAILURE" not in layers.ruleset
+    assert [r.category for r in layers.ruleset.for_mode("linux")] == ["CORP_SSO_EXPIRED"]
+
+    classifier = Classifier(str(tree["packaged"]), layers=layers)
+    assert classifier.classify("error: SSO session expired", mode="git")["category"] == "CORP_SSO_EXPIRED"
+
+def test_hot_reload_reparses_only_changed_files(tree):
+    layers = RuleLayers(tree["layers"], interval=60)
+    classifier = Classifier(str(tree["packaged"]), layers=layers)
+    git_matcher = classifier.matchers["git"]
+    packaged_rules = tree["layers"][0].rules
+    assert classifier.classify("proxy returned 407")["category"] == "unknown"
+
+    write(tree["user"] / "linux_errors.json", [{"error_pattern": "proxy returned 407", "category": "PROXY_AUTH"}])
+    # Throttled until the interval passes
+    assert classifier.reload() is False
+    assert classifier.reload(force=True) is True
+    assert classifier.classify("proxy returned 407")["category"] == "PROXY_AUTH"
+    assert all(a is b for a, b in zip(tree["layers"][0].rules, packaged_rules))
+    assert classifier.matchers["git"] is git_matcher
+
+    os.remove(tree["user"] / "linux_errors.json")
+    assert classifier.reload(force=True) is True
+    assert classifier.classify("proxy returned 407")["category"] == "unknown"
+    assert classifier.reload(force=True) is False
+
+def test_broken_edit_keeps_last_good_rules(tree):
+    path = tree["user"] / "linux_errors.json"
+    write(path, [{"error_pattern": "proxy returned 407", "category": "PROXY_AUTH"}])
+    layers = RuleLayers(tree["layers"])
+    write(path, [{"error_pattern": "proxy returned (407", "category": "PROXY_AUTH"}], bump=1)
+    assert layers.reload(force=True) is False
+    assert "PROXY_AUTH" in layers.ruleset
+    assert str(path) in layers.errors
+
+    write(path, [{"error_pattern": "proxy returned 40[37]", "category": "PROXY_AUTH"}], bump=2)
+    assert layers.reload(force=True) is True
+    assert layers.errors == {}
+    assert layers.ruleset.get("PROXY_AUTH")[0].error_pattern == "proxy returned 40[37]"
+
+def test_malformed_overlay_falls_back_to_lower_layers(tree, capsys):
+    write(tree["user"] / "rules.json", [{"error_pattern": "x", "category": "X"}])
+    layers = RuleLayers(tree["layers"])
+    assert "unknown mode" in layers.errors[str(tree["user"] / "rules.json")]
+    assert "unknown mode" in capsys.readouterr().out
+    assert Classifier(str(tree["packaged"]), layers=layers).classify("fatal: not a git repository")["category"] == "NOT_A_GIT_REPO"
+
+    write(tree["packaged"] / "linux_errors.json", [{"error_pattern": "(", "category": "BROKEN"}])
+    with pytest.raises(DatasetError):
+        RuleLayers(tree["layers"])
+
+def test_default_layers_find_the_project_directory(tree, tmp_path):
+    nested = tmp_path / "repo" / "src" / "pkg"
+    nested.mkdir(parents=True)
+    assert find_project_dir(str(nested)) == str(tree["project"])
+    # A cloned repository's rules are ignored until the project is trusted
+    assert [layer.name for layer in default_layers(str(tree["packaged"]), cwd=str(nested), trusted=set())] == ["packaged", "system", "user"]
+    trusted = tmp_path / "trusted_projects"
+    trust_project(str(tmp_path / "repo"), path=str(trusted))
+    trust_project(str(tmp_path / "repo"), path=str(trusted))
+    assert trusted.read_text().count("\n") == 1
+    names = [layer.name for layer in default_layers(str(tree["packaged"]), cwd=str(nested), trusted=trusted_projects(str(trusted)))]
+    assert names == ["packaged", "system", "user", "project"]
+    assert [layer.name for layer in default_layers(str(tree["packaged"]), overlays=False)] == ["packaged"]
+    assert (mode_for_file("docker-registry.json"), mode_for_file("gitlab.json")) == ("docker", None)
@@ -0,0 +1,67 @@
+import json
+import pytest
+from fixshell.config import DATASET_DIR
+from fixshell.engine.classifier import Classifier
+from fixshell.engine.rule_model import DatasetError, Rule, RuleSet, load_dataset, load_rules, normalize_diagnosis, write_dataset
+
+def write(tmp_path, data, name="git_errors.json"):
+    path = tmp_path / name
+    path.write_text(json.dumps(data))
+    return str(path)
+
+def test_loads_both_schema_versions_with_normalized_fields(tmp_path):
+    entry = {"error_pattern": "not a git repository", "category": "NOT_A_GIT_REPO"}
+    v1 = load_dataset(write(tmp_path, [entry]), "git")
+    v2 = load_dataset(write(tmp_path, {"schema_version": 2, "mode": "git", "rules": [entry]}), "git")
+    assert v1 == v2
+    rule = v1[0]
+    assert (rule.type, rule.priority, rule.severity, rule.scope, rule.mode) == ("FATAL", 5, "low", "UNKNOWN", "git")
+    assert rule.compiled.search("fatal: Not A Git Repository")
+
+    path = str(tmp_path / "out.json")
+    write_dataset(path, v1, "git")
+    assert load_dataset(path, "git") == v1
+
+@pytest.mark.parametrize("entry, message", [
+    ({"error_pattern": "x", "category": "A", "fix": []}, "unknown field(s) fix"),
+    ({"error_pattern": "x", "category": "A", "type": "RECOVERABEL"}, "invalid type"),
+    ({"error_pattern": "(x", "category": "A"}, "invalid error_pattern"),
+    ({"error_pattern": "x", "category": "A", "priority": "high"}, "priority"),
+    ({"error_pattern": "x", "category": "A", "retry": {"max_attempts": 2}}, "only allowed on TRANSIENT"),
+    ({"error_pattern": "x", "category": "A", "fix_commands": ["git pull"]}, "fix_commands"),
+])
+def test_invalid_rules_name_file_and_rule(tmp_path, entry, message):
+    path = write(tmp_path, [entry])
+    with pytest.raises(DatasetError) as e:
+        load_dataset(path, "git")
+    assert path in str(e.value)
+    assert "rule 0 (A)" in str(e.value)
+    assert message in str(e.value)
+
+def test_rejects_duplicate_categories_and_unknown_schema(tmp_path):
+    entry = {"error_pattern": "x", "category": "A"}
+    with pytest.raises(DatasetError, match="duplicate category"):
+        load_dataset(write(tmp_path, [entry, entry]), "git")
+    with pytest.raises(DatasetError, match="schema_version 3"):
+        load_dataset(write(tmp_path, {"schema_version": 3, "rules": []}), "git")
+
+def test_shipped_datasets_are_indexed_by_category_and_mode():
+    rules = load_rules(DATASET_DIR)
+    assert "NOT_A_GIT_REPO" in rules
+    assert rules.get("NOT_A_GIT_REPO")[0].mode == "git"
+    assert all(rule.mode == "docker" for rule in rules.for_mode("docker"))
+    assert len(rules) == sum(len(rules.for_mode(m)) for m in ("docker", "git", "github", "linux"))
+
+    index = RuleSet([Rule.from_dict({"error_pattern": "x", "category": "A"}, mode="git")])
+    assert index.for_mode("linux") == []
+
+def test_diagnoses_always_carry_every_field():
+    diagnosis = normalize_diagnosis({"category": "X", "type": "TRANSIENT"})
+    assert diagnosis["type"] == "TRANSIENT"
+    assert diagnosis["fix_commands"] == [] and diagnosis["matches"] == [] and diagnosis["severity"] == "low"
+    # List defaults are not shared between diagnoses
+    diagnosis["matches"].append("a")
+    assert normalize_diagnosis({})["matches"] == []
+
+    unknown = Classifier(DATASET_DIR).classify("something nobody has seen before")
+    assert (unknown["category"], unknown["type"], unknown["fix_commands"]) == ("unknown", "FATAL", [])
@@ -0,0 +1,109 @@
+import io
+import json
+import pytest
+from fixshell.engine.state_store import StateStore, affected_keys
+from fixshell.ui.backends import JsonBackend
+from fixshell.ui.context_panel import LiveContextPanel
+from fixshell.ui.renderer import Renderer
+
+def test_only_effective_changes_are_dirty():
+    store = StateStore({"BRANCH_STATE": "main", "AUTH_STATE": "octocat"})
+    store.take_dirty()
+
+    store["BRANCH_STATE"] = "main"
+    assert store.take_dirty() == set()
+
+    version = store.version
+    store["BRANCH_STATE"] = "feature"
+    assert store.take_dirty() == {"BRANCH_STATE"}
+    assert store.take_dirty() == set()
+    assert store.version == version + 1
+    assert dict(store)["BRANCH_STATE"] == "feature"
+
+def test_panel_redraws_only_changed_rows():
+    out = io.StringIO()
+    previous = Renderer.backend
+    Renderer.backend = JsonBackend(out)
+    try:
+        store = StateStore({"AUTH_STATE": "octocat", "BRANCH_STATE": "main", "REPO_STATE": "Yes"})
+        panel = LiveContextPanel(store)
+        assert panel.sync() is False  # not shown yet
+
+        panel.show()
+        assert panel.sync() is False  # nothing changed since the first frame
+
+        store["BRANCH_STATE"] = "feature"
+        assert panel.sync() is True
+    finally:
+        Renderer.backend = previous
+
+    first, update = [json.loads(line)["state"] for line in out.getvalue().splitlines()]
+    assert first["USER"] == "octocat" and first["BRANCH"] == "main"
+    assert update == {"BRANCH": "feature"}
+
+def test_types_versions_and_subscriptions():
+    store = StateStore({"BRANCH_STATE": "main"}, types={"BRANCH_STATE": str})
+    seen = []
+    unsubscribe = store.subscribe(lambda key, value: seen.append((key, value)), ["BRANCH_STATE"])
+
+    store["BRANCH_STATE"] = "feature"
+    store["AUTH_STATE"] = "octocat"  # not subscribed
+    unsubscribe()
+    store["BRANCH_STATE"] = "main"
+
+    assert seen == [("BRANCH_STATE", "feature")]
+    assert store.version_of("BRANCH_STATE") == 3
+    with pytest.raises(TypeError):
+        store["BRANCH_STATE"] = 42
+
+def test_derived_values_follow_dependencies():
+    store = StateStore({"REPO_STATE": "No", "REMOTE_STATE": "None"})
+    store.derive("CAN_PUSH", ("REPO_STATE", "REMOTE_STATE"), lambda s: s["REPO_STATE"] == "Yes" and s["REMOTE_STATE"] != "None")
+    assert store["CAN_PUSH"] is False
+
+    store["REPO_STATE"] = "Yes"
+    store["REMOTE_STATE"] = "git@github.com:o/r.git"
+    assert store["CAN_PUSH"] is True
+    with pytest.raises(TypeError):
+        store["CAN_PUSH"] = False
+
+def test_probes_rerun_only_for_invalidated_keys():
+    calls = {"repo": 0, "auth": 0}
+
+    def repo():
+        calls["repo"] += 1
+        return {"BRANCH_STATE": "main", "REPO_STATE": "Yes"}
+
+    def auth():
+        calls["auth"] += 1
+        return {"AUTH_STATE": "octocat"}
+
+    store = StateStore()
+    store.add_probe(("BRANCH_STATE", "REPO_STATE"), repo)
+    store.add_probe(("AUTH_STATE",), auth)
+    store.ensure()
+    store.ensure()
+    assert calls == {"repo": 1, "auth": 1}
+
+    store.invalidate(*affected_keys(["git", "checkout", "-b", "x"]))
+    assert store.ensure() == set()  # probed again, nothing changed
+    assert calls == {"repo": 2, "auth": 1}
+
+    store.invalidate(*affected_keys(["git", "status"]))
+    store.ensure()
+    assert calls == {"repo": 2, "auth": 1}
+
+def test_restore_resumes_without_reprobing():
+    store = StateStore()
+    store.add_probe(("BRANCH_STATE",), lambda: {"BRANCH_STATE": "main"})
+    store.ensure()
+    snapshot = json.loads(json.dumps(store.snapshot()))
+
+    def must_not_run():
+        raise AssertionError("probe ran after restore")
+
+    resumed = StateStore()
+    resumed.add_probe(("BRANCH_STATE",), must_not_run)
+    resumed.restore(snapshot)
+    resumed.ensure()
+    assert resumed["BRANCH_STATE"] == "main"
@@ -0,0 +1,43 @@
+import sys
+import time
+import pytest
+from fixshell.engine.step_graph import StepGraph
+
+def sleeper(seconds):
+    return [sys.executable, "-c", f"import time; time.sleep({seconds})"]
+
+def test_graph_rejects_cycles():
+    graph = StepGraph()
+    graph.add_step("a", ["true"], "A", depends_on=["b"])
+    graph.add_step("b", ["true"], "B", depends_on=["a"])
+    with pytest.raises(ValueError, match="Cycle"):
+        graph.validate()
+
+def test_graph_rejects_unknown_dependency():
+    graph = StepGraph()
+    graph.add_step("a", ["true"], "A", depends_on=["missing"])
+    with pytest.raises(ValueError, match="unknown step"):
+        graph.validate()
+
+def test_independent_steps_run_concurrently(make_sm):
+    graph = StepGraph()
+    graph.add_step("one", sleeper(0.4), "Sleep one")
+    graph.add_step("two", sleeper(0.4), "Sleep two")
+    graph.add_step("three", sleeper(0.4), "Sleep three")
+
+    start = time.monotonic()
+    results = make_sm().execute_graph(graph, max_parallel=3)
+    elapsed = time.monotonic() - start
+
+    assert results == {"one": True, "two": True, "three": True}
+    assert elapsed < 1.0
+
+def test_failed_dependency_skips_dependents(make_sm):
+    graph = StepGraph()
+    graph.add_step("fail", [sys.executable, "-c", "raise SystemExit(3)"], "Failing step")
+    graph.add_step("after", ["true"], "Dependent step", depends_on=["fail"])
+    graph.add_step("other", ["true"], "Independent step")
+
+    results = make_sm().execute_graph(graph)
+
+    assert results == {"fail": False, "after": False, "other": True}
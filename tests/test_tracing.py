@@ -0,0 +1,66 @@
+import json
+import sys
+import pytest
+from fixshell.engine.executor import Executor
+from fixshell.engine.policy import Policy, PolicyRule
+from fixshell.engine.resolver_registry import ResolverRegistry
+from fixshell.engine.retry_engine import RetryEngine
+from fixshell.engine.tracing import NOOP_SPAN, Tracer, tracer
+
+@pytest.fixture
+def tracing():
+    tracer.reset()
+    tracer.enable()
+    yield tracer
+    tracer.disable()
+    tracer.reset()
+
+def test_disabled_tracer_is_a_noop():
+    t = Tracer()
+    with t.span("x", cmd=["git", "status"]) as span:
+        span.set(returncode=0)
+    assert span is NOOP_SPAN
+    assert t.spans == []
+
+def test_nested_spans_export_chrome_trace(tmp_path):
+    t = Tracer()
+    t.enable()
+    with t.span("outer") as outer:
+        with t.span("inner", cmd=["git", "status"]):
+            pass
+
+    path = tmp_path / "trace.json"
+    t.export(str(path))
+    events = {e["name"]: e for e in json.loads(path.read_text())["traceEvents"]}
+    assert events["inner"]["args"]["parent_id"] == outer.id
+    assert events["inner"]["args"]["cmd"] == "git status"
+    assert "parent_id" not in events["outer"]["args"]
+    assert events["outer"]["ph"] == "X" and events["outer"]["dur"] >= events["inner"]["dur"]
+
+def test_recovery_loop_spans_cover_commands_and_resolvers(tmp_path, tracing, fixed_classifier):
+    flag = tmp_path / "flag"
+
+    def resolver(matches, dry_run=False, **kwargs):
+        kwargs["runner"].run([sys.executable, "-c", f"open({str(flag)!r}, 'w').close()"], "touch flag")
+        return True
+
+    registry = ResolverRegistry()
+    registry.register("DEMO", resolver)
+    policy = Policy({"DEMO": PolicyRule("allow")}, non_interactive=True)
+    engine = RetryEngine(fixed_classifier({"category": "DEMO", "type": "RECOVERABLE"}), registry, Executor(policy=policy))
+    cmd = [sys.executable, "-c", f"import os, sys; sys.exit(0 if os.path.exists({str(flag)!r}) else 1)"]
+    assert engine.execute_with_recovery(cmd, "demo")
+
+    spans = {}
+    for s in tracing.spans:
+        spans.setdefault(s.name, []).append(s)
+    recovery = spans["recovery"][0]
+    resolver_span = spans["resolver"][0]
+    assert recovery.args["ok"] is True
+    assert resolver_span.parent == recovery.id
+    assert resolver_span.args["category"] == "DEMO"
+    # Two attempts of the command plus the resolver's own subprocess
+    commands = spans["subprocess"]
+    assert [s.args["returncode"] for s in commands if s.parent == recovery.id] == [1, 0]
+    assert any(s.parent == resolver_span.id for s in commands)
+    assert spans["classify"][0].parent == recovery.id
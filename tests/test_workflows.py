@@ -0,0 +1,76 @@
+import json
+import sys
+from pathlib import Path
+import pytest
+from fixshell.engine import workflow_loader
+
+def write_workflow(tmp_path, steps, inputs=None):
+    path = tmp_path / "wf.json"
+    path.write_text(json.dumps({"schema_version": 1, "name": "test_wf", "inputs": inputs or {}, "steps": steps}))
+    return str(path)
+
+def append(log, text):
+    return [sys.executable, "-c", f"open({str(log)!r}, 'a').write({text!r})"]
+
+@pytest.mark.parametrize("name", workflow_loader.list_workflows())
+def test_packaged_workflows_load(name):
+    definition = workflow_loader.load_workflow_definition(name)
+    graph = workflow_loader.build_graph(definition)
+    assert graph.steps
+
+def test_inputs_are_rendered_without_touching_other_braces():
+    cmd = workflow_loader.render(["run", "--name", "{name}", "{ res.end() }"], {"name": "web"})
+    assert cmd == ["run", "--name", "web", "{ res.end() }"]
+
+def test_missing_required_input_is_rejected(tmp_path):
+    path = write_workflow(tmp_path, [{"id": "a", "cmd": ["echo", "{who}"]}], inputs={"who": {}})
+    with pytest.raises(workflow_loader.WorkflowError, match="requires input 'who'"):
+        workflow_loader.build_graph(workflow_loader.load_workflow_definition(path))
+
+def test_satisfied_precondition_skips_step(tmp_path, make_sm):
+    log = tmp_path / "log.txt"
+    path = write_workflow(tmp_path, [
+        {"id": "a", "cmd": append(log, "a"), "precondition": {"cmd": ["true"]}},
+        {"id": "b", "cmd": append(log, "b"), "precondition": {"cmd": ["false"]}},
+    ])
+    assert all(make_sm().run_workflow(path).values())
+    assert log.read_text() == "b"
+
+def test_rerun_only_redoes_missing_work(tmp_path, make_sm):
+    log = tmp_path / "log.txt"
+    flag = tmp_path / "flag"
+    path = write_workflow(tmp_path, [
+        {"id": "first", "cmd": append(log, "1")},
+        {"id": "second", "cmd": [sys.executable, "-c", f"import os, sys; sys.exit(0 if os.path.exists({str(flag)!r}) else 1)"], "depends_on": ["first"]},
+    ])
+
+    assert make_sm().run_workflow(path) == {"first": True, "second": False}
+    flag.write_text("")
+    assert make_sm().run_workflow(path, resume=True) == {"first": True, "second": True}
+    assert log.read_text() == "1"
+
+def test_interrupted_runs_are_not_resumed_silently(tmp_path, make_sm):
+    log = tmp_path / "log.txt"
+    path = write_workflow(tmp_path, [
+        {"id": "commit", "cmd": append(log, "c"), "idempotency_key": "commit:Update", "precondition": {"cmd": ["test", "-e", str(tmp_path / "clean")]}},
+        {"id": "tag", "cmd": append(log, "t"), "idempotency_key": "tag:Update", "depends_on": ["commit"]},
+        {"id": "push", "cmd": ["false"], "depends_on": ["tag"]},
+    ])
+    assert make_sm().run_workflow(path) == {"commit": True, "tag": True, "push": False}
+
+    # Without asking for it, the next run starts over
+    assert make_sm().run_workflow(path)["push"] is False
+    assert log.read_text() == "ctct"
+    # When resuming, a step with a precondition still re-checks the system
+    assert make_sm().run_workflow(path, resume=True)["push"] is False
+    assert log.read_text() == "ctctc"
+    (tmp_path / "clean").write_text("")
+    make_sm().run_workflow(path, resume=True)
+    assert log.read_text() == "ctctc"
+
+    # A stale journal is discarded even when resuming
+    journal = workflow_loader.WorkflowJournal.for_run("test_wf")
+    saved = Path(journal.path)
+    saved.write_text(json.dumps(dict(json.loads(saved.read_text()), started=0)))
+    make_sm().run_workflow(path, resume=True)
+    assert log.read_text() == "ctctct"